@@ -9,10 +9,14 @@ from django.contrib import admin
 from apps.volontulo.models import (
     UserProfile,
     Organization,
-    Offer
+    Offer,
+    Webhook,
+    WebhookDeadLetter,
 )
 
 
 admin.site.register(UserProfile)
 admin.site.register(Organization)
 admin.site.register(Offer)
+admin.site.register(Webhook)
+admin.site.register(WebhookDeadLetter)
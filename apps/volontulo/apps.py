@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: apps
+"""
+
+from django.apps import AppConfig
+
+
+class VolontuloConfig(AppConfig):
+    u"""Volontulo application configuration."""
+    name = 'apps.volontulo'
+    verbose_name = u'Volontulo'
+
+    def ready(self):
+        u"""Connect signal handlers and load offers search index."""
+        # pylint: disable=unused-variable
+        from apps.volontulo import signals
+        from apps.volontulo.lib import search_index
+        search_index.load_index()
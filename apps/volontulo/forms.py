@@ -189,6 +189,13 @@ class OfferApplyForm(forms.Form):
     comments = forms.CharField(required=False, widget=forms.Textarea)
 
 
+class OfferMessageForm(forms.Form):
+
+    u"""Form of message to all volunteers of offer."""
+    subject = forms.CharField(max_length=255)
+    message = forms.CharField(widget=forms.Textarea())
+
+
 class ContactForm(forms.Form):
 
     u"""Basic contact form."""
@@ -211,8 +218,15 @@ class AdministratorContactForm(ContactForm):
         ('VOLUNTEER', u'wolontariusz'),
         ('ORGANIZATION', u'organizacja'),
     )
-    ADMINISTRATORS = [
-        (key, value) for key, value in get_administrators_emails().items()
-    ]
     applicant = forms.Select(choices=APPLICANTS)
-    administrator = forms.Select(choices=ADMINISTRATORS)
+
+    def __init__(self, *args, **kwargs):
+        u"""Initialize form with choices of current administrators.
+
+        They're read when form is created, not when module is imported, so
+        importing forms does not query database.
+        """
+        super(AdministratorContactForm, self).__init__(*args, **kwargs)
+        self.administrator = forms.Select(
+            choices=list(get_administrators_emails().items())
+        )
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: bulk_messages
+"""
+
+import datetime
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from apps.volontulo.lib.email import EMAIL_TEMPLATES
+from apps.volontulo.lib.email import FROM_ADDRESS
+from apps.volontulo.models import BulkMessage
+from apps.volontulo.models import QueuedEmail
+
+# number of emails queued in one transaction and released at once:
+CHUNK_SIZE = 100
+# emails of organization released to outbox per minute:
+ORGANIZATION_RATE = 100
+
+
+def send_bulk_messages(base_context, now=None, chunk_size=CHUNK_SIZE):
+    u"""Queue emails of all waiting bulk messages.
+
+    Yields ids of messages and numbers of queued emails.
+
+    :param base_context: dict Variables of all emails, e.g. domain
+    :param now: datetime Time of sending
+    :param chunk_size: int Number of volunteers processed at once
+    """
+    now = now or timezone.now()
+    for message_id in list(BulkMessage.objects.filter(
+            status='queued',
+    ).order_by('id').values_list('id', flat=True)):
+        yield message_id, fan_out(message_id, base_context, now, chunk_size)
+
+
+def fan_out(message_id, base_context, now=None, chunk_size=CHUNK_SIZE):
+    u"""Queue email of bulk message for each active volunteer of offer.
+
+    Message is rendered once. Volunteers are read in chunks by id and each
+    chunk is queued in one transaction with position of message, so sending
+    can be resumed after crash. Chunks are released to outbox one after
+    another at ORGANIZATION_RATE of organization, also when organization has
+    sent other messages recently. Returns number of queued emails.
+
+    :param message_id: int Bulk message id
+    :param base_context: dict Variables of all emails, e.g. domain
+    :param now: datetime Time of sending
+    :param chunk_size: int Number of volunteers processed at once
+    """
+    now = now or timezone.now()
+    message = BulkMessage.objects.select_related(
+        'offer', 'organization', 'sender',
+    ).get(id=message_id)
+    text, html = EMAIL_TEMPLATES.render('bulk_message', {
+        'offer': message.offer,
+        'organization': message.organization.name,
+        'sender_email': message.sender.email,
+        'message': message.message,
+    }, base_context)
+    interval = datetime.timedelta(minutes=chunk_size / ORGANIZATION_RATE)
+    queued = 0
+    while True:
+        with transaction.atomic():
+            message = BulkMessage.objects.select_for_update().get(
+                id=message_id
+            )
+            if message.status != 'queued':
+                return queued
+            # emails are released after emails of organization queued before:
+            latest = BulkMessage.objects.filter(
+                organization_id=message.organization_id,
+            ).aggregate(latest=Max('scheduled_until'))['latest']
+            release_at = max(now, latest or now)
+            chunk = list(User.objects.filter(
+                offer=message.offer_id,
+                id__gt=message.last_user_id,
+                is_active=True,
+            ).order_by('id').values_list('id', 'email')[:chunk_size])
+            QueuedEmail.objects.bulk_create(
+                QueuedEmail(
+                    subject=message.subject,
+                    body=text,
+                    html_body=html,
+                    from_email=FROM_ADDRESS,
+                    recipients=email,
+                    next_attempt_at=release_at,
+                ) for _, email in chunk
+            )
+            if chunk:
+                message.last_user_id = chunk[-1][0]
+                message.emails_count += len(chunk)
+                message.scheduled_until = release_at + interval
+            if len(chunk) < chunk_size:
+                message.status = 'sent'
+                message.sent_at = now
+            message.save()
+        queued += len(chunk)
+        if message.status == 'sent':
+            return queued
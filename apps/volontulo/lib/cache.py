@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: cache
+"""
+
+import datetime
+import time
+
+from django.core.cache import cache
+from django.utils import timezone
+
+GENERATION_KEY = 'volontulo:offers:generation'
+MODIFIED_KEY = 'volontulo:offers:modified'
+# values cached until offers change are recomputed at least that often:
+OFFERS_CACHE_TIMEOUT = 60 * 60
+
+
+def offers_generation():
+    u"""Return number identifying current state of offers.
+
+    Values cached under keys containing it are invalidated by changing it.
+    After eviction from cache it starts again from current time, so it never
+    comes back to one of its previous values.
+    """
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, int(time.time() * 1000), None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def bump_offers_generation():
+    u"""Invalidate values cached for current state of offers and return new
+    offers generation."""
+    try:
+        generation = cache.incr(GENERATION_KEY)
+    except ValueError:
+        generation = offers_generation()
+    cache.set(MODIFIED_KEY, time.time(), None)
+    return generation
+
+
+def offers_last_modified():
+    u"""Return time of last change of offers or None if it is unknown."""
+    modified = cache.get(MODIFIED_KEY)
+    if modified is None:
+        return None
+    return datetime.datetime.fromtimestamp(modified, timezone.utc)
+
+
+def offers_cache_key(*parts):
+    u"""Build cache key valid until offers change.
+
+    :param parts: strings identifying cached value
+    """
+    return u':'.join(
+        ['volontulo:offers', str(offers_generation())] +
+        [str(part) for part in parts]
+    )
+
+
+def cached_offers_data(parts, compute, timeout=OFFERS_CACHE_TIMEOUT):
+    u"""Return value cached until offers change, computing it on cache miss.
+
+    :param parts: tuple Strings identifying cached value
+    :param compute: callable Returning value to cache
+    :param timeout: int Maximal time of caching in seconds
+    """
+    key = offers_cache_key(*parts)
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, timeout)
+    return value
@@ -4,19 +4,26 @@ u"""
 .. module:: email
 """
 
+import logging
+import smtplib
+from collections import OrderedDict
+
+from django.conf import settings
 from django.contrib.sites.shortcuts import get_current_site
 from django.core.mail import EmailMultiAlternatives
-from django.core.mail import get_connection
-from django.template import Context
-from django.template.loader import get_template
+from django.db import transaction
+from django.utils import timezone
 
+from apps.volontulo.lib.email_templates import EmailTemplates
+from apps.volontulo.lib.smtp_pool import get_pool
+from apps.volontulo.models import AdminNotification
+from apps.volontulo.models import QueuedEmail
 from apps.volontulo.utils import get_administrators_emails
 
+# pylint: disable=invalid-name
+logger = logging.getLogger('volontulo.email')
+
 FROM_ADDRESS = 'support@volontuloapp.org'
-FAIL_SILENTLY = False
-AUTH_USER = None
-AUTH_PASSWORD = None
-CONNECTION = None
 
 SUBJECTS = {
     'offer_application': u'Zgłoszenie chęci pomocy w ofercie',
@@ -24,41 +31,232 @@ SUBJECTS = {
     'registration': u'Rejestracja na Volontulo',
     'volunteer_to_admin': u'Kontakt z administratorem',
     'volunteer_to_organisation': u'Kontakt od wolontariusza',
+    'admin_digest': u'Podsumowanie powiadomień Volontulo',
+    'newsletter': u'Nowe oferty na Volontulo',
+    'offer_alert': u'Nowe oferty pasujące do Twoich wyszukiwań',
+    'offer_reminder': u'Przypomnienie o wolontariacie',
+    'bulk_message': u'Wiadomość od organizacji',
 }
+# how administrators get copies of each email: "bcc" sends them hidden copy
+# immediately, "digest" records notification included in next digest sent
+# by send_admin_digest command, None means no copy:
+ADMIN_COPIES = {
+    'offer_application': 'digest',
+    'offer_creation': 'bcc',
+    'registration': 'digest',
+    'volunteer_to_admin': 'bcc',
+    'volunteer_to_organisation': 'digest',
+    'admin_digest': None,
+    'newsletter': None,
+    'offer_alert': None,
+    'offer_reminder': None,
+    'bulk_message': None,
+}
+# number of notifications of each email listed in digest:
+DIGEST_MAX_NOTIFICATIONS = 50
+EMAIL_TEMPLATES = EmailTemplates(SUBJECTS)
+# errors of single message, which do not break connection:
+MESSAGE_ERRORS = (
+    smtplib.SMTPRecipientsRefused,
+    smtplib.SMTPSenderRefused,
+    smtplib.SMTPDataError,
+)
 
 
 def send_mail(request, templates_name, recipient_list, context=None):
-    """Proxy for sending emails."""
-    fail_silently = FAIL_SILENTLY
-    auth_user = AUTH_USER
-    auth_password = AUTH_PASSWORD
-    connection = CONNECTION
+    u"""Render email and add it to outbox.
 
-    context = Context(context or {})
+    Emails are delivered by send_queued_mail command, so requests don't wait
+    for SMTP server, unless OUTBOX_SEND_IMMEDIATELY is set. Administrators get
+    copies as configured in ADMIN_COPIES.
+    """
+    context = dict(context or {})
     context.update({
         'protocol': 'https' if request.is_secure() else 'http',
         'domain': get_current_site(request).domain,
     })
-    text_template = get_template('emails/{}.txt'.format(templates_name))
-    html_template = get_template('emails/{}.html'.format(templates_name))
-
-    bcc = list(get_administrators_emails().values())
-    connection = connection or get_connection(
-        username=auth_user,
-        password=auth_password,
-        fail_silently=fail_silently
-    )
-    # required, if omitted then no emails from BCC are send
-    headers = {'bcc': ','.join(bcc)}
-    email = EmailMultiAlternatives(
-        SUBJECTS[templates_name],
-        text_template.render(context),
-        FROM_ADDRESS,
-        recipient_list,
+    text, html = EMAIL_TEMPLATES.render(templates_name, context)
+
+    admin_copy = ADMIN_COPIES.get(templates_name)
+    with transaction.atomic():
+        email = QueuedEmail.objects.enqueue(
+            recipient_list,
+            list(get_administrators_emails().values())
+            if admin_copy == 'bcc' else [],
+            subject=SUBJECTS[templates_name],
+            body=text,
+            html_body=html,
+            from_email=FROM_ADDRESS,
+        )
+        if admin_copy == 'digest':
+            AdminNotification.objects.create(
+                templates_name=templates_name,
+                subject=SUBJECTS[templates_name],
+                recipients=u', '.join(recipient_list),
+                body=_strip_layout(text),
+            )
+    if settings.OUTBOX_SEND_IMMEDIATELY:
+        send_queued()
+    return email
+
+
+def _strip_layout(text):
+    u"""Return content of plain text email without header and footer of
+    emails/base.txt layout."""
+    content = text.split(u'\n---\n')[0].strip()
+    if content.startswith(u'VOLONTULO'):
+        content = content[len(u'VOLONTULO'):].strip()
+    return content
+
+
+def send_admin_digest(protocol, domain):
+    u"""Send administrators digest of notifications recorded since previous
+    digest.
+
+    Each administrator gets separate email. Returns number of notifications
+    included in digest.
+
+    :param protocol: string Protocol of links, "http" or "https"
+    :param domain: string Domain of links
+    """
+    with transaction.atomic():
+        notifications = list(
+            AdminNotification.objects.select_for_update().filter(
+                digest_sent_at__isnull=True,
+            ).order_by('id')
+        )
+        if not notifications:
+            return 0
+        groups = OrderedDict()
+        for notification in notifications:
+            group = groups.setdefault(notification.templates_name, {
+                'subject': notification.subject,
+                'count': 0,
+                'notifications': [],
+            })
+            group['count'] += 1
+            if len(group['notifications']) < DIGEST_MAX_NOTIFICATIONS:
+                group['notifications'].append(notification)
+        for group in groups.values():
+            group['more'] = group['count'] - len(group['notifications'])
+        text, html = EMAIL_TEMPLATES.render('admin_digest', {
+            'protocol': protocol,
+            'domain': domain,
+            'since': notifications[0].created_at,
+            'groups': list(groups.values()),
+        })
+        for address in get_administrators_emails().values():
+            QueuedEmail.objects.enqueue(
+                [address],
+                subject=SUBJECTS['admin_digest'],
+                body=text,
+                html_body=html,
+                from_email=FROM_ADDRESS,
+            )
+        AdminNotification.objects.filter(
+            id__in=[notification.id for notification in notifications]
+        ).update(digest_sent_at=timezone.now())
+    return len(notifications)
+
+
+def _build_message(email, connection):
+    u"""Return message of queued email.
+
+    :param email: QueuedEmail instance
+    :param connection: email backend instance
+    """
+    bcc = [address for address in email.bcc.split(',') if address]
+    message = EmailMultiAlternatives(
+        email.subject,
+        email.body,
+        email.from_email,
+        email.recipients.split(','),
         bcc,
         connection=connection,
-        headers=headers
+        # required, if omitted then no emails from BCC are send
+        headers={'bcc': email.bcc} if bcc else None,
     )
-    email.attach_alternative(html_template.render(context), 'text/html')
+    if email.html_body:
+        message.attach_alternative(email.html_body, 'text/html')
+    return message
+
+
+def send_queued(batch_size=None):
+    u"""Send batch of due emails from outbox through pooled connection.
+
+    Returns numbers of sent and failed emails. Failed emails are retried
+    later with exponential backoff. Emails sent just before crash of worker
+    may be sent again after their claim expires.
+
+    :param batch_size: int Maximal number of sent emails
+    """
+    emails = QueuedEmail.objects.claim(batch_size)
+    if not emails:
+        return 0, 0
+    sent = []
+    failed = 0
+    try:
+        with get_pool().connection() as connection:
+            while emails:
+                try:
+                    _build_message(emails[0], connection).send()
+                except MESSAGE_ERRORS as ex:
+                    logger.warning(
+                        u"Unable to send email %s: %s", emails[0].id, ex
+                    )
+                    QueuedEmail.objects.mark_failed(emails[0], ex)
+                    failed += 1
+                except (smtplib.SMTPException, OSError):
+                    raise
+                except Exception as ex:  # pylint: disable=broad-except
+                    # unexpected error of single message must not leave
+                    # the rest of batch claimed:
+                    logger.exception(
+                        u"Unexpected error sending email %s", emails[0].id
+                    )
+                    QueuedEmail.objects.mark_failed(emails[0], ex)
+                    failed += 1
+                else:
+                    sent.append(emails[0].id)
+                emails.pop(0)
+    except (smtplib.SMTPException, OSError) as ex:
+        # connection is broken, the rest of emails is retried later:
+        logger.error(u"SMTP connection failed: %s", ex)
+        for email in emails:
+            QueuedEmail.objects.mark_failed(email, ex)
+        failed += len(emails)
+    finally:
+        QueuedEmail.objects.mark_sent(sent)
+    return len(sent), failed
+
+
+def add_link_arguments(parser, emails=u'emails'):
+    u"""Add --protocol and --domain arguments of links to command parser.
+
+    Commands run outside of request need them to build absolute links.
+
+    :param parser: argparse.ArgumentParser instance of command
+    :param emails: string Name of sent emails used in help
+    """
+    parser.add_argument(
+        '--protocol',
+        choices=('http', 'https'),
+        default='https',
+        help=u"Protocol of links in {}.".format(emails),
+    )
+    parser.add_argument(
+        '--domain',
+        default='volontuloapp.org',
+        help=u"Domain of links in {}.".format(emails),
+    )
+
+
+def link_context(options):
+    u"""Return variables of links in emails from options of command.
 
-    return email.send()
+    :param options: dict Command options with --protocol and --domain
+    """
+    return {
+        'protocol': options['protocol'],
+        'domain': options['domain'],
+    }
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: email_templates
+"""
+
+import re
+import threading
+from collections import OrderedDict
+
+from django.template import Context
+from django.template import Engine
+from django.template import engines
+from django.template.loaders import app_directories
+from django.template.loaders import cached
+from django.template.loaders import filesystem
+
+# HTML templates of emails get CSS of layout inlined:
+EMAILS_PREFIX = 'emails/'
+LAYOUT_TEMPLATE = 'emails/base.html'
+
+STYLE_RE = re.compile(r'<style[^>]*>(.*?)</style>', re.DOTALL | re.IGNORECASE)
+RULE_RE = re.compile(r'([^{}]+)\{([^{}]*)\}')
+TAG_SELECTOR_RE = re.compile(r'^[a-z][a-z0-9]*$')
+STYLE_ATTRIBUTE_RE = re.compile(r'\sstyle="([^"]*)"')
+
+
+def parse_css(source):
+    u"""Return declarations of CSS rules found in <style> elements keyed by
+    tag name.
+
+    Only plain tag selectors can be inlined, others (pseudo-classes, classes)
+    are skipped and stay in <style> element.
+
+    :param source: string HTML source
+    """
+    rules = OrderedDict()
+    for css in STYLE_RE.findall(source):
+        for selectors, declarations in RULE_RE.findall(css):
+            declarations = u'; '.join(
+                declaration.strip()
+                for declaration in declarations.split(u';')
+                if declaration.strip()
+            )
+            for selector in selectors.split(u','):
+                selector = selector.strip().lower()
+                if TAG_SELECTOR_RE.match(selector):
+                    rules[selector] = u'; '.join(
+                        rule for rule in (rules.get(selector), declarations)
+                        if rule
+                    )
+    return rules
+
+
+def inline_css(source, rules):
+    u"""Add declarations of rules to style attributes of matching tags.
+
+    Declarations already present in style attribute take precedence, so they
+    are placed after inlined ones.
+
+    :param source: string HTML source
+    :param rules: dict Declarations keyed by tag name returned by parse_css
+    """
+    for tag, declarations in rules.items():
+        def _inline(match, tag=tag, declarations=declarations):
+            u"""Return tag with declarations added to its style."""
+            attributes = match.group(1)
+            style = STYLE_ATTRIBUTE_RE.search(attributes)
+            if style:
+                attributes = u'{}{}; {}'.format(
+                    attributes[:style.start(1)],
+                    declarations,
+                    attributes[style.start(1):],
+                )
+            else:
+                attributes = u' style="{}"{}'.format(declarations, attributes)
+            return u'<{}{}>'.format(tag, attributes)
+        source = re.sub(
+            r'<{}\b([^>]*)>'.format(tag), _inline, source, flags=re.IGNORECASE
+        )
+    return source
+
+
+class CssInliningMixin(object):
+    u"""Template loader mixin inlining layout CSS into HTML emails.
+
+    CSS is inlined once, when template source is loaded, as compiled
+    templates are kept by cached loader. Parsed CSS of layout is kept by
+    loader as well, until it's reset along with cached templates.
+    """
+    _rules = None
+
+    def reset(self):
+        u"""Drop parsed CSS of layout."""
+        super(CssInliningMixin, self).reset()
+        self._rules = None
+
+    def load_template_source(self, template_name, template_dirs=None):
+        u"""Return source of template with layout CSS inlined."""
+        source, origin = super(CssInliningMixin, self).load_template_source(
+            template_name, template_dirs
+        )
+        if (
+                template_name.startswith(EMAILS_PREFIX) and
+                template_name.endswith('.html')
+        ):
+            if self._rules is None:
+                self._rules = parse_css(
+                    super(CssInliningMixin, self).load_template_source(
+                        LAYOUT_TEMPLATE, template_dirs
+                    )[0]
+                )
+            source = inline_css(source, self._rules)
+        return source, origin
+
+
+class FilesystemLoader(CssInliningMixin, filesystem.Loader):
+    u"""Filesystem loader inlining layout CSS into HTML emails."""
+
+
+class AppDirectoriesLoader(CssInliningMixin, app_directories.Loader):
+    u"""Application directories loader inlining layout CSS into HTML
+    emails."""
+
+
+class CachedLoader(cached.Loader):  # pylint: disable=abstract-method
+    u"""Cached loader resetting its loaders along with compiled templates."""
+
+    def reset(self):
+        u"""Empty templates cache and reset wrapped loaders."""
+        super(CachedLoader, self).reset()
+        for loader in self.loaders:
+            loader.reset()
+
+
+def create_engine():
+    u"""Return templates engine for emails.
+
+    It's configured as default engine, but keeps compiled templates with
+    their layouts and inlines layout CSS.
+    """
+    default = engines['django'].engine
+    return Engine(
+        dirs=default.dirs,
+        debug=default.debug,
+        string_if_invalid=default.string_if_invalid,
+        file_charset=default.file_charset,
+        loaders=[('apps.volontulo.lib.email_templates.CachedLoader', [
+            'apps.volontulo.lib.email_templates.FilesystemLoader',
+            'apps.volontulo.lib.email_templates.AppDirectoriesLoader',
+        ])],
+    )
+
+
+class EmailTemplates(object):
+    u"""Compiled text and HTML templates of emails.
+
+    Templates of all emails are compiled on first use and kept for lifetime
+    of process.
+    """
+
+    def __init__(self, names):
+        u"""Initialize templates registry.
+
+        :param names: iterable of emails templates names
+        """
+        self._names = tuple(names)
+        self._templates = None
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        u"""Return compiled text and HTML templates of email.
+
+        :param name: string Email templates name, e.g. "registration"
+        """
+        if self._templates is None:
+            with self._lock:
+                if self._templates is None:
+                    engine = create_engine()
+                    self._templates = {
+                        templates_name: (
+                            engine.get_template(
+                                'emails/{}.txt'.format(templates_name)
+                            ),
+                            engine.get_template(
+                                'emails/{}.html'.format(templates_name)
+                            ),
+                        ) for templates_name in self._names
+                    }
+        return self._templates[name]
+
+    def render_batch(self, name, contexts, base_context=None):
+        u"""Yield text and HTML content of email for each of contexts.
+
+        :param name: string Email templates name
+        :param contexts: iterable of dicts Variables of each email
+        :param base_context: dict Variables common to all emails
+        """
+        text_template, html_template = self.get(name)
+        context = Context(base_context or {})
+        for variables in contexts:
+            with context.push(variables):
+                yield (
+                    text_template.render(context),
+                    html_template.render(context),
+                )
+
+    def render(self, name, context, base_context=None):
+        u"""Return text and HTML content of email.
+
+        :param name: string Email templates name
+        :param context: dict Variables of email
+        :param base_context: dict Variables common to all emails
+        """
+        return next(self.render_batch(name, [context], base_context))
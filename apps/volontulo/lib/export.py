@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: export
+"""
+
+import csv
+import re
+
+from django.http import StreamingHttpResponse
+
+from apps.volontulo.models import Offer
+
+# number of rows read from database by single query:
+EXPORT_CHUNK_SIZE = 2000
+VOLUNTEERS_HEADER = (
+    u'ID', u'Imię', u'Nazwisko', u'Email', u'Telefon', u'Oferta',
+)
+# spreadsheets evaluate cells starting with these characters as formulas:
+FORMULA_PREFIXES = (u'=', u'+', u'-', u'@', u'\t', u'\r')
+# numbers and phone numbers (e.g. "+48 600 000 000") starting with sign
+# contain no references or functions, so they are left as they are:
+NUMBER_RE = re.compile(r'^[+-][\d\s().\-/]*$')
+
+
+class Echo(object):
+    u"""File-like object returning what is written to it."""
+
+    @staticmethod
+    def write(value):
+        u"""Return written value instead of storing it."""
+        return value
+
+
+def volunteers_rows(applications, chunk_size=EXPORT_CHUNK_SIZE):
+    u"""Yield rows of volunteers who joined offers.
+
+    Rows are read in chunks ordered by application id, so memory usage does
+    not depend on number of volunteers and every query uses primary key
+    index instead of growing OFFSET.
+
+    :param applications: QuerySet of Offer.volunteers.through instances
+    :param chunk_size: int Number of rows read by single query
+    """
+    last_id = 0
+    while True:
+        chunk = list(applications.filter(id__gt=last_id).order_by(
+            'id'
+        ).values_list(
+            'id',
+            'user__id',
+            'user__first_name',
+            'user__last_name',
+            'user__email',
+            'user__userprofile__phone_no',
+            'offer__title',
+        )[:chunk_size])
+        for row in chunk:
+            yield row[1:]
+        if len(chunk) < chunk_size:
+            return
+        last_id = chunk[-1][0]
+
+
+def offer_applications(offer_id):
+    u"""Return applications of volunteers to offer.
+
+    :param offer_id: int Offer id
+    """
+    return Offer.volunteers.through.objects.filter(offer_id=offer_id)
+
+
+def organization_applications(organization_id):
+    u"""Return applications of volunteers to offers of organization.
+
+    :param organization_id: int Organization id
+    """
+    return Offer.volunteers.through.objects.filter(
+        offer__organization_id=organization_id
+    )
+
+
+def _cell(value):
+    u"""Return value written to CSV cell.
+
+    Texts looking like formulas, e.g. names entered by users, are prefixed
+    with apostrophe, so spreadsheets show them instead of evaluating them.
+    Phone numbers are not changed.
+
+    :param value: Value of column
+    """
+    if value is None:
+        return u''
+    if (
+            isinstance(value, str) and
+            value.startswith(FORMULA_PREFIXES) and
+            not NUMBER_RE.match(value)
+    ):
+        return u"'" + value
+    return value
+
+
+def stream_csv(header, rows):
+    u"""Yield CSV lines of header and rows.
+
+    :param header: tuple Columns names
+    :param rows: iterable of tuples
+    """
+    writer = csv.writer(Echo())
+    # byte order mark lets spreadsheets recognize UTF-8:
+    yield u'\ufeff' + writer.writerow(header)
+    for row in rows:
+        yield writer.writerow([_cell(value) for value in row])
+
+
+def csv_response(filename, header, rows):
+    u"""Return response streaming rows as CSV file.
+
+    Header is sent before any row is read, so download starts immediately.
+
+    :param filename: string Name of downloaded file
+    :param header: tuple Columns names
+    :param rows: iterable of tuples
+    """
+    response = StreamingHttpResponse(
+        stream_csv(header, rows),
+        content_type='text/csv; charset=utf-8',
+    )
+    response['Content-Disposition'] = 'attachment; filename="{}"'.format(
+        filename
+    )
+    return response
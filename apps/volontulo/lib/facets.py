@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: facets
+"""
+
+import datetime
+import hashlib
+from collections import Counter
+from collections import OrderedDict
+from functools import reduce
+from operator import and_
+from operator import or_
+
+from django.db.models import Case
+from django.db.models import CharField
+from django.db.models import Count
+from django.db.models import IntegerField
+from django.db.models import Q
+from django.db.models import Value
+from django.db.models import When
+from django.utils import timezone
+
+from apps.volontulo.lib.cache import cached_offers_data
+
+ACTION_STATUSES = OrderedDict((
+    ('future', u'Planowane'),
+    ('ongoing', u'Trwające'),
+    ('finished', u'Zakończone'),
+))
+RECRUITMENT_STATUSES = OrderedDict((
+    ('open', u'Otwarta'),
+    ('supplemental', u'Uzupełniająca'),
+    ('closed', u'Zamknięta'),
+))
+CONSTANT_COOP = OrderedDict((
+    ('1', u'Stała współpraca'),
+    ('0', u'Jednorazowa'),
+))
+DATE_RANGES = OrderedDict((
+    ('past', u'Wcześniej'),
+    ('week', u'W ciągu tygodnia'),
+    ('month', u'W ciągu miesiąca'),
+    ('later', u'Później'),
+    ('none', u'Bez daty'),
+))
+# facets in order of displaying them: (name, label, offer field)
+FACETS = (
+    ('location', u'Miejsce', 'location'),
+    ('organization', u'Organizacja', 'organization_id'),
+    ('action_status', u'Status akcji', 'action_status'),
+    ('recruitment_status', u'Rekrutacja', 'recruitment_status'),
+    ('constant_coop', u'Rodzaj współpracy', 'constant_coop'),
+    ('started', u'Początek', 'started_at'),
+    ('finished', u'Koniec', 'finished_at'),
+)
+
+
+def _date_ranges(field):
+    u"""Return conditions of DATE_RANGES for date field keyed by range.
+
+    Ranges start at local midnight, so they do not change during the day.
+
+    :param field: string Name of offer date field
+    """
+    today = timezone.make_aware(datetime.datetime.combine(
+        timezone.localtime(timezone.now()).date(), datetime.time()
+    ))
+    week = today + datetime.timedelta(days=7)
+    month = today + datetime.timedelta(days=30)
+    return OrderedDict((
+        ('past', Q(**{field + '__lt': today})),
+        ('week', Q(**{field + '__gte': today, field + '__lt': week})),
+        ('month', Q(**{field + '__gte': week, field + '__lt': month})),
+        ('later', Q(**{field + '__gte': month})),
+        ('none', Q(**{field + '__isnull': True})),
+    ))
+
+
+def _facet_condition(name, field, value):
+    u"""Return condition matching offers of facet value or None if invalid.
+
+    :param name: string Facet name
+    :param field: string Offer field of facet
+    :param value: string Selected value
+    """
+    if name == 'location':
+        return Q(location=value)
+    if name == 'organization':
+        return Q(organization_id=int(value)) if value.isdigit() else None
+    if name == 'action_status':
+        return Q(action_status=value) if value in ACTION_STATUSES else None
+    if name == 'recruitment_status':
+        return (
+            Q(recruitment_status=value)
+            if value in RECRUITMENT_STATUSES else None
+        )
+    if name == 'constant_coop':
+        return (
+            Q(constant_coop=value == '1') if value in CONSTANT_COOP else None
+        )
+    return _date_ranges(field).get(value)
+
+
+def filter_offers(queryset, params):
+    u"""Filter offers by facet values selected in params.
+
+    Returns filtered queryset and selected values keyed by facet name.
+    Invalid values are ignored.
+
+    :param queryset: Offer QuerySet instance
+    :param params: QueryDict instance, e.g. request.GET
+    """
+    selected = OrderedDict()
+    for name, _, field in FACETS:
+        value = params.get(name)
+        if not value:
+            continue
+        condition = _facet_condition(name, field, value)
+        if condition is not None:
+            queryset = queryset.filter(condition)
+            selected[name] = value
+    return queryset, selected
+
+
+def _grouped_rows(queryset, conditions):
+    u"""Return numbers of offers grouped by values of all facets.
+
+    Query reads offers missing at most one of conditions and flags
+    conditions matched by each group of offers.
+
+    :param queryset: Offer QuerySet instance, not filtered by facets
+    :param conditions: dict Conditions of selected facets keyed by name
+    """
+    if len(conditions) > 1:
+        queryset = queryset.filter(reduce(or_, [
+            reduce(and_, [
+                condition for other, condition in conditions.items()
+                if other != name
+            ]) for name in conditions
+        ]))
+    annotations = {}
+    for name, _, field in FACETS:
+        if field.endswith('_at'):
+            annotations[name] = Case(
+                *[When(condition, then=Value(key))
+                  for key, condition in _date_ranges(field).items()],
+                output_field=CharField()
+            )
+    for name, condition in conditions.items():
+        annotations['matches_' + name] = Case(
+            When(condition, then=Value(1)),
+            default=Value(0),
+            output_field=IntegerField()
+        )
+    return queryset.annotate(**annotations).values(
+        'location',
+        'organization_id',
+        'organization__name',
+        'action_status',
+        'recruitment_status',
+        'constant_coop',
+        *annotations.keys()
+    ).annotate(count=Count('id')).order_by()
+
+
+def _value_labels(name, values, organizations):
+    u"""Return labels of facet values keyed by value in displayed order.
+
+    :param name: string Facet name
+    :param values: iterable Values of location facet
+    :param organizations: dict Organizations names keyed by id
+    """
+    if name == 'location':
+        return OrderedDict((value, value) for value in sorted(values))
+    if name == 'organization':
+        return OrderedDict(sorted(
+            ((str(id_), org_name) for id_, org_name in organizations.items()),
+            key=lambda item: item[1],
+        ))
+    return {
+        'action_status': ACTION_STATUSES,
+        'recruitment_status': RECRUITMENT_STATUSES,
+        'constant_coop': CONSTANT_COOP,
+    }.get(name, DATE_RANGES)
+
+
+def _count(queryset, conditions):
+    u"""Count offers of each facet value using one grouped query.
+
+    Values of each facet are counted with conditions of all the other
+    selected facets, but not its own, so user can switch to other value of
+    facet.
+
+    :param queryset: Offer QuerySet instance, not filtered by facets
+    :param conditions: dict Conditions of selected facets keyed by name
+    """
+    counts = {name: Counter() for name, _, _ in FACETS}
+    organizations = {}
+    for row in _grouped_rows(queryset, conditions):
+        missed = {
+            name for name in conditions if not row['matches_' + name]
+        }
+        for name, _, field in FACETS:
+            if missed - {name}:
+                continue
+            if name == 'organization':
+                organizations[row[field]] = row['organization__name']
+            value = row[name if field.endswith('_at') else field]
+            if name == 'constant_coop':
+                value = '1' if value else '0'
+            counts[name][str(value)] += row['count']
+
+    return [{
+        'name': name,
+        'label': label,
+        'values': [
+            {'value': value, 'label': value_label,
+             'count': counts[name][value]}
+            for value, value_label in _value_labels(
+                name, counts[name], organizations
+            ).items()
+            if counts[name][value]
+        ],
+    } for name, label, _ in FACETS]
+
+
+def count_facets(queryset, selected, scope):
+    u"""Return facets with numbers of offers matching each of their values.
+
+    Counts are cached until offers change.
+
+    :param queryset: Offer QuerySet instance before filter_offers
+    :param selected: dict Selected values returned by filter_offers
+    :param scope: string Name of offers set queryset was created from
+    """
+    conditions = {
+        name: _facet_condition(name, field, selected[name])
+        for name, _, field in FACETS if name in selected
+    }
+    facets = cached_offers_data((
+        'facets',
+        scope,
+        timezone.localtime(timezone.now()).date().isoformat(),
+        hashlib.md5(repr(sorted(selected.items())).encode('utf-8'))
+        .hexdigest(),
+    ), lambda: _count(queryset, conditions))
+    for facet in facets:
+        for value in facet['values']:
+            value['selected'] = selected.get(facet['name']) == value['value']
+    return facets
+
+
+def link_facets(facets, params):
+    u"""Add query strings toggling selection of facets values.
+
+    Returns query string of currently selected values.
+
+    :param facets: list Facets returned by count_facets
+    :param params: QueryDict instance, e.g. request.GET
+    """
+    params = params.copy()
+    params.pop('after', None)
+    for facet in facets:
+        for value in facet['values']:
+            query = params.copy()
+            if value['selected']:
+                query.pop(facet['name'])
+            else:
+                query[facet['name']] = value['value']
+            value['query'] = query.urlencode()
+    return params.urlencode()
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: geo
+"""
+
+import csv
+import io
+import math
+import os
+import threading
+
+from apps.volontulo.lib.search_index import tokenize
+
+GAZETTEER_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'data',
+    'localities.csv',
+)
+EARTH_RADIUS = 6371.0  # km
+# nearest offers are looked up in growing areas, starting with that radius:
+NEAREST_START_RADIUS = 25.0  # km
+# distance covering whole country:
+NEAREST_MAX_RADIUS = 1600.0  # km
+
+_GAZETTEER = {}
+_GAZETTEER_LOCK = threading.Lock()
+
+
+def _key(text):
+    u"""Normalize name of locality."""
+    return u' '.join(tokenize(text))
+
+
+def gazetteer():
+    u"""Return coordinates of known localities keyed by normalized name."""
+    if not _GAZETTEER:
+        with _GAZETTEER_LOCK:
+            if not _GAZETTEER:
+                localities = {}
+                with io.open(
+                    GAZETTEER_PATH, encoding='utf-8'
+                ) as gazetteer_file:
+                    for row in csv.DictReader(gazetteer_file):
+                        localities.setdefault(_key(row['name']), (
+                            float(row['latitude']),
+                            float(row['longitude']),
+                        ))
+                # other threads read gazetteer without lock, so it's filled
+                # at once:
+                _GAZETTEER.update(localities)
+    return _GAZETTEER
+
+
+def geocode(location):
+    u"""Return (latitude, longitude) of locality mentioned in location.
+
+    Comma separated parts of location are checked in order and the longest
+    known name wins, so "Kraków, Nowa Huta" and "ul. Długa 5, Gdańsk" are
+    both recognized. Returns None for unknown locations.
+
+    :param location: string Free text location
+    """
+    localities = gazetteer()
+    for part in (location or u'').split(u','):
+        words = tokenize(part)
+        for length in range(len(words), 0, -1):
+            for start in range(len(words) - length + 1):
+                coordinates = localities.get(
+                    u' '.join(words[start:start + length])
+                )
+                if coordinates:
+                    return coordinates
+    return None
+
+
+def haversine(latitude1, longitude1, latitude2, longitude2):
+    u"""Return distance between two points in kilometers."""
+    latitude1, longitude1, latitude2, longitude2 = map(
+        math.radians, (latitude1, longitude1, latitude2, longitude2)
+    )
+    return 2 * EARTH_RADIUS * math.asin(math.sqrt(
+        math.sin((latitude2 - latitude1) / 2) ** 2 +
+        math.cos(latitude1) * math.cos(latitude2) *
+        math.sin((longitude2 - longitude1) / 2) ** 2
+    ))
+
+
+def bounding_box(latitude, longitude, radius):
+    u"""Return (min latitude, max latitude, min longitude, max longitude)
+    of area containing all points within radius.
+
+    :param latitude: float Latitude of center
+    :param longitude: float Longitude of center
+    :param radius: float Radius in kilometers
+    """
+    delta_latitude = math.degrees(radius / EARTH_RADIUS)
+    delta_longitude = math.degrees(
+        radius / EARTH_RADIUS / max(math.cos(math.radians(latitude)), 0.01)
+    )
+    return (
+        latitude - delta_latitude,
+        latitude + delta_latitude,
+        longitude - delta_longitude,
+        longitude + delta_longitude,
+    )
+
+
+def _within(queryset, latitude, longitude, radius):
+    u"""Return (distance, id) of offers within radius, nearest first."""
+    min_latitude, max_latitude, min_longitude, max_longitude = bounding_box(
+        latitude, longitude, radius
+    )
+    candidates = queryset.filter(
+        latitude__range=(min_latitude, max_latitude),
+        longitude__range=(min_longitude, max_longitude),
+    ).values_list('id', 'latitude', 'longitude')
+    return sorted(
+        (distance, id_) for distance, id_ in (
+            (haversine(latitude, longitude, lat, lon), id_)
+            for id_, lat, lon in candidates
+        ) if distance <= radius
+    )
+
+
+def offers_near(queryset, latitude, longitude, radius=None, limit=None):
+    u"""Return offers nearest to point with distance attribute set.
+
+    Candidates are pruned by bounding box in database and exact distances
+    are computed only for them. Without radius area is enlarged until limit
+    of offers is found.
+
+    :param queryset: Offer QuerySet instance
+    :param latitude: float Latitude of point
+    :param longitude: float Longitude of point
+    :param radius: float Maximal distance in kilometers
+    :param limit: int Maximal number of offers
+    """
+    if radius is not None:
+        found = _within(queryset, latitude, longitude, radius)
+    else:
+        radius = NEAREST_START_RADIUS
+        while True:
+            found = _within(queryset, latitude, longitude, radius)
+            if (limit is not None and len(found) >= limit or
+                    radius >= NEAREST_MAX_RADIUS):
+                break
+            radius *= 2
+    found = found[:limit]
+    offers = queryset.in_bulk([id_ for _, id_ in found])
+    result = []
+    for distance, id_ in found:
+        if id_ in offers:
+            offers[id_].distance = distance
+            result.append(offers[id_])
+    return result
+
+
+def geocode_offers(queryset):
+    u"""Set coordinates of offers using one UPDATE per distinct location.
+
+    Returns number of updated offers.
+
+    :param queryset: Offer QuerySet instance
+    """
+    updated = 0
+    locations = queryset.order_by().values_list(
+        'location', flat=True
+    ).distinct()
+    for location in list(locations):
+        latitude, longitude = geocode(location) or (None, None)
+        updated += queryset.filter(location=location).update(
+            latitude=latitude,
+            longitude=longitude,
+        )
+    return updated
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: newsletter
+"""
+
+import datetime
+import multiprocessing
+
+from django.db import models
+from django.db import transaction
+from django.utils import timezone
+
+from apps.volontulo.lib.email import EMAIL_TEMPLATES
+from apps.volontulo.lib.email import FROM_ADDRESS
+from apps.volontulo.lib.email import SUBJECTS
+from apps.volontulo.models import Offer
+from apps.volontulo.models import QueuedEmail
+from apps.volontulo.models import UserProfile
+
+# number of subscribers read and updated at once:
+NEWSLETTER_CHUNK_SIZE = 1000
+# number of newsletters rendered by single task of process pool:
+RENDER_BATCH_SIZE = 100
+# number of offers listed in newsletter:
+NEWSLETTER_MAX_OFFERS = 20
+# newsletter is not sent to subscriber more often than that:
+NEWSLETTER_INTERVAL = datetime.timedelta(days=6)
+# first newsletter of subscriber lists offers published that long ago:
+FIRST_NEWSLETTER_PERIOD = datetime.timedelta(days=7)
+
+
+def due_subscribers(now, chunk_size=NEWSLETTER_CHUNK_SIZE):
+    u"""Yield chunks of subscribers who did not get newsletter recently.
+
+    Chunks are read by id, each by single query, so memory usage does not
+    depend on number of subscribers. Yields lists of (id, uuid, email,
+    newsletter_sent_at).
+
+    :param now: datetime Time of sending
+    :param chunk_size: int Number of subscribers in chunk
+    """
+    subscribers = UserProfile.objects.filter(
+        models.Q(newsletter_sent_at__isnull=True) |
+        models.Q(newsletter_sent_at__lte=now - NEWSLETTER_INTERVAL),
+        newsletter=True,
+        user__is_active=True,
+    )
+    last_id = 0
+    while True:
+        chunk = list(subscribers.filter(id__gt=last_id).order_by(
+            'id'
+        ).values_list(
+            'id', 'uuid', 'user__email', 'newsletter_sent_at'
+        )[:chunk_size])
+        if chunk:
+            yield chunk
+        if len(chunk) < chunk_size:
+            return
+        last_id = chunk[-1][0]
+
+
+def new_offers(since, now):
+    u"""Return active offers published in given period as list of dicts.
+
+    :param since: datetime Start of period
+    :param now: datetime End of period
+    """
+    return [
+        {
+            'id': id_,
+            'title': title,
+            'location': location,
+            'organization': organization,
+        } for id_, title, location, organization in (
+            Offer.objects.get_active().filter(
+                published_at__gt=since,
+                published_at__lte=now,
+            ).order_by('-published_at', '-id').values_list(
+                'id', 'title', 'location', 'organization__name'
+            )[:NEWSLETTER_MAX_OFFERS]
+        )
+    ]
+
+
+def render_newsletters(args):
+    u"""Return text and HTML content of newsletters.
+
+    It's a task of process pool, so it takes single tuple of arguments.
+
+    :param args: tuple List of newsletters contexts and base context
+    """
+    contexts, base_context = args
+    return list(EMAIL_TEMPLATES.render_batch(
+        'newsletter', contexts, base_context
+    ))
+
+
+def _newsletters_contexts(chunk, now, offers):
+    u"""Return contexts and recipients of newsletters of subscribers having
+    new offers.
+
+    :param chunk: list Subscribers yielded by due_subscribers
+    :param now: datetime Time of sending
+    :param offers: dict New offers keyed by start of period, shared by
+        chunks
+    """
+    contexts = []
+    recipients = []
+    for _, uuid, email, sent_at in chunk:
+        since = sent_at or now - FIRST_NEWSLETTER_PERIOD
+        if since not in offers:
+            offers[since] = new_offers(since, now)
+        if offers[since]:
+            contexts.append({
+                'offers': offers[since],
+                'since': since,
+                'uuid': str(uuid),
+            })
+            recipients.append(email)
+    return contexts, recipients
+
+
+def _render(contexts, base_context, pool):
+    u"""Return text and HTML content of newsletters rendered in batches.
+
+    :param contexts: list Variables of each newsletter
+    :param base_context: dict Variables of all newsletters
+    :param pool: multiprocessing.Pool instance or None to render in this
+        process
+    """
+    batches = [
+        (contexts[start:start + RENDER_BATCH_SIZE], base_context)
+        for start in range(0, len(contexts), RENDER_BATCH_SIZE)
+    ]
+    rendered = []
+    for batch in (pool.imap(render_newsletters, batches) if pool
+                  else map(render_newsletters, batches)):
+        rendered.extend(batch)
+    return rendered
+
+
+def _queue(chunk, recipients, rendered, now):
+    u"""Queue newsletters and mark subscribers of chunk in one transaction.
+
+    :param chunk: list Subscribers yielded by due_subscribers
+    :param recipients: list Emails of newsletters recipients
+    :param rendered: list Text and HTML content of each newsletter
+    :param now: datetime Time of sending
+    """
+    with transaction.atomic():
+        QueuedEmail.objects.bulk_create(
+            QueuedEmail(
+                subject=SUBJECTS['newsletter'],
+                body=text,
+                html_body=html,
+                from_email=FROM_ADDRESS,
+                recipients=email,
+            ) for email, (text, html) in zip(recipients, rendered)
+        )
+        UserProfile.objects.filter(
+            id__in=[id_ for id_, _, _, _ in chunk]
+        ).update(newsletter_sent_at=now)
+
+
+def send_newsletter(base_context, now=None,
+                    chunk_size=NEWSLETTER_CHUNK_SIZE, processes=1):
+    u"""Queue newsletters with offers published since previous newsletter
+    of each subscriber.
+
+    Subscribers are processed in chunks. Newsletters of chunk are queued and
+    subscribers are marked in one transaction, so after crash sending can
+    be started again and subscribers who already got newsletter are skipped.
+    Subscribers without new offers are only marked. Yields numbers of
+    processed subscribers and queued newsletters of each chunk.
+
+    :param base_context: dict Variables of all newsletters, e.g. domain
+    :param now: datetime Time of sending
+    :param chunk_size: int Number of subscribers processed at once
+    :param processes: int Number of processes rendering newsletters
+    """
+    now = now or timezone.now()
+    offers = {}
+    pool = None
+    # templates compiled before forking are shared by all processes:
+    EMAIL_TEMPLATES.get('newsletter')
+    if processes > 1:
+        # processes only render templates and never use database connection
+        # inherited from this process:
+        pool = multiprocessing.Pool(processes)
+    try:
+        for chunk in due_subscribers(now, chunk_size):
+            contexts, recipients = _newsletters_contexts(chunk, now, offers)
+            rendered = _render(contexts, base_context, pool)
+            _queue(chunk, recipients, rendered, now)
+            yield len(chunk), len(rendered)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
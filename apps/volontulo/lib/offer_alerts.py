@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: offer_alerts
+"""
+
+from itertools import groupby
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.volontulo.lib.email import EMAIL_TEMPLATES
+from apps.volontulo.lib.email import FROM_ADDRESS
+from apps.volontulo.lib.email import SUBJECTS
+from apps.volontulo.models import OfferAlert
+from apps.volontulo.models import QueuedEmail
+
+# number of users whose alerts are sent in one transaction:
+ALERTS_BATCH_SIZE = 100
+# number of offers listed in one email:
+ALERT_MAX_OFFERS = 20
+
+
+def _is_active(offer):
+    u"""Check if offer is still active, as in OffersManager.get_active().
+
+    :param offer: Offer model instance
+    """
+    return (
+        offer.offer_status == 'published' and
+        offer.action_status in ('ongoing', 'future') and
+        offer.recruitment_status in ('open', 'supplemental')
+    )
+
+
+def send_offer_alerts(base_context, batch_size=ALERTS_BATCH_SIZE):
+    u"""Queue emails with new offers matching saved searches of users.
+
+    Each user gets one email listing all offers matched since previous one.
+    Alerts of batch of users are rendered together, queued and marked in one
+    transaction. Alerts of inactive users and offers which are no longer
+    active are only marked. Yields numbers of processed alerts and queued
+    emails of each batch.
+
+    :param base_context: dict Variables of all emails, e.g. domain
+    :param batch_size: int Number of users processed at once
+    """
+    while True:
+        with transaction.atomic():
+            user_ids = list(OfferAlert.objects.filter(
+                sent_at__isnull=True,
+            ).order_by('user_id').values_list(
+                'user_id', flat=True
+            ).distinct()[:batch_size])
+            if not user_ids:
+                return
+            ids = list(OfferAlert.objects.select_for_update().filter(
+                sent_at__isnull=True,
+                user_id__in=user_ids,
+            ).values_list('id', flat=True))
+            alerts = OfferAlert.objects.filter(id__in=ids).select_related(
+                'user', 'offer', 'offer__organization', 'saved_search',
+            ).order_by('user_id', '-offer__published_at', '-offer_id')
+            contexts = []
+            recipients = []
+            for _, user_alerts in groupby(alerts, lambda alert: alert.user_id):
+                user_alerts = [
+                    alert for alert in user_alerts
+                    if alert.user.is_active and _is_active(alert.offer)
+                ]
+                if not user_alerts:
+                    continue
+                contexts.append({
+                    'offers': [{
+                        'id': alert.offer.id,
+                        'title': alert.offer.title,
+                        'location': alert.offer.location,
+                        'organization': alert.offer.organization.name,
+                        'query': alert.saved_search.query,
+                    } for alert in user_alerts[:ALERT_MAX_OFFERS]],
+                    'more': max(len(user_alerts) - ALERT_MAX_OFFERS, 0),
+                })
+                recipients.append(user_alerts[0].user.email)
+            QueuedEmail.objects.bulk_create(
+                QueuedEmail(
+                    subject=SUBJECTS['offer_alert'],
+                    body=text,
+                    html_body=html,
+                    from_email=FROM_ADDRESS,
+                    recipients=email,
+                ) for email, (text, html) in zip(
+                    recipients,
+                    EMAIL_TEMPLATES.render_batch(
+                        'offer_alert', contexts, base_context
+                    ),
+                )
+            )
+            OfferAlert.objects.filter(id__in=ids).update(
+                sent_at=timezone.now()
+            )
+        yield len(ids), len(contexts)
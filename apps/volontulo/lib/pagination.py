@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: pagination
+"""
+
+from django.db.models import Q
+
+
+def encode_cursor(offer):
+    u"""Build cursor pointing right after given offer.
+
+    :param offer: Offer model instance
+    """
+    return '{}_{}'.format(offer.weight, offer.id)
+
+
+def decode_cursor(cursor):
+    u"""Parse cursor into (weight, id) tuple.
+
+    :param cursor: string Cursor created by encode_cursor
+    """
+    try:
+        weight, id_ = cursor.split('_')
+        return int(weight), int(id_)
+    except (AttributeError, ValueError):
+        raise ValueError(u"Invalid cursor: {}".format(cursor))
+
+
+def paginate_offers(queryset, cursor=None, per_page=20):
+    u"""Return page of offers ordered by weight and id.
+
+    Keyset pagination is used instead of OFFSET, so database reads only rows
+    of requested page, no matter how deep it is.
+
+    :param queryset: Offer QuerySet instance
+    :param cursor: string Cursor of previous page last offer or None
+    :param per_page: int Number of offers on page
+    :return: tuple (list of offers, cursor of next page or None)
+    """
+    queryset = queryset.order_by('weight', 'id')
+    if cursor:
+        weight, id_ = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(weight__gt=weight) | Q(weight=weight, id__gt=id_)
+        )
+
+    offers = list(queryset[:per_page + 1])
+    if len(offers) > per_page:
+        offers = offers[:per_page]
+        return offers, encode_cursor(offers[-1])
+    return offers, None
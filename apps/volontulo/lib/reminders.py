@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: reminders
+"""
+
+from collections import defaultdict
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from apps.volontulo.lib.email import EMAIL_TEMPLATES
+from apps.volontulo.lib.email import FROM_ADDRESS
+from apps.volontulo.lib.email import SUBJECTS
+from apps.volontulo.models import Offer
+from apps.volontulo.models import OfferReminder
+from apps.volontulo.models import QueuedEmail
+
+# number of reminders sent in one transaction:
+REMINDERS_BATCH_SIZE = 50
+
+
+def send_offer_reminders(base_context, now=None,
+                         batch_size=REMINDERS_BATCH_SIZE):
+    u"""Queue reminders of due buckets for volunteers who joined offers.
+
+    Reminder of offer is rendered once and queued for all its volunteers.
+    Reminders of offers which are not active or have started are only
+    marked. Yields numbers of processed reminders and queued emails of each
+    batch.
+
+    :param base_context: dict Variables of all emails, e.g. domain
+    :param now: datetime Time of scheduler tick
+    :param batch_size: int Number of reminders processed at once
+    """
+    now = now or timezone.now()
+    while True:
+        with transaction.atomic():
+            reminders = OfferReminder.objects.get_due(now, batch_size)
+            if not reminders:
+                return
+            offers = [
+                offer for offer in Offer.objects.get_active().filter(
+                    id__in=[reminder.offer_id for reminder in reminders],
+                    offer_status='published',
+                ).select_related('organization').order_by('id')
+                if offer.get_start() is not None and offer.get_start() > now
+            ]
+            volunteers = defaultdict(list)
+            for offer_id, email in User.objects.filter(
+                    offer__in=offers,
+                    is_active=True,
+            ).values_list('offer', 'email'):
+                volunteers[offer_id].append(email)
+            offers = [offer for offer in offers if volunteers[offer.id]]
+            rendered = EMAIL_TEMPLATES.render_batch(
+                'offer_reminder',
+                [{
+                    'offer': {
+                        'id': offer.id,
+                        'title': offer.title,
+                        'location': offer.location,
+                        'organization': offer.organization.name,
+                        'start': offer.get_start(),
+                    },
+                } for offer in offers],
+                base_context,
+            )
+            emails = []
+            for offer, (text, html) in zip(offers, rendered):
+                emails.extend(
+                    QueuedEmail(
+                        subject=SUBJECTS['offer_reminder'],
+                        body=text,
+                        html_body=html,
+                        from_email=FROM_ADDRESS,
+                        recipients=email,
+                    ) for email in volunteers[offer.id]
+                )
+            QueuedEmail.objects.bulk_create(emails)
+            OfferReminder.objects.filter(
+                id__in=[reminder.id for reminder in reminders]
+            ).update(sent_at=now)
+        yield len(reminders), len(emails)
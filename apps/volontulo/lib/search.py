@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: search
+"""
+
+from functools import reduce
+from operator import and_
+from operator import or_
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+from apps.volontulo.lib import search_index
+from apps.volontulo.lib.search_index import WORD_RE
+
+# text fields of offer (and its organization) that are searched:
+SEARCH_FIELDS = (
+    'title',
+    'description',
+    'requirements',
+    'benefits',
+    'location',
+    'organization__name',
+)
+
+
+class IndexResults(object):
+    u"""Offers found in search index, fetched from database when sliced.
+
+    Index may still contain offers which were deleted or do not match
+    queryset anymore, so found ids are checked against queryset before
+    counting or slicing them.
+    """
+    # number of ids checked by single query:
+    CHUNK_SIZE = 500
+
+    def __init__(self, queryset, ids):
+        u"""Initialize results.
+
+        :param queryset: Offer QuerySet instance
+        :param ids: list Ids of found offers, best matches first
+        """
+        self.queryset = queryset
+        self.ids = ids
+        self._matching_ids = None
+
+    def _get_matching_ids(self):
+        u"""Return ids of found offers which match queryset."""
+        if self._matching_ids is None:
+            matching = set()
+            for start in range(0, len(self.ids), self.CHUNK_SIZE):
+                matching.update(self.queryset.filter(
+                    id__in=self.ids[start:start + self.CHUNK_SIZE]
+                ).values_list('id', flat=True))
+            self._matching_ids = [
+                offer_id for offer_id in self.ids if offer_id in matching
+            ]
+        return self._matching_ids
+
+    def __len__(self):
+        u"""Return number of found offers."""
+        return len(self._get_matching_ids())
+
+    def __getitem__(self, key):
+        u"""Return offer or list of offers in order of relevance."""
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        ids = self._get_matching_ids()[key]
+        offers = self.queryset.in_bulk(ids)
+        return [offers[offer_id] for offer_id in ids if offer_id in offers]
+
+
+def split_words(phrase):
+    u"""Split search phrase into lowercase words.
+
+    :param phrase: string Search phrase
+    """
+    return [word.lower() for word in WORD_RE.findall(phrase or '')]
+
+
+def search_offers(queryset, phrase):
+    u"""Filter offers matching all words of phrase, best matches first.
+
+    With OFFERS_SEARCH_BACKEND set to "index" phrase is looked up in
+    in-process search index of active offers. Otherwise on PostgreSQL
+    search_vector column maintained by database triggers is queried using its
+    GIN index and on other databases every word has to be contained in one of
+    SEARCH_FIELDS.
+
+    :param queryset: Offer QuerySet instance
+    :param phrase: string Search phrase
+    """
+    words = split_words(phrase)
+    if not words:
+        return queryset.none()
+
+    if settings.OFFERS_SEARCH_BACKEND == 'index':
+        return IndexResults(
+            queryset, search_index.get_index().search(phrase)
+        )
+
+    if connection.vendor == 'postgresql':
+        # last word may be still being typed, so it is matched as prefix:
+        query = u' & '.join(words[:-1] + [words[-1] + u':*'])
+        return queryset.extra(
+            select={
+                'rank': "ts_rank(volontulo_offer.search_vector, "
+                        "to_tsquery('volontulo', %s))",
+            },
+            select_params=[query],
+            where=[
+                "volontulo_offer.search_vector @@ "
+                "to_tsquery('volontulo', %s)",
+            ],
+            params=[query],
+            order_by=['-rank', 'id'],
+        )
+
+    return queryset.filter(reduce(and_, [
+        reduce(or_, [
+            Q(**{field + '__icontains': word}) for field in SEARCH_FIELDS
+        ]) for word in words
+    ])).order_by('weight', 'id')
@@ -0,0 +1,400 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: search_index
+"""
+
+import json
+import logging
+import heapq
+import math
+import os
+import re
+import threading
+import unicodedata
+import zlib
+from bisect import bisect_left
+from collections import Counter
+
+from django.conf import settings
+
+from apps.volontulo.lib.cache import offers_generation
+
+# pylint: disable=invalid-name
+logger = logging.getLogger('volontulo.search_index')
+
+WORD_RE = re.compile(r'[^\W_]+', re.UNICODE)
+# letters which are not decomposed by unicode normalization:
+FOLDED_LETTERS = {ord(u'ł'): u'l', ord(u'Ł'): u'L'}
+# how many times words of offer fields are counted:
+FIELDS_BOOSTS = (
+    ('title', 3),
+    ('location', 2),
+    ('description', 1),
+    ('requirements', 1),
+    ('benefits', 1),
+)
+ORGANIZATION_BOOST = 2
+# prefix of last word of query is expanded to that many most common terms:
+MAX_PREFIX_TERMS = 50
+# BM25 parameters:
+K1 = 1.2
+B = 0.75
+FILE_VERSION = 1
+
+
+def fold(text):
+    u"""Lowercase text and strip diacritics (e.g. "Łódź" -> "lodz").
+
+    :param text: string Text to fold
+    """
+    text = unicodedata.normalize('NFKD', text.translate(FOLDED_LETTERS))
+    return u''.join(c for c in text if not unicodedata.combining(c)).lower()
+
+
+def tokenize(text):
+    u"""Split text into folded words.
+
+    :param text: string Text to tokenize
+    """
+    return WORD_RE.findall(fold(text or u''))
+
+
+def offer_terms(offer):
+    u"""Count terms of offer with fields boosts applied.
+
+    :param offer: Offer model instance
+    """
+    terms = Counter()
+    for field, boost in FIELDS_BOOSTS:
+        for term in tokenize(getattr(offer, field)):
+            terms[term] += boost
+    for term in tokenize(offer.organization.name):
+        terms[term] += ORGANIZATION_BOOST
+    return terms
+
+
+class OffersIndex(object):
+    u"""Inverted index of offers scoring matches with BM25.
+
+    All words of query have to match, last one as a prefix, so index can be
+    queried on every keystroke. Index remembers offers generation it was
+    built for, so processes notice offers changed by other processes.
+    """
+
+    def __init__(self, generation=None):
+        u"""Initialize empty index.
+
+        :param generation: int Offers generation index reflects
+        """
+        self.generation = generation
+        self._lock = threading.RLock()
+        self._documents = {}
+        self._lengths = {}
+        self._postings = {}
+        self._total_length = 0
+        self._vocabulary = []
+        self._vocabulary_dirty = False
+
+    def __len__(self):
+        u"""Return number of indexed offers."""
+        return len(self._documents)
+
+    @classmethod
+    def build(cls, offers, generation=None):
+        u"""Create index of given offers.
+
+        :param offers: iterable of Offer model instances
+        :param generation: int Offers generation read before querying offers
+        """
+        index = cls(generation)
+        for offer in offers:
+            index.add(offer.id, offer_terms(offer))
+        return index
+
+    def add(self, offer_id, terms):
+        u"""Add or replace offer in index.
+
+        :param offer_id: int Offer id
+        :param terms: dict Number of occurrences keyed by term
+        """
+        with self._lock:
+            self.remove(offer_id)
+            terms = dict(terms)
+            self._documents[offer_id] = terms
+            self._lengths[offer_id] = sum(terms.values())
+            self._total_length += self._lengths[offer_id]
+            for term, frequency in terms.items():
+                if term not in self._postings:
+                    self._postings[term] = {}
+                    self._vocabulary_dirty = True
+                self._postings[term][offer_id] = frequency
+
+    def remove(self, offer_id):
+        u"""Remove offer from index if it is indexed.
+
+        :param offer_id: int Offer id
+        """
+        with self._lock:
+            terms = self._documents.pop(offer_id, None)
+            if terms is None:
+                return
+            self._total_length -= self._lengths.pop(offer_id)
+            for term in terms:
+                postings = self._postings[term]
+                del postings[offer_id]
+                if not postings:
+                    del self._postings[term]
+                    self._vocabulary_dirty = True
+
+    def _expand(self, prefix):
+        u"""Return most common indexed terms starting with prefix."""
+        if self._vocabulary_dirty:
+            self._vocabulary = sorted(self._postings)
+            self._vocabulary_dirty = False
+        terms = []
+        for term in self._vocabulary[
+                bisect_left(self._vocabulary, prefix):]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        if len(terms) > MAX_PREFIX_TERMS:
+            terms = heapq.nlargest(
+                MAX_PREFIX_TERMS, terms,
+                key=lambda term: len(self._postings[term]),
+            )
+        return terms
+
+    def _score_word(self, postings_list, candidates):
+        u"""Return BM25 scores of offers matching word keyed by offer id.
+
+        :param postings_list: list Postings of terms matching word
+        :param candidates: dict Offers matching previous words or None
+        """
+        count = len(self._documents)
+        norm = K1 * count / self._total_length
+        scores = {}
+        for postings in postings_list:
+            idf = math.log(
+                1 + (count - len(postings) + 0.5) / (len(postings) + 0.5)
+            )
+            if candidates is not None and len(candidates) < len(postings):
+                items = (
+                    (offer_id, postings[offer_id])
+                    for offer_id in candidates if offer_id in postings
+                )
+            else:
+                items = postings.items()
+            for offer_id, frequency in items:
+                score = idf * frequency * (K1 + 1) / (
+                    frequency + K1 * (1 - B) +
+                    norm * B * self._lengths[offer_id]
+                )
+                # prefix matching several terms of offer counts once:
+                if score > scores.get(offer_id, 0):
+                    scores[offer_id] = score
+        return scores
+
+    def search(self, phrase):
+        u"""Return ids of offers matching phrase, best matches first.
+
+        :param phrase: string Search phrase
+        """
+        words = tokenize(phrase)
+        if not words:
+            return []
+
+        with self._lock:
+            if not self._documents:
+                return []
+            # postings of terms matching each word, last word as prefix:
+            matches = [
+                [self._postings[word]] if word in self._postings else []
+                for word in words[:-1]
+            ]
+            matches.append([
+                self._postings[term] for term in self._expand(words[-1])
+            ])
+            # the rarest words are matched first to narrow down candidates:
+            matches.sort(key=lambda postings_list: sum(
+                len(postings) for postings in postings_list
+            ))
+            scores = None
+            for postings_list in matches:
+                word_scores = self._score_word(postings_list, scores)
+                if scores is None:
+                    scores = word_scores
+                else:
+                    scores = {
+                        offer_id: score + word_scores[offer_id]
+                        for offer_id, score in scores.items()
+                        if offer_id in word_scores
+                    }
+                if not scores:
+                    return []
+        return [
+            offer_id for offer_id, _ in sorted(
+                scores.items(), key=lambda item: (-item[1], item[0])
+            )
+        ]
+
+    def dump(self, path):
+        u"""Save index to compressed file.
+
+        Only offers terms are stored, postings are rebuilt on load.
+
+        :param path: string File path
+        """
+        with self._lock:
+            data = json.dumps({
+                'version': FILE_VERSION,
+                'generation': self.generation,
+                'documents': self._documents,
+            }, separators=(',', ':'))
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as index_file:
+            index_file.write(zlib.compress(data.encode('utf-8'), 9))
+        os.rename(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        u"""Create index from file saved by dump.
+
+        :param path: string File path
+        """
+        with open(path, 'rb') as index_file:
+            data = json.loads(
+                zlib.decompress(index_file.read()).decode('utf-8')
+            )
+        if data.get('version') != FILE_VERSION:
+            raise ValueError(u"Unsupported search index file version.")
+        # pylint: disable=protected-access
+        index = cls(data.get('generation'))
+        for offer_id, terms in data['documents'].items():
+            offer_id = int(offer_id)
+            index._documents[offer_id] = terms
+            index._lengths[offer_id] = sum(terms.values())
+            for term, frequency in terms.items():
+                index._postings.setdefault(term, {})[offer_id] = frequency
+        index._total_length = sum(index._lengths.values())
+        index._vocabulary_dirty = True
+        return index
+
+
+_INDEX = {'index': None}
+_INDEX_LOCK = threading.Lock()
+
+
+def _build_index(generation):
+    u"""Build index of active offers from database.
+
+    :param generation: int Current offers generation
+    """
+    # pylint: disable=cyclic-import
+    from apps.volontulo.models import Offer
+
+    return OffersIndex.build(
+        Offer.objects.get_active().select_related('organization'),
+        generation,
+    )
+
+
+def _load_file():
+    u"""Return index loaded from OFFERS_SEARCH_INDEX_PATH file or None."""
+    path = getattr(settings, 'OFFERS_SEARCH_INDEX_PATH', None)
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        return OffersIndex.load(path)
+    except (OSError, ValueError) as ex:
+        logger.error(u"Unable to load search index: %s", ex)
+        return None
+
+
+def get_index():
+    u"""Return index of active offers shared by current process.
+
+    Index is loaded from OFFERS_SEARCH_INDEX_PATH file if it exists and
+    reflects current offers generation. Otherwise, e.g. when offers were
+    changed by other process, it is built again from database.
+    """
+    generation = offers_generation()
+    index = _INDEX['index']
+    if index is None or index.generation != generation:
+        with _INDEX_LOCK:
+            index = _INDEX['index']
+            if index is None:
+                index = _load_file()
+            if index is None or index.generation != generation:
+                index = _build_index(generation)
+            _INDEX['index'] = index
+    return index
+
+
+def load_index():
+    u"""Load index file at process startup, if it exists."""
+    _INDEX['index'] = _load_file()
+
+
+def reset_index():
+    u"""Drop index of current process, it will be rebuilt on next use."""
+    _INDEX['index'] = None
+
+
+def offers_changed(generation):
+    u"""Mark index as up to date after offers changes made by this process.
+
+    Index updated by this process reflects new offers generation, unless
+    other processes changed offers too, then it's built again on next use.
+
+    :param generation: int Offers generation set after changes
+    """
+    index = _INDEX['index']
+    if index is not None and index.generation == generation - 1:
+        index.generation = generation
+
+
+def update_offer(offer):
+    u"""Reflect offer changes in index, if index is used by this process.
+
+    Index is updated when offer is saved, even if transaction saving it is
+    rolled back later. Offers added that way are skipped by search results,
+    which are checked against database, but offers removed or reindexed
+    stay so until offers change again and index is built from database.
+
+    :param offer: Offer model instance
+    """
+    index = _INDEX['index']
+    if index is None:
+        return
+    # the same conditions as in OffersManager.get_active():
+    if (
+            offer.offer_status == 'published' and
+            offer.action_status in ('ongoing', 'future') and
+            offer.recruitment_status in ('open', 'supplemental')
+    ):
+        index.add(offer.id, offer_terms(offer))
+    else:
+        index.remove(offer.id)
+
+
+def remove_offer(offer):
+    u"""Remove offer from index, if index is used by this process.
+
+    :param offer: Offer model instance
+    """
+    index = _INDEX['index']
+    if index is not None:
+        index.remove(offer.id)
+
+
+def update_organization(organization):
+    u"""Reindex offers of organization, if index is used by this process.
+
+    :param organization: Organization model instance
+    """
+    if _INDEX['index'] is None:
+        return
+    for offer in organization.offer_set.all():
+        offer.organization = organization
+        update_offer(offer)
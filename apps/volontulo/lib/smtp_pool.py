@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: smtp_pool
+"""
+
+import logging
+import smtplib
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.smtp import EmailBackend as SMTPBackend
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+# pylint: disable=invalid-name
+logger = logging.getLogger('volontulo.smtp_pool')
+
+# defaults of EMAIL_POOL_* settings:
+POOL_SIZE = 4
+IDLE_TIMEOUT = 60  # seconds
+ACQUIRE_TIMEOUT = 30  # seconds
+# connections idle longer than that are checked with NOOP before use:
+CHECK_AFTER = 5  # seconds
+
+# seconds after which idle connection is closed, of waiting for free
+# connection and of idleness after which connection is checked before use:
+Timeouts = namedtuple('Timeouts', ('idle', 'acquire', 'check_after'))
+DEFAULT_TIMEOUTS = Timeouts(IDLE_TIMEOUT, ACQUIRE_TIMEOUT, CHECK_AFTER)
+
+
+class PoolExhausted(smtplib.SMTPException):
+    u"""All connections of pool are in use for too long."""
+
+
+class SMTPConnectionPool(object):
+    u"""Bounded pool of open email connections shared by threads.
+
+    Connection is used by one thread at a time and returned to pool
+    afterwards. Connections broken while in use are dropped, idle ones are
+    closed after idle timeout and checked with NOOP before reuse.
+    """
+
+    def __init__(self, size=POOL_SIZE, timeouts=DEFAULT_TIMEOUTS,
+                 connect=None):
+        u"""Initialize empty pool.
+
+        :param size: int Maximal number of open connections
+        :param timeouts: Timeouts instance
+        :param connect: callable Returning new email backend instance,
+            get_connection by default
+        """
+        self.size = size
+        self.timeouts = timeouts
+        self._connect = connect or (
+            lambda: get_connection(fail_silently=False)
+        )
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        # idle connections with time of last use, most recent last:
+        self._idle = []
+
+    @contextmanager
+    def connection(self):
+        u"""Borrow open email backend instance for the time of block.
+
+        Connection is dropped if block raises SMTP or socket error.
+
+        :raises PoolExhausted: when no connection is free before timeout
+        """
+        if not self._slots.acquire(timeout=self.timeouts.acquire):
+            raise PoolExhausted(
+                u"No free SMTP connection after {}s.".format(
+                    self.timeouts.acquire
+                )
+            )
+        try:
+            connection = self._take()
+            broken = False
+            try:
+                yield connection
+            except (smtplib.SMTPException, OSError):
+                broken = True
+                raise
+            finally:
+                if broken:
+                    self._close(connection)
+                else:
+                    self._give_back(connection)
+        finally:
+            self._slots.release()
+
+    def close_all(self):
+        u"""Close idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            self._close(connection)
+
+    def __len__(self):
+        u"""Return number of idle connections."""
+        return len(self._idle)
+
+    def _take(self):
+        u"""Return idle connection which is alive or open new one."""
+        while True:
+            now = time.time()
+            with self._lock:
+                expired = [
+                    connection for connection, used_at in self._idle
+                    if now - used_at > self.timeouts.idle
+                ]
+                self._idle = [
+                    (connection, used_at)
+                    for connection, used_at in self._idle
+                    if now - used_at <= self.timeouts.idle
+                ]
+                connection, used_at = (
+                    self._idle.pop() if self._idle else (None, None)
+                )
+            for expired_connection in expired:
+                self._close(expired_connection)
+            if connection is None:
+                break
+            if (now - used_at <= self.timeouts.check_after or
+                    self._is_alive(connection)):
+                return connection
+            self._close(connection)
+        connection = self._connect()
+        connection.open()
+        return connection
+
+    def _give_back(self, connection):
+        u"""Return connection to idle ones."""
+        with self._lock:
+            self._idle.append((connection, time.time()))
+
+    @staticmethod
+    def _is_alive(connection):
+        u"""Check if server still answers on connection."""
+        if not isinstance(connection, SMTPBackend):
+            return True
+        if connection.connection is None:
+            return False
+        try:
+            return connection.connection.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    @staticmethod
+    def _close(connection):
+        u"""Close connection ignoring errors of broken ones."""
+        try:
+            connection.close()
+        except (smtplib.SMTPException, OSError) as ex:
+            logger.debug(u"Error closing SMTP connection: %s", ex)
+
+
+_POOL = {'pool': None}
+_POOL_LOCK = threading.Lock()
+
+
+def get_pool():
+    u"""Return connection pool shared by current process."""
+    if _POOL['pool'] is None:
+        with _POOL_LOCK:
+            if _POOL['pool'] is None:
+                _POOL['pool'] = SMTPConnectionPool(
+                    size=getattr(settings, 'EMAIL_POOL_SIZE', POOL_SIZE),
+                    timeouts=DEFAULT_TIMEOUTS._replace(
+                        idle=getattr(
+                            settings, 'EMAIL_POOL_IDLE_TIMEOUT', IDLE_TIMEOUT
+                        ),
+                        acquire=getattr(
+                            settings, 'EMAIL_POOL_ACQUIRE_TIMEOUT',
+                            ACQUIRE_TIMEOUT
+                        ),
+                    ),
+                )
+    return _POOL['pool']
+
+
+def reset_pool():
+    u"""Close connections of current process pool and drop it."""
+    with _POOL_LOCK:
+        pool, _POOL['pool'] = _POOL['pool'], None
+    if pool is not None:
+        pool.close_all()
+
+
+@receiver(setting_changed)
+def email_setting_changed(setting, **kwargs):
+    u"""Drop connections made with previous email settings."""
+    # pylint: disable=unused-argument
+    if setting.startswith('EMAIL_'):
+        reset_pool()
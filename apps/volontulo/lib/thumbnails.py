@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: thumbnails
+"""
+
+import hashlib
+import io
+import logging
+import posixpath
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image
+
+# pylint: disable=invalid-name
+logger = logging.getLogger('volontulo.thumbnails')
+
+# widths of generated thumbnails in pixels:
+THUMBNAIL_WIDTHS = (64, 128, 256, 512, 1024, 1600)
+# thumbnails are stored in this directory next to the original image:
+THUMBNAILS_DIR = 'thumbnails'
+JPEG_QUALITY = 85
+WEBP_QUALITY = 80
+# available thumbnails of image are cached, so rendering pages does not
+# touch storage:
+THUMBNAILS_CACHE_TIMEOUT = 24 * 60 * 60
+# images without thumbnails are checked again after that time:
+MISSING_CACHE_TIMEOUT = 5 * 60
+
+Image.init()
+# WebP variants are generated only when Pillow was built with libwebp:
+WEBP_SUPPORTED = 'WEBP' in Image.SAVE
+
+
+def thumbnail_name(name, width, extension):
+    u"""Return storage name of thumbnail of image.
+
+    :param name: string Storage name of original image
+    :param width: int Width of thumbnail
+    :param extension: string Extension of thumbnail format
+    """
+    directory, filename = posixpath.split(name)
+    return posixpath.join(directory, THUMBNAILS_DIR, u'{}-{}w.{}'.format(
+        posixpath.splitext(filename)[0], width, extension
+    ))
+
+
+def _cache_key(name):
+    u"""Return cache key of thumbnails of image.
+
+    :param name: string Storage name of original image
+    """
+    return 'volontulo:thumbnails:' + hashlib.md5(
+        name.encode('utf-8')
+    ).hexdigest()
+
+
+def _has_alpha(image):
+    u"""Return whether image is transparent, so it can't be saved as JPEG.
+
+    :param image: PIL.Image.Image instance
+    """
+    return image.mode in ('RGBA', 'LA') or (
+        image.mode == 'P' and 'transparency' in image.info
+    )
+
+
+def _save(name, image, format_, **options):
+    u"""Save image in storage under given name.
+
+    :param name: string Storage name of thumbnail
+    :param image: PIL.Image.Image instance
+    :param format_: string Pillow image format
+    """
+    buffer = io.BytesIO()
+    image.save(buffer, format_, **options)
+    saved = default_storage.save(name, ContentFile(buffer.getvalue()))
+    if saved != name:
+        # thumbnail was saved meanwhile by other process:
+        default_storage.delete(saved)
+
+
+def generate_thumbnails(name):
+    u"""Create missing thumbnails of image and return available ones.
+
+    Thumbnails are not wider than original. Image is decoded once and
+    scaled down step by step from the widest thumbnail, so JPEG draft mode
+    avoids decoding it in full resolution. Returns list of (width, name,
+    webp_name) sorted by width, webp_name is None when Pillow can't save
+    WebP.
+
+    :param name: string Storage name of original image
+    """
+    with default_storage.open(name) as original:
+        image = Image.open(original)
+        extension = 'png' if _has_alpha(image) else 'jpg'
+        thumbnails = [(
+            width,
+            thumbnail_name(name, width, extension),
+            thumbnail_name(name, width, 'webp') if WEBP_SUPPORTED else None,
+        ) for width in THUMBNAIL_WIDTHS if width < image.size[0]]
+        missing = {
+            width for width, thumbnail, webp in thumbnails
+            if not default_storage.exists(thumbnail) or (
+                webp is not None and not default_storage.exists(webp)
+            )
+        }
+        if not missing:
+            return thumbnails
+        image.thumbnail(
+            (thumbnails[-1][0], image.size[1]), Image.LANCZOS
+        )
+        image = image.convert('RGBA' if extension == 'png' else 'RGB')
+        for width, thumbnail, webp in reversed(thumbnails):
+            image.thumbnail((width, image.size[1]), Image.LANCZOS)
+            if width not in missing:
+                continue
+            if extension == 'png':
+                _save(thumbnail, image, 'PNG', optimize=True)
+            else:
+                _save(
+                    thumbnail, image, 'JPEG',
+                    quality=JPEG_QUALITY, optimize=True, progressive=True,
+                )
+            if webp is not None:
+                _save(webp, image, 'WEBP', quality=WEBP_QUALITY)
+    return thumbnails
+
+
+def _urls(thumbnails):
+    u"""Return thumbnails with URLs instead of storage names.
+
+    :param thumbnails: list of (width, name, webp_name)
+    """
+    return [(
+        width,
+        default_storage.url(thumbnail),
+        default_storage.url(webp) if webp else None,
+    ) for width, thumbnail, webp in thumbnails]
+
+
+def create_thumbnails(name):
+    u"""Generate missing thumbnails of image and cache list of them.
+
+    It's called when image is saved, so pages showing it don't generate
+    thumbnails. Returns list of (width, url, webp_url) sorted by width,
+    empty when image can't be read.
+
+    :param name: string Storage name of original image
+    """
+    try:
+        thumbnails = _urls(generate_thumbnails(name))
+    except (OSError, ValueError) as ex:
+        logger.warning(u"Unable to create thumbnails of %s: %s", name, ex)
+        return []
+    cache.set(_cache_key(name), thumbnails, THUMBNAILS_CACHE_TIMEOUT)
+    return thumbnails
+
+
+def _stored_thumbnails(name):
+    u"""Return thumbnails of image found in storage.
+
+    :param name: string Storage name of original image
+    """
+    thumbnails = []
+    for width in THUMBNAIL_WIDTHS:
+        for extension in ('jpg', 'png'):
+            thumbnail = thumbnail_name(name, width, extension)
+            if default_storage.exists(thumbnail):
+                webp = thumbnail_name(name, width, 'webp')
+                thumbnails.append((
+                    width,
+                    thumbnail,
+                    webp if default_storage.exists(webp) else None,
+                ))
+                break
+    return thumbnails
+
+
+def get_thumbnails(name):
+    u"""Return available thumbnails of image without generating them.
+
+    Returns list of (width, url, webp_url) sorted by width. It's empty when
+    image is smaller than all thumbnails or they were not generated yet, so
+    original image is shown instead. Thumbnails missing in cache are looked
+    up in storage.
+
+    :param name: string Storage name of original image
+    """
+    key = _cache_key(name)
+    thumbnails = cache.get(key)
+    if thumbnails is None:
+        thumbnails = _urls(_stored_thumbnails(name))
+        # thumbnails may be generated meanwhile by other process:
+        cache.set(key, thumbnails, THUMBNAILS_CACHE_TIMEOUT if thumbnails
+                  else MISSING_CACHE_TIMEOUT)
+    return thumbnails
+
+
+def delete_thumbnails(name):
+    u"""Delete all thumbnails of image.
+
+    :param name: string Storage name of original image
+    """
+    for width in THUMBNAIL_WIDTHS:
+        for extension in ('jpg', 'png', 'webp'):
+            default_storage.delete(thumbnail_name(name, width, extension))
+    cache.delete(_cache_key(name))
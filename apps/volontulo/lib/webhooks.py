@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: webhooks
+"""
+
+import hashlib
+import hmac
+import http.client
+import logging
+import urllib.error
+import urllib.request
+from collections import Counter
+from collections import OrderedDict
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+
+from apps.volontulo.models import Webhook
+from apps.volontulo.models import WebhookDelivery
+
+# pylint: disable=invalid-name
+logger = logging.getLogger('volontulo.webhooks')
+
+USER_AGENT = 'Volontulo-Webhooks/1.0'
+# number of threads posting events:
+THREADS = 8
+# seconds of waiting for endpoint response:
+TIMEOUT = 10
+# errors of single delivery:
+DELIVERY_ERRORS = (http.client.HTTPException, OSError, ValueError)
+
+
+class WebhookError(OSError):
+    u"""Endpoint did not accept event."""
+
+
+class _NoRedirectHandler(urllib.request.HTTPRedirectHandler):
+    u"""Redirect handler turning redirects into errors, as events are
+    accepted only by configured URL."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        u"""Do not follow redirect."""
+        # pylint: disable=too-many-arguments,unused-argument
+        return None
+
+
+OPENER = urllib.request.build_opener(_NoRedirectHandler)
+
+
+def sign(secret, body):
+    u"""Return HMAC-SHA256 signature of payload in hex.
+
+    :param secret: string Webhook secret
+    :param body: bytes Payload
+    """
+    return hmac.new(
+        secret.encode('utf-8'), body, hashlib.sha256
+    ).hexdigest()
+
+
+def post_event(delivery, webhook, timeout=TIMEOUT):
+    u"""Post event to endpoint, raise exception if it was not accepted.
+
+    Endpoint has to answer with 2xx status. Payload is signed with webhook
+    secret in X-Volontulo-Signature header; X-Volontulo-Delivery header
+    allows endpoint to skip events delivered again after worker crash.
+
+    :param delivery: WebhookDelivery model instance
+    :param webhook: Webhook model instance
+    :param timeout: float Seconds of waiting for response
+    :raises WebhookError: when endpoint answers with error status
+    """
+    body = delivery.payload.encode('utf-8')
+    request = urllib.request.Request(
+        webhook.url,
+        data=body,
+        headers={
+            'Content-Type': 'application/json',
+            'User-Agent': USER_AGENT,
+            'X-Volontulo-Event': delivery.event,
+            'X-Volontulo-Delivery': str(delivery.id),
+            'X-Volontulo-Signature': 'sha256=' + sign(webhook.secret, body),
+        },
+        method='POST',
+    )
+    try:
+        with OPENER.open(request, timeout=timeout) as response:
+            status = response.status
+    except urllib.error.HTTPError as ex:
+        status = ex.code
+        ex.close()
+    if not 200 <= status < 300:
+        raise WebhookError(u"Endpoint answered with status {}.".format(status))
+
+
+def _group_by_webhook(deliveries, webhooks):
+    u"""Return queues of deliveries keyed by webhook id.
+
+    Events of disabled endpoints are dropped.
+
+    :param deliveries: list WebhookDelivery model instances
+    :param webhooks: dict Webhook model instances keyed by id
+    """
+    pending = OrderedDict()
+    disabled = []
+    for delivery in deliveries:
+        if webhooks[delivery.webhook_id].is_active:
+            pending.setdefault(delivery.webhook_id, deque()).append(delivery)
+        else:
+            disabled.append(delivery.id)
+    if disabled:
+        WebhookDelivery.objects.filter(id__in=disabled).delete()
+    return pending
+
+
+class _Batch(object):
+    u"""Events of batch posted by pool of threads."""
+
+    def __init__(self, webhooks, pending, timeout):
+        u"""Initialize batch with no events posted.
+
+        :param webhooks: dict Webhook model instances keyed by id
+        :param pending: dict Queues of deliveries keyed by webhook id
+        :param timeout: float Seconds of waiting for each response
+        """
+        self.webhooks = webhooks
+        self.pending = pending
+        self.timeout = timeout
+        self.in_flight = Counter()
+        # deliveries keyed by futures of their posts:
+        self.running = {}
+
+    def submit_ready(self, executor):
+        u"""Submit events of endpoints below their concurrency limit.
+
+        :param executor: ThreadPoolExecutor instance
+        """
+        for webhook_id, queue in self.pending.items():
+            webhook = self.webhooks[webhook_id]
+            while queue and (
+                    self.in_flight[webhook_id] <
+                    max(webhook.max_concurrency, 1)
+            ):
+                delivery = queue.popleft()
+                self.in_flight[webhook_id] += 1
+                self.running[executor.submit(
+                    post_event, delivery, webhook, self.timeout
+                )] = delivery
+
+    def collect(self, done):
+        u"""Save results of finished posts.
+
+        Returns ids of delivered events, failed ones are released for retry.
+
+        :param done: iterable Finished futures
+        """
+        delivered = []
+        for future in done:
+            delivery = self.running.pop(future)
+            self.in_flight[delivery.webhook_id] -= 1
+            try:
+                future.result()
+            except DELIVERY_ERRORS as ex:
+                logger.warning(
+                    u"Unable to deliver event %s to %s: %s",
+                    delivery.id, self.webhooks[delivery.webhook_id].url, ex,
+                )
+                WebhookDelivery.objects.mark_failed(delivery, ex)
+            else:
+                delivered.append(delivery.id)
+        return delivered
+
+
+def deliver_batch(batch_size=None, threads=THREADS, timeout=TIMEOUT):
+    u"""Deliver batch of due events by pool of threads.
+
+    Endpoint never gets more events at once than its max_concurrency, so
+    slow endpoint does not occupy all threads. Threads only post events,
+    results are saved by calling thread. Returns numbers of delivered and
+    failed events.
+
+    :param batch_size: int Maximal number of delivered events
+    :param threads: int Number of threads posting events
+    :param timeout: float Seconds of waiting for each response
+    """
+    deliveries = WebhookDelivery.objects.claim(batch_size)
+    if not deliveries:
+        return 0, 0
+    webhooks = Webhook.objects.in_bulk(
+        {delivery.webhook_id for delivery in deliveries}
+    )
+    pending = _group_by_webhook(deliveries, webhooks)
+    posted = sum(len(queue) for queue in pending.values())
+    batch = _Batch(webhooks, pending, timeout)
+    delivered = []
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        batch.submit_ready(executor)
+        while batch.running:
+            done, _ = wait(list(batch.running), return_when=FIRST_COMPLETED)
+            delivered.extend(batch.collect(done))
+            batch.submit_ready(executor)
+
+    WebhookDelivery.objects.mark_delivered(delivered)
+    return len(delivered), posted - len(delivered)
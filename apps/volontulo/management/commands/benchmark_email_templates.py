@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: benchmark_email_templates
+"""
+
+import datetime
+import timeit
+
+from django.core.management.base import BaseCommand
+from django.template import Context
+from django.template.loader import get_template
+
+from apps.volontulo.lib.email import EMAIL_TEMPLATES
+from apps.volontulo.lib.email import SUBJECTS
+
+# variables used by templates of each email:
+SAMPLE_CONTEXTS = {
+    'offer_application': {
+        'offer': {'id': 1, 'title': u'Pomoc w schronisku'},
+        'email': u'volunteer@example.com',
+        'phone_no': u'600100200',
+        'fullname': u'Jan Kowalski',
+        'comments': u'Mogę pomagać w weekendy.',
+    },
+    'offer_creation': {
+        'offer': {'id': 1, 'title': u'Pomoc w schronisku'},
+    },
+    'registration': {
+        'uuid': u'6c2b3a08-b8e5-4c1c-8a49-3e0d3a0a4a1f',
+    },
+    'volunteer_to_admin': {
+        'applicant': u'VOLUNTEER',
+        'name': u'Jan Kowalski',
+        'email': u'volunteer@example.com',
+        'phone_no': u'600100200',
+        'message': u'Dzień dobry!',
+    },
+    'volunteer_to_organisation': {
+        'name': u'Jan Kowalski',
+        'email': u'volunteer@example.com',
+        'phone_no': u'600100200',
+        'message': u'Dzień dobry!',
+    },
+    'admin_digest': {
+        'since': datetime.datetime(2016, 1, 4, 7, 0),
+        'groups': [{
+            'subject': u'Rejestracja na Volontulo',
+            'count': 3,
+            'more': 1,
+            'notifications': [{
+                'created_at': datetime.datetime(2016, 1, 4, 9, 30),
+                'recipients': u'volunteer@example.com',
+                'body': u'Dziękujemy za rejestrację.',
+            }] * 2,
+        }],
+    },
+    'newsletter': {
+        'since': datetime.datetime(2016, 1, 4, 7, 0),
+        'uuid': u'6c2b3a08-b8e5-4c1c-8a49-3e0d3a0a4a1f',
+        'offers': [{
+            'id': 1,
+            'title': u'Pomoc w schronisku',
+            'location': u'Kraków',
+            'organization': u'Schronisko',
+        }] * 10,
+    },
+    'offer_alert': {
+        'offers': [{
+            'id': 1,
+            'title': u'Pomoc w schronisku',
+            'location': u'Kraków',
+            'organization': u'Schronisko',
+            'query': u'Kraków zwierzęta',
+        }] * 3,
+        'more': 0,
+    },
+    'offer_reminder': {
+        'offer': {
+            'id': 1,
+            'title': u'Pomoc w schronisku',
+            'location': u'Kraków',
+            'organization': u'Schronisko',
+            'start': datetime.datetime(2016, 1, 5, 9, 0),
+        },
+    },
+    'bulk_message': {
+        'offer': {'id': 1, 'title': u'Pomoc w schronisku'},
+        'organization': u'Schronisko',
+        'sender_email': u'organization@example.com',
+        'message': u'Dzień dobry!\n\nSpotykamy się w sobotę o 9:00.',
+    },
+}
+BASE_CONTEXT = {
+    'protocol': 'https',
+    'domain': 'volontuloapp.org',
+}
+
+
+class Command(BaseCommand):
+    u"""Compare cost of rendering emails by loading templates for each
+    message and by compiled email templates, e.g.:
+
+        python manage.py benchmark_email_templates --messages 1000
+    """
+    help = u"Measure per message cost of rendering emails."
+
+    def add_arguments(self, parser):
+        u"""Add command arguments."""
+        parser.add_argument(
+            '--messages',
+            type=int,
+            default=500,
+            help=u"Number of rendered messages.",
+        )
+        parser.add_argument(
+            '--template',
+            choices=sorted(SUBJECTS),
+            default='registration',
+            help=u"Name of email templates.",
+        )
+
+    def handle(self, *args, **options):
+        u"""Render messages both ways and print per message times."""
+        name = options['template']
+        contexts = [SAMPLE_CONTEXTS[name]] * options['messages']
+
+        def per_message():
+            u"""Render emails as send_mail did before templates compiling."""
+            for variables in contexts:
+                context = Context(variables)
+                context.update(BASE_CONTEXT)
+                get_template('emails/{}.txt'.format(name)).render(context)
+                get_template('emails/{}.html'.format(name)).render(context)
+
+        def compiled():
+            u"""Render emails by compiled templates in one batch."""
+            for _ in EMAIL_TEMPLATES.render_batch(
+                    name, contexts, BASE_CONTEXT):
+                pass
+
+        # the first run compiles templates:
+        EMAIL_TEMPLATES.render(name, SAMPLE_CONTEXTS[name], BASE_CONTEXT)
+        times = [
+            (label, min(timeit.repeat(function, number=1, repeat=3)))
+            for label, function in (
+                ('per message', per_message),
+                ('compiled', compiled),
+            )
+        ]
+        for label, seconds in times:
+            self.stdout.write(u"{}: {:.3f} ms/message".format(
+                label, seconds * 1000 / options['messages']
+            ))
+        self.stdout.write(u"speedup: {:.1f}x".format(
+            times[0][1] / times[1][1]
+        ))
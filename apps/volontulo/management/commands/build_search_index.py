@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: build_search_index
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.volontulo.lib.cache import offers_generation
+from apps.volontulo.lib.search_index import OffersIndex
+from apps.volontulo.models import Offer
+
+
+class Command(BaseCommand):
+    u"""Build search index of active offers and save it to file.
+
+    Worker processes load the file on startup, so command should be run
+    before they are (re)started. File is used only until offers change,
+    then workers build index from database.
+    """
+    help = u"Build search index of active offers and save it to file."
+
+    def add_arguments(self, parser):
+        u"""Add command arguments."""
+        parser.add_argument(
+            '--path',
+            default=settings.OFFERS_SEARCH_INDEX_PATH,
+            help=u"Path of index file.",
+        )
+
+    def handle(self, *args, **options):
+        u"""Build and save index."""
+        index = OffersIndex.build(
+            Offer.objects.get_active().select_related('organization'),
+            offers_generation(),
+        )
+        index.dump(options['path'])
+        self.stdout.write(u"Indexed {} offers in {}.".format(
+            len(index), options['path']
+        ))
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: deliver_webhooks
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.volontulo.lib.webhooks import THREADS
+from apps.volontulo.lib.webhooks import TIMEOUT
+from apps.volontulo.lib.webhooks import deliver_batch
+from apps.volontulo.models import WebhookDeadLetter
+from apps.volontulo.models import WebhookDelivery
+
+
+class Command(BaseCommand):
+    u"""Deliver events to organizations webhooks.
+
+    It's meant to be run as long running worker:
+
+        python manage.py deliver_webhooks --loop
+
+    or periodically from cron. Many workers may run at once, concurrency
+    limits of endpoints apply to each of them separately.
+    """
+    help = u"Deliver events waiting for webhooks endpoints."
+
+    def add_arguments(self, parser):
+        u"""Add command arguments."""
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=WebhookDelivery.objects.BATCH_SIZE,
+            help=u"Maximal number of events claimed at once.",
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=THREADS,
+            help=u"Number of threads posting events.",
+        )
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=TIMEOUT,
+            help=u"Seconds of waiting for endpoint response.",
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            default=False,
+            help=u"Keep waiting for new events instead of exiting.",
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help=u"Seconds between checks of empty outbox with --loop.",
+        )
+        parser.add_argument(
+            '--requeue-dead-letters',
+            action='store_true',
+            default=False,
+            help=u"Deliver again events given up after all attempts.",
+        )
+
+    def handle(self, *args, **options):
+        u"""Deliver events until there are no due ones."""
+        if options['requeue_dead_letters']:
+            self.stdout.write(u"requeued: {}".format(
+                WebhookDeadLetter.objects.requeue()
+            ))
+        total_delivered = total_failed = 0
+        while True:
+            delivered, failed = deliver_batch(
+                options['batch_size'],
+                threads=options['threads'],
+                timeout=options['timeout'],
+            )
+            total_delivered += delivered
+            total_failed += failed
+            if delivered or failed:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(u"delivered: {}".format(total_delivered))
+        self.stdout.write(u"errors: {}".format(total_failed))
+        self.stdout.write(u"dead letters: {}".format(
+            WebhookDeadLetter.objects.count()
+        ))
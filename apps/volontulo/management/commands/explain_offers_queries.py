@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: explain_offers_queries
+"""
+
+import random
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db import transaction
+
+from apps.volontulo.models import Offer
+from apps.volontulo.models import Organization
+
+
+class Command(BaseCommand):
+    u"""Print query plans of OffersManager queries on generated offers.
+
+    Offers are generated inside a transaction which is rolled back at the end,
+    so command can be safely run against development database, e.g.:
+
+        python manage.py explain_offers_queries --offers 100000
+    """
+    help = u"Print query plans of offers queries for given number of offers."
+
+    def add_arguments(self, parser):
+        u"""Add command arguments."""
+        parser.add_argument(
+            '--offers',
+            type=int,
+            default=100000,
+            help=u"Number of offers to generate.",
+        )
+
+    def handle(self, *args, **options):
+        u"""Generate offers and explain queries."""
+        with transaction.atomic():
+            self._generate_offers(options['offers'])
+            for name, queryset in (
+                    ('get_active', Offer.objects.get_active().order_by(
+                        'weight', 'id')[:20]),
+                    ('get_weightened', Offer.objects.get_weightened()),
+                    ('get_for_administrator',
+                     Offer.objects.get_for_administrator()),
+                    ('get_archived', Offer.objects.get_archived()),
+                    ('all', Offer.objects.order_by('weight', 'id')[:20]),
+            ):
+                self.stdout.write(u"== {}".format(name))
+                for line in self._explain(queryset):
+                    self.stdout.write(line)
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def _generate_offers(count):
+        u"""Create offers with statuses spread as on production.
+
+        :param count: int Number of offers to create
+        """
+        rand = random.Random(count)
+        organization = Organization.objects.create(name=u'Benchmark')
+        Offer.objects.bulk_create(
+            Offer(
+                organization=organization,
+                title=u'Offer {}'.format(i),
+                description=u'',
+                time_commitment=u'',
+                benefits=u'',
+                location=u'',
+                offer_status=rand.choice(
+                    ('published',) * 3 + ('unpublished', 'rejected')
+                ),
+                action_status=rand.choice(('future', 'ongoing', 'finished')),
+                recruitment_status=rand.choice(
+                    ('open', 'supplemental', 'closed', 'closed')
+                ),
+                weight=i,
+            ) for i in range(count)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE volontulo_offer')
+
+    @staticmethod
+    def _explain(queryset):
+        u"""Return query plan of queryset as list of lines.
+
+        :param queryset: QuerySet instance
+        """
+        sql, params = queryset.query.sql_with_params()
+        if connection.vendor == 'sqlite':
+            sql = 'EXPLAIN QUERY PLAN ' + sql
+        else:
+            sql = 'EXPLAIN ' + sql
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [
+                u' '.join(str(column) for column in row)
+                for row in cursor.fetchall()
+            ]
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: generate_thumbnails
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.volontulo.lib.thumbnails import create_thumbnails
+from apps.volontulo.models import OfferImage
+from apps.volontulo.models import OrganizationGallery
+from apps.volontulo.models import UserGallery
+
+
+class Command(BaseCommand):
+    u"""Generate missing thumbnails of uploaded images, e.g. of images
+    uploaded before thumbnails were generated on save."""
+    help = u"Generate missing thumbnails of uploaded images."
+
+    def handle(self, *args, **options):
+        u"""Generate thumbnails image by image."""
+        images = 0
+        for queryset, field in (
+                (OfferImage.objects.all(), 'path'),
+                (OrganizationGallery.objects.all(), 'path'),
+                (UserGallery.objects.all(), 'image'),
+        ):
+            for name in queryset.values_list(field, flat=True).iterator():
+                if name:
+                    create_thumbnails(name)
+                    images += 1
+        self.stdout.write(u"Thumbnails of {} images.".format(images))
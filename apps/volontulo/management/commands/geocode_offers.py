@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: geocode_offers
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.volontulo.lib.cache import bump_offers_generation
+from apps.volontulo.lib.geo import geocode_offers
+from apps.volontulo.models import Offer
+
+
+class Command(BaseCommand):
+    u"""Set coordinates of all offers, e.g. after gazetteer update."""
+    help = u"Set coordinates of offers locations using bundled gazetteer."
+
+    def handle(self, *args, **options):
+        u"""Geocode offers."""
+        updated = geocode_offers(Offer.objects.all())
+        bump_offers_generation()
+        self.stdout.write(
+            u"Updated coordinates of {} offers.".format(updated)
+        )
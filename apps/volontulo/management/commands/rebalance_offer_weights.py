@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: rebalance_offer_weights
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.volontulo.models import Offer
+
+
+class Command(BaseCommand):
+    u"""Spread offers weights evenly keeping their order."""
+    help = u"Spread offers weights evenly keeping their order."
+
+    def handle(self, *args, **options):
+        u"""Rebalance offers weights."""
+        self.stdout.write(u"Rebalanced weights of {} offers.".format(
+            Offer.objects.rebalance_weights()
+        ))
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: send_admin_digest
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.volontulo.lib.email import add_link_arguments
+from apps.volontulo.lib.email import link_context
+from apps.volontulo.lib.email import send_admin_digest
+
+
+class Command(BaseCommand):
+    u"""Queue digest of notifications for administrators.
+
+    Interval of digests is set by scheduling command, e.g. daily from cron:
+
+        0 7 * * * python manage.py send_admin_digest
+    """
+    help = u"Queue digest of notifications recorded since previous one."
+
+    def add_arguments(self, parser):
+        u"""Add command arguments."""
+        add_link_arguments(parser, u'digest')
+
+    def handle(self, *args, **options):
+        u"""Queue digest emails."""
+        count = send_admin_digest(**link_context(options))
+        self.stdout.write(u"notifications: {}".format(count))
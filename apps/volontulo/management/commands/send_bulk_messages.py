@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: send_bulk_messages
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.volontulo.lib.bulk_messages import CHUNK_SIZE
+from apps.volontulo.lib.bulk_messages import send_bulk_messages
+from apps.volontulo.lib.email import add_link_arguments
+from apps.volontulo.lib.email import link_context
+
+
+class Command(BaseCommand):
+    u"""Queue emails of messages from organizations to volunteers, e.g.
+    every minute from cron:
+
+        * * * * * python manage.py send_bulk_messages
+
+    Emails are released to outbox gradually, at rate limited for each
+    organization, and delivered by send_queued_mail command.
+    """
+    help = u"Queue emails of messages to volunteers of offers."
+
+    def add_arguments(self, parser):
+        u"""Add command arguments."""
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help=u"Number of volunteers processed at once.",
+        )
+        add_link_arguments(parser)
+
+    def handle(self, *args, **options):
+        u"""Queue emails message by message."""
+        for message_id, queued in send_bulk_messages(
+                link_context(options),
+                chunk_size=options['chunk_size'],
+        ):
+            self.stdout.write(u"message {}: {} emails".format(
+                message_id, queued
+            ))
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: send_newsletter
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.volontulo.lib.email import add_link_arguments
+from apps.volontulo.lib.email import link_context
+from apps.volontulo.lib.newsletter import NEWSLETTER_CHUNK_SIZE
+from apps.volontulo.lib.newsletter import send_newsletter
+
+
+class Command(BaseCommand):
+    u"""Queue newsletters with new offers for subscribers, e.g. weekly from
+    cron:
+
+        0 8 * * 1 python manage.py send_newsletter --processes 4
+
+    Subscribers who got newsletter in last days are skipped, so interrupted
+    sending can be started again.
+    """
+    help = u"Queue newsletters with offers published since previous one."
+
+    def add_arguments(self, parser):
+        u"""Add command arguments."""
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=NEWSLETTER_CHUNK_SIZE,
+            help=u"Number of subscribers processed at once.",
+        )
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=1,
+            help=u"Number of processes rendering newsletters.",
+        )
+        add_link_arguments(parser, u'newsletter')
+
+    def handle(self, *args, **options):
+        u"""Queue newsletters chunk by chunk."""
+        subscribers = queued = 0
+        for processed, chunk_queued in send_newsletter(
+                link_context(options),
+                chunk_size=options['chunk_size'],
+                processes=options['processes'],
+        ):
+            subscribers += processed
+            queued += chunk_queued
+            self.stdout.write(u"subscribers: {}, newsletters: {}".format(
+                subscribers, queued
+            ))
+        self.stdout.write(u"total subscribers: {}, newsletters: {}".format(
+            subscribers, queued
+        ))
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: send_offer_alerts
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.volontulo.lib.email import add_link_arguments
+from apps.volontulo.lib.email import link_context
+from apps.volontulo.lib.offer_alerts import ALERTS_BATCH_SIZE
+from apps.volontulo.lib.offer_alerts import send_offer_alerts
+
+
+class Command(BaseCommand):
+    u"""Queue emails about offers matching saved searches, recorded when
+    offers were published, e.g. every 15 minutes from cron:
+
+        */15 * * * * python manage.py send_offer_alerts
+    """
+    help = u"Queue emails with new offers matching saved searches."
+
+    def add_arguments(self, parser):
+        u"""Add command arguments."""
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=ALERTS_BATCH_SIZE,
+            help=u"Number of users processed at once.",
+        )
+        add_link_arguments(parser)
+
+    def handle(self, *args, **options):
+        u"""Queue emails batch by batch."""
+        alerts = queued = 0
+        for processed, batch_queued in send_offer_alerts(
+                link_context(options),
+                batch_size=options['batch_size'],
+        ):
+            alerts += processed
+            queued += batch_queued
+        self.stdout.write(u"alerts: {}, emails: {}".format(alerts, queued))
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: send_offer_reminders
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.volontulo.lib.email import add_link_arguments
+from apps.volontulo.lib.email import link_context
+from apps.volontulo.lib.reminders import REMINDERS_BATCH_SIZE
+from apps.volontulo.lib.reminders import send_offer_reminders
+
+
+class Command(BaseCommand):
+    u"""Queue reminders for volunteers of offers starting soon.
+
+    Reminders are scheduled in 15 minutes buckets when offers are saved, so
+    command should be run at least that often, e.g. from cron:
+
+        */15 * * * * python manage.py send_offer_reminders
+    """
+    help = u"Queue reminders of due schedule buckets."
+
+    def add_arguments(self, parser):
+        u"""Add command arguments."""
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=REMINDERS_BATCH_SIZE,
+            help=u"Number of reminders processed at once.",
+        )
+        add_link_arguments(parser)
+
+    def handle(self, *args, **options):
+        u"""Queue reminders batch by batch."""
+        reminders = queued = 0
+        for processed, batch_queued in send_offer_reminders(
+                link_context(options),
+                batch_size=options['batch_size'],
+        ):
+            reminders += processed
+            queued += batch_queued
+        self.stdout.write(u"reminders: {}, emails: {}".format(
+            reminders, queued
+        ))
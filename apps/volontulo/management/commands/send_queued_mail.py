@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: send_queued_mail
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.volontulo.lib.email import send_queued
+from apps.volontulo.lib.smtp_pool import get_pool
+from apps.volontulo.models import QueuedEmail
+
+
+class Command(BaseCommand):
+    u"""Send emails waiting in outbox.
+
+    It's meant to be run periodically, e.g. from cron:
+
+        * * * * * python manage.py send_queued_mail
+
+    or as long running worker with --loop. Many workers may run at once.
+    """
+    help = u"Send emails waiting in outbox."
+
+    def add_arguments(self, parser):
+        u"""Add command arguments."""
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=QueuedEmail.objects.BATCH_SIZE,
+            help=u"Maximal number of emails sent through one connection.",
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            default=False,
+            help=u"Keep waiting for new emails instead of exiting.",
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help=u"Seconds between checks of empty outbox with --loop.",
+        )
+        parser.add_argument(
+            '--depth',
+            action='store_true',
+            default=False,
+            help=u"Only show numbers of emails in outbox.",
+        )
+
+    def handle(self, *args, **options):
+        u"""Send emails until outbox is empty."""
+        if not options['depth']:
+            total_sent = total_failed = 0
+            while True:
+                sent, failed = send_queued(options['batch_size'])
+                total_sent += sent
+                total_failed += failed
+                if sent or failed:
+                    continue
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+            get_pool().close_all()
+            self.stdout.write(u"delivered: {}".format(total_sent))
+            self.stdout.write(u"errors: {}".format(total_failed))
+        depth = QueuedEmail.objects.get_depth()
+        for status, _ in QueuedEmail.STATUSES:
+            self.stdout.write(u"{}: {}".format(status, depth[status]))
+        if depth['oldest'] is not None:
+            self.stdout.write(
+                u"oldest queued: {:.0f}s".format(depth['oldest'])
+            )
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: update_offer_statuses
+"""
+
+from django.contrib.admin.models import CHANGE
+from django.contrib.admin.models import LogEntry
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from apps.volontulo.models import Offer
+
+# admin history messages of transitions:
+MESSAGES = {
+    'finished': u"Akcja zakończona, rekrutacja zamknięta.",
+    'started': u"Akcja rozpoczęta.",
+    'supplemental': u"Rozpoczęta rekrutacja uzupełniająca.",
+    'closed': u"Rekrutacja zamknięta.",
+}
+
+
+class Command(BaseCommand):
+    u"""Update statuses of offers whose dates passed.
+
+    It's meant to be run periodically, e.g. from cron:
+
+        */15 * * * * python manage.py update_offer_statuses
+    """
+    help = u"Update action and recruitment statuses of expired offers."
+
+    def add_arguments(self, parser):
+        u"""Add command arguments."""
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=Offer.objects.STATUSES_BATCH_SIZE,
+            help=u"Maximal number of offers updated by single statement.",
+        )
+        parser.add_argument(
+            '--user',
+            help=u"Username of changes author in admin history "
+                 u"(first superuser by default).",
+        )
+
+    def handle(self, *args, **options):
+        u"""Update statuses and log changes."""
+        user = self._get_user(options['user'])
+        content_type = ContentType.objects.get_for_model(Offer)
+        counts = dict.fromkeys(MESSAGES, 0)
+        for name, offers in Offer.objects.update_statuses(
+                batch_size=options['batch_size']):
+            counts[name] += len(offers)
+            if user is not None:
+                LogEntry.objects.bulk_create(
+                    LogEntry(
+                        user=user,
+                        content_type=content_type,
+                        object_id=str(id_),
+                        object_repr=title[:200],
+                        action_flag=CHANGE,
+                        change_message=MESSAGES[name],
+                    ) for id_, title in offers
+                )
+        for name in ('finished', 'started', 'supplemental', 'closed'):
+            self.stdout.write(u"{}: {}".format(name, counts[name]))
+
+    def _get_user(self, username):
+        u"""Return author of changes or None if there is no superuser."""
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(
+                    u"User {} does not exist.".format(username)
+                )
+        user = User.objects.filter(is_superuser=True).order_by('id').first()
+        if user is None:
+            self.stderr.write(
+                u"There is no superuser, changes are not logged."
+            )
+        return user
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+import django.db.models.deletion
+
+
+def populate_main_images(apps, schema_editor):
+    OfferImage = apps.get_model('volontulo', 'OfferImage')
+    OrganizationGallery = apps.get_model('volontulo', 'OrganizationGallery')
+    UserGallery = apps.get_model('volontulo', 'UserGallery')
+
+    # keep only the newest flagged image, then point owner at it (offers
+    # fall back to their first image, as the old main_image filter did):
+    for model, owner, flag, pointer, fallback in (
+            (OfferImage, 'offer', 'is_main', 'main_image', True),
+            (OrganizationGallery, 'organization', 'is_main', 'main_image',
+             False),
+            (UserGallery, 'userprofile', 'is_avatar', 'avatar', False),
+    ):
+        images = model.objects.select_related(owner).order_by('-id')
+        seen = set()
+        for image in images.filter(**{flag: True}):
+            owner_obj = getattr(image, owner)
+            if owner_obj.pk in seen:
+                setattr(image, flag, False)
+                image.save(update_fields=[flag])
+                continue
+            seen.add(owner_obj.pk)
+            setattr(owner_obj, pointer, image)
+            owner_obj.save(update_fields=[pointer])
+        if fallback:
+            for image in images.exclude(**{owner + '_id__in': seen}):
+                owner_obj = getattr(image, owner)
+                setattr(owner_obj, pointer, image)
+                owner_obj.save(update_fields=[pointer])
+
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('volontulo', '0007_remove_page_slug'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='offer',
+            name='main_image',
+            field=models.ForeignKey(blank=True, null=True, related_name='+', on_delete=django.db.models.deletion.SET_NULL, to='volontulo.OfferImage'),
+        ),
+        migrations.AddField(
+            model_name='organization',
+            name='main_image',
+            field=models.ForeignKey(blank=True, null=True, related_name='+', on_delete=django.db.models.deletion.SET_NULL, to='volontulo.OrganizationGallery'),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='avatar',
+            field=models.ForeignKey(blank=True, null=True, related_name='+', on_delete=django.db.models.deletion.SET_NULL, to='volontulo.UserGallery'),
+        ),
+        migrations.RunPython(populate_main_images, migrations.RunPython.noop),
+        migrations.RunSQL(
+            ['CREATE UNIQUE INDEX volontulo_offerimage_one_main '
+             'ON volontulo_offerimage (offer_id) WHERE is_main'],
+            ['DROP INDEX volontulo_offerimage_one_main'],
+        ),
+        migrations.RunSQL(
+            ['CREATE UNIQUE INDEX volontulo_organizationgallery_one_main '
+             'ON volontulo_organizationgallery (organization_id) '
+             'WHERE is_main'],
+            ['DROP INDEX volontulo_organizationgallery_one_main'],
+        ),
+        migrations.RunSQL(
+            ['CREATE UNIQUE INDEX volontulo_usergallery_one_avatar '
+             'ON volontulo_usergallery (userprofile_id) WHERE is_avatar'],
+            ['DROP INDEX volontulo_usergallery_one_avatar'],
+        ),
+    ]
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+# Predicates below have to be kept identical to the ones generated by
+# OffersManager, otherwise database will not use partial indexes.
+ACTIVE = (
+    "offer_status = 'published' AND "
+    "action_status IN ('ongoing', 'future') AND "
+    "recruitment_status IN ('open', 'supplemental')"
+)
+ARCHIVED = (
+    "offer_status = 'published' AND "
+    "action_status IN ('ongoing', 'finished') AND "
+    "recruitment_status = 'closed'"
+)
+INDEXES = (
+    # OffersManager.get_active() listed in (weight, id) order:
+    ('volontulo_offer_active', '(weight, id) WHERE ' + ACTIVE),
+    # OffersManager.get_archived():
+    ('volontulo_offer_archived', '(id) WHERE ' + ARCHIVED),
+    # OffersManager.get_weightened():
+    ('volontulo_offer_published_weight',
+     "(weight) WHERE offer_status = 'published'"),
+    # OffersManager.get_for_administrator():
+    ('volontulo_offer_unpublished', "(id) WHERE offer_status = 'unpublished'"),
+    # all offers listed for administrators in (weight, id) order:
+    ('volontulo_offer_weight_id', '(weight, id)'),
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('volontulo', '0008_main_image'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            ['CREATE INDEX {} ON volontulo_offer {}'.format(name, definition)
+             for name, definition in INDEXES],
+            ['DROP INDEX {}'.format(name) for name, _ in INDEXES],
+        ),
+    ]
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import DatabaseError, migrations, transaction
+
+
+# Text search configuration used for offers. It is a copy of "simple"
+# configuration (PostgreSQL has no Polish stemmer), which folds Polish
+# diacritics if "unaccent" extension can be installed.
+CREATE_CONFIGURATION = (
+    'CREATE TEXT SEARCH CONFIGURATION volontulo (COPY = pg_catalog.simple)'
+)
+ENABLE_UNACCENT = (
+    'CREATE EXTENSION IF NOT EXISTS unaccent',
+    'ALTER TEXT SEARCH CONFIGURATION volontulo '
+    'ALTER MAPPING FOR hword, hword_part, word WITH unaccent, simple',
+)
+CREATE_SEARCH_VECTOR = (
+    'ALTER TABLE volontulo_offer ADD COLUMN search_vector tsvector',
+    """
+    CREATE FUNCTION volontulo_offer_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('volontulo', coalesce(NEW.title, '')), 'A')
+            || setweight(to_tsvector('volontulo', coalesce(
+                (SELECT name FROM volontulo_organization
+                 WHERE id = NEW.organization_id), '')), 'B')
+            || setweight(to_tsvector('volontulo',
+                coalesce(NEW.location, '')), 'B')
+            || setweight(to_tsvector('volontulo',
+                coalesce(NEW.description, '')), 'C')
+            || setweight(to_tsvector('volontulo',
+                coalesce(NEW.requirements, '') || ' ' ||
+                coalesce(NEW.benefits, '')), 'D');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER volontulo_offer_search_vector
+    BEFORE INSERT OR UPDATE OF title, location, description, requirements,
+        benefits, organization_id
+    ON volontulo_offer
+    FOR EACH ROW EXECUTE PROCEDURE volontulo_offer_search_vector()
+    """,
+    """
+    CREATE FUNCTION volontulo_organization_search_vector() RETURNS trigger
+    AS $$
+    BEGIN
+        UPDATE volontulo_offer SET organization_id = organization_id
+        WHERE organization_id = NEW.id;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER volontulo_organization_search_vector
+    AFTER UPDATE OF name ON volontulo_organization
+    FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+    EXECUTE PROCEDURE volontulo_organization_search_vector()
+    """,
+    'UPDATE volontulo_offer SET title = title',
+    'CREATE INDEX volontulo_offer_search_vector '
+    'ON volontulo_offer USING gin (search_vector)',
+)
+DROP_SEARCH_VECTOR = (
+    'DROP TRIGGER volontulo_organization_search_vector '
+    'ON volontulo_organization',
+    'DROP FUNCTION volontulo_organization_search_vector()',
+    'DROP TRIGGER volontulo_offer_search_vector ON volontulo_offer',
+    'DROP FUNCTION volontulo_offer_search_vector()',
+    'ALTER TABLE volontulo_offer DROP COLUMN search_vector',
+    'DROP TEXT SEARCH CONFIGURATION volontulo',
+)
+
+
+def create_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(CREATE_CONFIGURATION)
+        try:
+            with transaction.atomic():
+                for sql in ENABLE_UNACCENT:
+                    cursor.execute(sql)
+        except DatabaseError:
+            # extension is not available or user is not allowed to create it
+            pass
+        for sql in CREATE_SEARCH_VECTOR:
+            cursor.execute(sql)
+
+
+def drop_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for sql in DROP_SEARCH_VECTOR:
+            cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('volontulo', '0009_offer_status_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_vector, drop_search_vector),
+    ]
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import csv
+import io
+import os
+import re
+import unicodedata
+
+from django.db import models, migrations
+
+# copy of geocoding code at the time of migration, so later changes of
+# apps.volontulo.lib.geo don't affect it:
+GAZETTEER_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'data',
+    'localities.csv',
+)
+WORD_RE = re.compile(r'[^\W_]+', re.UNICODE)
+FOLDED_LETTERS = {ord(u'ł'): u'l', ord(u'Ł'): u'L'}
+
+
+def tokenize(text):
+    text = unicodedata.normalize('NFKD', text.translate(FOLDED_LETTERS))
+    return WORD_RE.findall(u''.join(
+        c for c in text if not unicodedata.combining(c)
+    ).lower())
+
+
+def geocode(localities, location):
+    for part in (location or u'').split(u','):
+        words = tokenize(part)
+        for length in range(len(words), 0, -1):
+            for start in range(len(words) - length + 1):
+                coordinates = localities.get(
+                    u' '.join(words[start:start + length])
+                )
+                if coordinates:
+                    return coordinates
+    return None
+
+
+def set_coordinates(apps, schema_editor):
+    if not os.path.exists(GAZETTEER_PATH):
+        # coordinates can be set later by geocode_offers command:
+        return
+    localities = {}
+    with io.open(GAZETTEER_PATH, encoding='utf-8') as gazetteer_file:
+        for row in csv.DictReader(gazetteer_file):
+            localities.setdefault(u' '.join(tokenize(row['name'])), (
+                float(row['latitude']),
+                float(row['longitude']),
+            ))
+    Offer = apps.get_model('volontulo', 'Offer')
+    locations = Offer.objects.order_by().values_list(
+        'location', flat=True
+    ).distinct()
+    for location in list(locations):
+        latitude, longitude = geocode(localities, location) or (None, None)
+        Offer.objects.filter(location=location).update(
+            latitude=latitude,
+            longitude=longitude,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('volontulo', '0010_offer_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='offer',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='offer',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AlterIndexTogether(
+            name='offer',
+            index_together=set([('latitude', 'longitude')]),
+        ),
+        migrations.RunPython(set_coordinates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+# Offers whose statuses may still change, looked up by
+# OffersManager.update_statuses():
+INDEXES = (
+    ('volontulo_offer_pending_finish',
+     "(finished_at) WHERE action_status IN ('future', 'ongoing')"),
+    ('volontulo_offer_pending_start',
+     "(started_at) WHERE action_status = 'future'"),
+    ('volontulo_offer_pending_recruitment_end',
+     "(recruitment_end_date) "
+     "WHERE recruitment_status IN ('open', 'supplemental')"),
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('volontulo', '0011_offer_coordinates'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            ['CREATE INDEX {} ON volontulo_offer {}'.format(name, definition)
+             for name, definition in INDEXES],
+            ['DROP INDEX {}'.format(name) for name, _ in INDEXES],
+        ),
+    ]
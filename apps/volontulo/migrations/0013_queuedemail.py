@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('volontulo', '0012_offer_dates_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueuedEmail',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('subject', models.CharField(max_length=255)),
+                ('body', models.TextField()),
+                ('html_body', models.TextField(blank=True, default='')),
+                ('from_email', models.CharField(max_length=254)),
+                ('recipients', models.TextField()),
+                ('bcc', models.TextField(blank=True, default='')),
+                ('status', models.CharField(max_length=16, default='queued', choices=[('queued', 'Queued'), ('sent', 'Sent'), ('failed', 'Failed')])),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('claimed_by', models.CharField(max_length=32, blank=True, null=True, db_index=True)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AlterIndexTogether(
+            name='queuedemail',
+            index_together=set([('status', 'next_attempt_at')]),
+        ),
+    ]
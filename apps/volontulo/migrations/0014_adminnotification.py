@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('volontulo', '0013_queuedemail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdminNotification',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('templates_name', models.CharField(max_length=64)),
+                ('subject', models.CharField(max_length=255)),
+                ('recipients', models.TextField()),
+                ('body', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('digest_sent_at', models.DateTimeField(blank=True, null=True, db_index=True)),
+            ],
+        ),
+    ]
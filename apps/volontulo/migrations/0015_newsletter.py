@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('volontulo', '0014_adminnotification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='offer',
+            name='published_at',
+            field=models.DateTimeField(blank=True, null=True, db_index=True),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='newsletter',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='newsletter_sent_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+from django.conf import settings
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('volontulo', '0015_newsletter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OfferAlert',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True, db_index=True)),
+                ('offer', models.ForeignKey(related_name='+', to='volontulo.Offer')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SavedSearch',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('query', models.CharField(max_length=150)),
+                ('terms_count', models.PositiveSmallIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(related_name='saved_searches', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SavedSearchTerm',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('term', models.CharField(max_length=150)),
+                ('saved_search', models.ForeignKey(related_name='terms', to='volontulo.SavedSearch')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='offeralert',
+            name='saved_search',
+            field=models.ForeignKey(related_name='alerts', to='volontulo.SavedSearch'),
+        ),
+        migrations.AddField(
+            model_name='offeralert',
+            name='user',
+            field=models.ForeignKey(related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterUniqueTogether(
+            name='savedsearchterm',
+            unique_together=set([('term', 'saved_search')]),
+        ),
+        migrations.AlterUniqueTogether(
+            name='offeralert',
+            unique_together=set([('user', 'offer')]),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('volontulo', '0016_savedsearch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OfferReminder',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('send_at', models.DateTimeField()),
+                ('bucket', models.IntegerField()),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('offer', models.OneToOneField(related_name='reminder', to='volontulo.Offer')),
+            ],
+        ),
+        migrations.AlterIndexTogether(
+            name='offerreminder',
+            index_together=set([('sent_at', 'bucket')]),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+import django.utils.timezone
+import apps.volontulo.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('volontulo', '0017_offerreminder'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Webhook',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('url', models.URLField()),
+                ('secret', models.CharField(max_length=64, default=apps.volontulo.models.generate_webhook_secret)),
+                ('max_concurrency', models.PositiveSmallIntegerField(default=2)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('organization', models.ForeignKey(related_name='webhooks', to='volontulo.Organization')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='WebhookDeadLetter',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('event', models.CharField(max_length=64)),
+                ('payload', models.TextField()),
+                ('attempts', models.PositiveIntegerField()),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField()),
+                ('failed_at', models.DateTimeField(auto_now_add=True)),
+                ('webhook', models.ForeignKey(related_name='dead_letters', to='volontulo.Webhook')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='WebhookDelivery',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('event', models.CharField(max_length=64)),
+                ('payload', models.TextField()),
+                ('status', models.CharField(max_length=16, default='queued', choices=[('queued', 'Queued'), ('delivered', 'Delivered')])),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('claimed_by', models.CharField(max_length=32, blank=True, null=True, db_index=True)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('delivered_at', models.DateTimeField(blank=True, null=True)),
+                ('webhook', models.ForeignKey(related_name='deliveries', to='volontulo.Webhook')),
+            ],
+        ),
+        migrations.AlterIndexTogether(
+            name='webhookdelivery',
+            index_together=set([('status', 'next_attempt_at')]),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+from django.conf import settings
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('volontulo', '0018_webhook'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BulkMessage',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('subject', models.CharField(max_length=255)),
+                ('message', models.TextField()),
+                ('status', models.CharField(max_length=16, default='queued', choices=[('queued', 'Queued'), ('sent', 'Sent')])),
+                ('last_user_id', models.IntegerField(default=0)),
+                ('emails_count', models.PositiveIntegerField(default=0)),
+                ('scheduled_until', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('offer', models.ForeignKey(related_name='bulk_messages', to='volontulo.Offer')),
+                ('organization', models.ForeignKey(related_name='bulk_messages', to='volontulo.Organization')),
+                ('sender', models.ForeignKey(related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AlterIndexTogether(
+            name='bulkmessage',
+            index_together=set([('organization', 'created_at')]),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+def populate_null_weights(apps, schema_editor):
+    # offers without weight were listed after all the others by PostgreSQL,
+    # so they keep that place:
+    Offer = apps.get_model('volontulo', 'Offer')
+    bottom = Offer.objects.aggregate(weight=models.Max('weight'))['weight']
+    Offer.objects.filter(weight__isnull=True).update(
+        weight=(bottom or 0) + 1
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('volontulo', '0019_bulkmessage'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_null_weights, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='offer',
+            name='weight',
+            field=models.IntegerField(default=0),
+        ),
+    ]
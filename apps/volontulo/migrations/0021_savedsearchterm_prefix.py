@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import re
+import unicodedata
+
+from django.db import models, migrations
+
+# copy of search_index.tokenize at the time of migration:
+WORD_RE = re.compile(r'[^\W_]+', re.UNICODE)
+FOLDED_LETTERS = {ord(u'ł'): u'l', ord(u'Ł'): u'L'}
+
+
+def tokenize(text):
+    text = unicodedata.normalize('NFKD', text.translate(FOLDED_LETTERS))
+    return WORD_RE.findall(u''.join(
+        c for c in text if not unicodedata.combining(c)
+    ).lower())
+
+
+def mark_last_words(apps, schema_editor):
+    # last words of saved searches are matched as prefixes, as in search:
+    SavedSearch = apps.get_model('volontulo', 'SavedSearch')
+    SavedSearchTerm = apps.get_model('volontulo', 'SavedSearchTerm')
+    for search_id, query in SavedSearch.objects.values_list('id', 'query'):
+        words = tokenize(query)
+        if words and words[-1] not in words[:-1]:
+            SavedSearchTerm.objects.filter(
+                saved_search_id=search_id, term=words[-1]
+            ).update(prefix=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('volontulo', '0020_offer_weight_not_null'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='savedsearchterm',
+            name='prefix',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(mark_last_words, migrations.RunPython.noop),
+    ]
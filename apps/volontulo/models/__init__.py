@@ -0,0 +1,752 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: models
+"""
+
+import datetime
+import logging
+import os
+# pylint: disable=unused-import
+import uuid
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import models
+from django.db import transaction
+from django.db.models import Case
+from django.db.models import IntegerField
+from django.db.models import Min
+from django.db.models import Q
+from django.db.models import Value
+from django.db.models import When
+from django.utils import timezone
+
+from apps.volontulo.lib.cache import bump_offers_generation
+from apps.volontulo.lib.cache import cached_offers_data
+# models of features are kept in submodules:
+from apps.volontulo.models.bulk_messages import BulkMessage
+from apps.volontulo.models.outbox import AdminNotification
+from apps.volontulo.models.outbox import QueuedEmail
+from apps.volontulo.models.reminders import OfferReminder
+from apps.volontulo.models.saved_searches import OfferAlert
+from apps.volontulo.models.saved_searches import SavedSearch
+from apps.volontulo.models.saved_searches import SavedSearchTerm
+from apps.volontulo.models.webhooks import Webhook
+from apps.volontulo.models.webhooks import WebhookDeadLetter
+from apps.volontulo.models.webhooks import WebhookDelivery
+# default of Webhook.secret referred by migrations:
+from apps.volontulo.models.webhooks import generate_webhook_secret
+
+# pylint: disable=invalid-name
+logger = logging.getLogger('volontulo.models')
+
+
+class Organization(models.Model):
+    u"""Model that handles ogranizations/institutions."""
+    name = models.CharField(max_length=150)
+    address = models.CharField(max_length=150)
+    description = models.TextField()
+    main_image = models.ForeignKey(
+        'OrganizationGallery',
+        related_name='+',
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+    )
+
+    def __str__(self):
+        u"""Organization model string reprezentation."""
+        return self.name
+
+
+class OffersManager(models.Manager):
+    u"""Offers Manager."""
+
+    # number of offers updated by single statement of reorder:
+    REORDER_BATCH_SIZE = 300
+    # number of offers updated by single statement of update_statuses:
+    STATUSES_BATCH_SIZE = 1000
+
+    def get_active(self):
+        u"""Return active offers."""
+        return self.filter(
+            offer_status='published',
+            action_status__in=('ongoing', 'future'),
+            recruitment_status__in=('open', 'supplemental'),
+        ).all()
+
+    def get_for_administrator(self):
+        u"""Return all offers for administrator to allow management."""
+        return self.filter(offer_status='unpublished').all()
+
+    def get_weightened(self, count=10):
+        u"""Return all published offers ordered by weight.
+
+        :param count: Integer
+        :return:
+        """
+        return self.filter(
+            offer_status='published').order_by('weight')[:count]
+
+    def get_archived(self):
+        u"""Return archived offers."""
+        return self.filter(
+            offer_status='published',
+            action_status__in=('ongoing', 'finished'),
+            recruitment_status='closed',
+        ).all()
+
+    def cached(self, method, *args):
+        u"""Return list of offers returned by manager method.
+
+        Offers (with organizations and main images) are cached until any
+        offer changes, so they can be shown without querying database.
+
+        :param method: string Name of manager method, e.g. "get_active"
+        :param args: Arguments of method
+        """
+        return cached_offers_data(
+            ('manager', method) + args,
+            lambda: list(getattr(self, method)(*args).select_related(
+                'organization',
+                'main_image',
+            )),
+        )
+
+    def get_top_weight(self):
+        u"""Return weight placing offer above all others.
+
+        Offers having the lowest weight are locked till the end of
+        transaction, so concurrent publications get their weights one after
+        another. When top offer changed while waiting for the lock, the new
+        one is locked.
+        """
+        top = self.aggregate(weight=Min('weight'))['weight']
+        while top is not None:
+            locked = top
+            list(self.select_for_update().filter(
+                weight=locked
+            ).values_list('id', flat=True))
+            top = self.aggregate(weight=Min('weight'))['weight']
+            if top == locked:
+                return top - Offer.WEIGHT_STEP
+        return 0
+
+    def rebalance_weights(self):
+        u"""Spread weights evenly keeping current order of offers.
+
+        Weights are decreased by every published offer, so once they get
+        close to the lower limit of integer column they have to be rebalanced.
+
+        :return: int Number of updated offers
+        """
+        ids = self.order_by('weight', 'id').values_list('id', flat=True)
+        return self.reorder({
+            id_: position * Offer.WEIGHT_STEP
+            for position, id_ in enumerate(ids)
+        })
+
+    @staticmethod
+    def _spread(lower, slots, upper):
+        u"""Return weights of run of arranged offers between neighbours.
+
+        Run keeps weights of its places if they still sort it, otherwise it
+        gets weights evenly spaced in the gap. Returns None when the gap is
+        too small.
+
+        :param lower: int Weight of previous offer or None
+        :param slots: list Sorted weights of places of run
+        :param upper: int Weight of next offer or None
+        """
+        if lower is None:
+            lower = max(slots[0] - Offer.WEIGHT_STEP, Offer.MIN_WEIGHT - 1)
+        if upper is None:
+            upper = slots[-1] + Offer.WEIGHT_STEP
+        if lower < slots[0] and slots[-1] < upper and all(
+                previous < weight
+                for previous, weight in zip(slots, slots[1:])
+        ):
+            return slots
+        if upper - lower <= len(slots):
+            return None
+        return [
+            lower + (upper - lower) * position // (len(slots) + 1)
+            for position in range(1, len(slots) + 1)
+        ]
+
+    def _arranged_weights(self, ids):
+        u"""Return weights putting offers in given order or None when there
+        is no room for them.
+
+        :param ids: list Offers ids in desired order
+        """
+        current = dict(
+            self.select_for_update().filter(
+                id__in=ids
+            ).values_list('id', 'weight')
+        )
+        if len(current) != len(ids):
+            raise Offer.DoesNotExist(u"Some of offers do not exist.")
+        first = min((weight, id_) for id_, weight in current.items())
+        last = max((weight, id_) for id_, weight in current.items())
+
+        # runs of places of arranged offers with weights of offers around:
+        before = self.select_for_update().filter(
+            Q(weight__lt=first[0]) | Q(weight=first[0], id__lt=first[1])
+        ).order_by('-weight', '-id').values_list('weight', flat=True).first()
+        runs = [(before, [])]
+        for weight, id_ in self.select_for_update().filter(
+                weight__range=(first[0], last[0]),
+        ).order_by('weight', 'id').values_list('weight', 'id').iterator():
+            if not first <= (weight, id_) <= last:
+                continue
+            if id_ in current:
+                runs[-1][1].append(weight)
+            else:
+                runs.append((weight, []))
+        after = self.select_for_update().filter(
+            Q(weight__gt=last[0]) | Q(weight=last[0], id__gt=last[1])
+        ).order_by('weight', 'id').values_list('weight', flat=True).first()
+
+        weights = {}
+        arranged = iter(ids)
+        for (lower, slots), (upper, _) in zip(runs, runs[1:] + [(after, [])]):
+            if not slots:
+                continue
+            run_weights = self._spread(lower, slots, upper)
+            if run_weights is None:
+                return None
+            for weight in run_weights:
+                weights[next(arranged)] = weight
+        return weights
+
+    def arrange(self, ids):
+        u"""Put offers in given order, in places of each other.
+
+        Arranged offers take places of each other in (weight, id) order, so
+        their position relative to offers not being arranged does not change.
+        Only arranged offers are updated, unless there is no room between
+        weights of other offers - then all weights are rebalanced first.
+
+        :param ids: list Offers ids in desired order
+        :return: int Number of updated offers
+        :raises Offer.DoesNotExist: when some of offers do not exist
+        """
+        if len(set(ids)) != len(ids):
+            raise ValueError(u"Offers ids are duplicated.")
+        updated = 0
+        with transaction.atomic():
+            weights = self._arranged_weights(ids)
+            if weights is None:
+                logger.warning(u"No room for arranged offers, rebalancing.")
+                updated = self.rebalance_weights()
+                weights = self._arranged_weights(ids)
+            updated += self.reorder(weights)
+        if updated:
+            # reorder bumped it before the outer transaction was committed:
+            bump_offers_generation()
+        return updated
+
+    def reorder(self, weights):
+        u"""Set weights of many offers in single UPDATE statement.
+
+        Offers are locked for the time of transaction, so concurrent reorders
+        are applied one after another. Only offers whose weight changes are
+        updated, in batches small enough to fit in query parameters limits.
+
+        :param weights: dict Weights of offers keyed by offer id
+        :return: int Number of updated offers
+        :raises Offer.DoesNotExist: when some of offers do not exist
+        """
+        with transaction.atomic():
+            current = dict(
+                self.select_for_update().filter(
+                    id__in=weights.keys()
+                ).values_list('id', 'weight')
+            )
+            missing = set(weights) - set(current)
+            if missing:
+                raise Offer.DoesNotExist(
+                    u"Offers {} do not exist.".format(
+                        ', '.join(str(id_) for id_ in sorted(missing))
+                    )
+                )
+
+            changed = {
+                id_: weight
+                for id_, weight in weights.items()
+                if current[id_] != weight
+            }
+            changed = sorted(changed.items())
+            updated = 0
+            for i in range(0, len(changed), self.REORDER_BATCH_SIZE):
+                batch = changed[i:i + self.REORDER_BATCH_SIZE]
+                updated += self.filter(
+                    id__in=[id_ for id_, _ in batch]
+                ).update(weight=Case(
+                    *[When(id=id_, then=Value(weight))
+                      for id_, weight in batch],
+                    output_field=IntegerField()
+                ))
+        if updated:
+            bump_offers_generation()
+        return updated
+
+    def update_statuses(self, now=None, batch_size=None):
+        u"""Move offers whose dates passed to their next statuses.
+
+        Offers are updated in batches by UPDATE statements repeating the
+        conditions of selecting them, locked for the time of update, so
+        running it again or concurrently does not change offers twice. It's
+        a generator yielding transition name and list of (id, title) of
+        offers updated by each statement.
+
+        :param now: datetime Time to compare offers dates with
+        :param batch_size: int Maximal number of offers updated at once
+        """
+        now = now or timezone.now()
+        batch_size = batch_size or self.STATUSES_BATCH_SIZE
+        no_reserve_recruitment = (
+            models.Q(reserve_recruitment=False) |
+            models.Q(reserve_recruitment_end_date__isnull=True) |
+            models.Q(reserve_recruitment_end_date__lte=now)
+        )
+        transitions = (
+            ('finished', models.Q(
+                action_status__in=('future', 'ongoing'),
+                finished_at__lte=now,
+            ), {'action_status': 'finished', 'recruitment_status': 'closed'}),
+            ('started', models.Q(
+                action_status='future',
+                started_at__lte=now,
+            ), {'action_status': 'ongoing'}),
+            ('supplemental', models.Q(
+                recruitment_status='open',
+                recruitment_end_date__lte=now,
+                reserve_recruitment=True,
+                reserve_recruitment_end_date__gt=now,
+            ), {'recruitment_status': 'supplemental'}),
+            ('closed', models.Q(
+                recruitment_status__in=('open', 'supplemental'),
+                recruitment_end_date__lte=now,
+            ) & no_reserve_recruitment, {'recruitment_status': 'closed'}),
+        )
+        for name, condition, changes in transitions:
+            while True:
+                with transaction.atomic():
+                    offers = list(self.select_for_update().filter(
+                        condition
+                    ).order_by('id').values_list('id', 'title')[:batch_size])
+                    self.filter(
+                        id__in=[id_ for id_, _ in offers]
+                    ).update(**changes)
+                if offers:
+                    bump_offers_generation()
+                    yield name, offers
+                if len(offers) < batch_size:
+                    break
+
+
+class Offer(models.Model):
+    u"""Offer model."""
+
+    OFFER_STATUSES = (
+        ('unpublished', u'Unpublished'),
+        ('published', u'Published'),
+        ('rejected', u'Rejected'),
+    )
+    RECRUITMENT_STATUSES = (
+        ('open', u'Open'),
+        ('supplemental', u'Supplemental'),
+        ('closed', u'Closed'),
+    )
+    ACTION_STATUSES = (
+        ('future', u'Future'),
+        ('ongoing', u'Ongoing'),
+        ('finished', u'Finished'),
+    )
+
+    # gap left between weights of subsequently published offers:
+    WEIGHT_STEP = 1000
+    # lowest weight that fits in integer column:
+    MIN_WEIGHT = -2 ** 31
+    # volunteers are reminded that long before action starts:
+    REMINDER_BEFORE_START = datetime.timedelta(days=1)
+    # fields which reminder time depends on:
+    REMINDER_FIELDS = ('offer_status', 'action_start_date', 'started_at')
+
+    objects = OffersManager()
+    organization = models.ForeignKey(Organization)
+    volunteers = models.ManyToManyField(User)
+    description = models.TextField()
+    requirements = models.TextField(blank=True, default='')
+    time_commitment = models.TextField()
+    benefits = models.TextField()
+    location = models.CharField(max_length=150)
+    # coordinates of location, set when offer is saved:
+    latitude = models.FloatField(blank=True, null=True)
+    longitude = models.FloatField(blank=True, null=True)
+    title = models.CharField(max_length=150)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    time_period = models.CharField(max_length=150, default='', blank=True)
+    status_old = models.CharField(
+        max_length=30,
+        default='NEW',
+        null=True,
+        unique=False
+    )
+    offer_status = models.CharField(
+        max_length=16,
+        choices=OFFER_STATUSES,
+        default='unpublished',
+    )
+    recruitment_status = models.CharField(
+        max_length=16,
+        choices=RECRUITMENT_STATUSES,
+        default='open',
+    )
+    action_status = models.CharField(
+        max_length=16,
+        choices=ACTION_STATUSES,
+        default='ongoing',
+    )
+    votes = models.BooleanField(default=0)
+    recruitment_start_date = models.DateTimeField(blank=True, null=True)
+    recruitment_end_date = models.DateTimeField(blank=True, null=True)
+    reserve_recruitment = models.BooleanField(blank=True, default=True)
+    reserve_recruitment_start_date = models.DateTimeField(
+        blank=True,
+        null=True
+    )
+    reserve_recruitment_end_date = models.DateTimeField(
+        blank=True,
+        null=True
+    )
+    action_ongoing = models.BooleanField(default=False, blank=True)
+    constant_coop = models.BooleanField(default=False, blank=True)
+    action_start_date = models.DateTimeField(blank=True, null=True)
+    action_end_date = models.DateTimeField(blank=True, null=True)
+    volunteers_limit = models.IntegerField(default=0, null=True, blank=True)
+    weight = models.IntegerField(default=0)
+    # time of last publication, offers published since previous newsletter
+    # are sent in next one:
+    published_at = models.DateTimeField(blank=True, null=True, db_index=True)
+    main_image = models.ForeignKey(
+        'OfferImage',
+        related_name='+',
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+    )
+
+    class Meta:
+        index_together = [
+            # bounding box lookups of offers near given point:
+            ['latitude', 'longitude'],
+        ]
+
+    def __str__(self):
+        u"""Offer string representation."""
+        return self.title
+
+    def get_start(self):
+        u"""Return start of action, if it's known."""
+        start = self.action_start_date or self.started_at
+        if start is None or isinstance(start, datetime.datetime):
+            return start
+        # value assigned as string is converted as when it's saved:
+        start = self._meta.get_field('started_at').to_python(start)
+        if timezone.is_naive(start):
+            start = timezone.make_aware(start)
+        return start
+
+    def get_reminder_at(self):
+        u"""Return time of reminding volunteers about published offer."""
+        start = self.get_start()
+        if start is None or self.offer_status != 'published':
+            return None
+        return start - self.REMINDER_BEFORE_START
+
+    def update_reminder(self, created=False):
+        u"""Reschedule reminder of saved offer.
+
+        :param created: Boolean flag of offer which was just created, so it
+            has no reminder yet
+        """
+        reminder_at = self.get_reminder_at()
+        if created and reminder_at is None:
+            return
+        OfferReminder.objects.schedule(self, reminder_at)
+
+    def set_main_image(self, is_main):
+        u"""Set main image flag unsetting other offers images.
+
+        :param is_main: Boolean flag resetting offer main image
+        """
+        if is_main:
+            OfferImage.objects.filter(offer=self).update(is_main=False)
+            return True
+        return False
+
+    def save_offer_image(self, gallery, userprofile, is_main=False):
+        u"""Handle image upload for user profile page.
+
+        Image becomes offer's main image if it was marked as main or if offer
+        has no main image yet, so listings never need to scan offer gallery.
+        Main image is always flagged with is_main too.
+
+        :param gallery: UserProfile model instance
+        :param userprofile: UserProfile model instance
+        :param is_main: Boolean main image flag
+        """
+        gallery.offer = self
+        gallery.userprofile = userprofile
+        gallery.is_main = self.set_main_image(
+            is_main or self.main_image_id is None
+        )
+        gallery.save()
+        if gallery.is_main:
+            self.main_image = gallery
+            self.save(update_fields=['main_image'])
+        return self
+
+    def create_new(self):
+        u"""Set status while creating new offer."""
+        self.offer_status = 'unpublished'
+        self.recruitment_status = 'open'
+
+        if self.started_at or self.finished_at:
+            self.action_status = self.determine_action_status()
+
+    def determine_action_status(self):
+        u"""Determine action status by offer dates."""
+        if (
+                (
+                    self.finished_at and
+                    self.started_at < timezone.now() < self.finished_at
+                ) or
+                (
+                    self.started_at < timezone.now() and
+                    not self.finished_at
+                )
+        ):
+            return 'ongoing'
+        elif self.started_at > timezone.now():
+            return 'future'
+        else:
+            return 'finished'
+
+    def change_status(self, status):
+        u"""Change offer status.
+
+        :param status: string Offer status
+        """
+        if status in ('published', 'rejected', 'unpublished'):
+            newly_published = (
+                status == 'published' and self.offer_status != 'published'
+            )
+            if newly_published:
+                self.published_at = timezone.now()
+            self.offer_status = status
+            self.save()
+            if newly_published:
+                OfferAlert.objects.create_for_offer(self)
+        return self
+
+    def unpublish(self):
+        u"""Unpublish offer."""
+        self.offer_status = 'unpublished'
+        self.save()
+        return self
+
+    def publish(self):
+        u"""Publish offer placing it on top of other offers.
+
+        Only published offer is updated - it gets weight lower than any other
+        offer, instead of shifting weights of all other offers. Top offer is
+        locked until the offer is saved, so offers published at the same time
+        don't share weight.
+        """
+        newly_published = self.offer_status != 'published'
+        if newly_published:
+            self.published_at = timezone.now()
+        self.offer_status = 'published'
+        with transaction.atomic():
+            weight = Offer.objects.get_top_weight()
+            if weight < Offer.MIN_WEIGHT:
+                logger.warning(u"Offers weights exhausted, rebalancing.")
+                Offer.objects.rebalance_weights()
+                weight = Offer.objects.get_top_weight()
+            self.weight = weight
+            self.save()
+        if newly_published:
+            OfferAlert.objects.create_for_offer(self)
+        return self
+
+    def reject(self):
+        u"""Reject offer."""
+        self.offer_status = 'rejected'
+        self.save()
+        return self
+
+    def close_offer(self):
+        u"""Change offer status to close."""
+        self.offer_status = 'unpublished'
+        self.action_status = 'finished'
+        self.recruitment_status = 'closed'
+        self.save()
+        return self
+
+
+class UserProfile(models.Model):
+    u"""Model that handles users' profiles."""
+
+    user = models.OneToOneField(User)
+    organizations = models.ManyToManyField(
+        Organization,
+        related_name='userprofiles',
+    )
+    is_administrator = models.BooleanField(default=False, blank=True)
+    phone_no = models.CharField(
+        max_length=32,
+        blank=True,
+        default='',
+        null=True
+    )
+    uuid = models.UUIDField(default=uuid.uuid4, unique=True)
+    newsletter = models.BooleanField(default=False, blank=True)
+    # time of last newsletter, it lists offers published since then:
+    newsletter_sent_at = models.DateTimeField(blank=True, null=True)
+    avatar = models.ForeignKey(
+        'UserGallery',
+        related_name='+',
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+    )
+
+    def is_admin(self):
+        u"""Return True if current user is administrator, else return False"""
+        return self.is_administrator
+
+    def is_volunteer(self):
+        u"""Return True if current user is volunteer, else return False"""
+        return not (self.is_administrator and self.organizations)
+
+    def can_edit_offer(self, offer=None, offer_id=None):
+        u"""Checks if the user can edit an offer based on its ID"""
+        if offer is None:
+            offer = Offer.objects.get(id=offer_id)
+        return self.is_administrator or self.organizations.filter(
+            id=offer.organization_id).exists()
+
+    def get_avatar(self):
+        u"""Return avatar for current user."""
+        return self.avatar
+
+    def set_avatar(self, gallery):
+        u"""Replace user images with new avatar.
+
+        :param gallery: UserGallery model instance
+        """
+        self.clean_images()
+        gallery.userprofile = self
+        gallery.is_avatar = True
+        gallery.save()
+        self.avatar = gallery
+        self.save(update_fields=['avatar'])
+
+    def clean_images(self):
+        u"""Clean user images."""
+        images = UserGallery.objects.filter(userprofile=self)
+        for image in images:
+            try:
+                os.remove(os.path.join(settings.MEDIA_ROOT, str(image.image)))
+            except OSError as ex:
+                logger.error(ex)
+
+            image.delete()
+
+    def __str__(self):
+        return self.user.email
+
+
+class UserGallery(models.Model):
+    u"""Handling user images."""
+    userprofile = models.ForeignKey(UserProfile, related_name='images')
+    image = models.ImageField(upload_to='profile/')
+    is_avatar = models.BooleanField(default=False)
+
+    def __str__(self):
+        u"""String representation of an image."""
+        return str(self.image)
+
+
+class OfferImage(models.Model):
+    u"""Handling offer image."""
+    userprofile = models.ForeignKey(UserProfile, related_name='offerimages')
+    offer = models.ForeignKey(Offer, related_name='images')
+    path = models.ImageField(upload_to='offers/')
+    is_main = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        u"""String representation of an image."""
+        return str(self.path)
+
+
+class OrganizationGallery(models.Model):
+    u"""Handling organizations gallery."""
+    organization = models.ForeignKey(Organization, related_name='images')
+    published_by = models.ForeignKey(UserProfile, related_name='gallery')
+    path = models.ImageField(upload_to='gallery/')
+    is_main = models.BooleanField(default=False, blank=True)
+
+    def __str__(self):
+        u"""String representation of an image."""
+        return str(self.path)
+
+    def remove(self):
+        u"""Remove image."""
+        self.remove()
+
+    def set_as_main(self, organization):
+        u"""Save image as main.
+
+        :param organization: Organization model instance
+        """
+        OrganizationGallery.objects.filter(organization_id=organization.id)\
+            .update(
+                is_main=False
+            )
+        self.is_main = True
+        self.save()
+        organization.main_image = self
+        organization.save(update_fields=['main_image'])
+
+    @staticmethod
+    def get_organizations_galleries(userprofile):
+        u"""Get images grouped by organizations
+
+        :param userprofile: UserProfile model instance
+        """
+        organizations = Organization.objects.filter(
+            userprofiles=userprofile
+        ).all()
+        return {o.name: o.images.all() for o in organizations}
+
+
+class Page(models.Model):
+    """Static page model."""
+
+    title = models.CharField(max_length=255)
+    content = models.TextField()
+    author = models.ForeignKey(UserProfile)
+    published = models.BooleanField(default=False)
+    modified_at = models.DateTimeField(auto_now=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.title
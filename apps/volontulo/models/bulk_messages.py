@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: bulk_messages
+"""
+
+import datetime
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.db import models
+from django.db import transaction
+from django.utils import timezone
+
+
+class BulkMessageManager(models.Manager):
+    u"""Manager of messages from organizations to volunteers of offers."""
+
+    # number of messages organization may send a day:
+    MAX_PER_DAY = 5
+
+    def can_send(self, organization_id, now=None):
+        u"""Check if organization did not exceed its daily limit.
+
+        :param organization_id: int Organization id
+        :param now: datetime Current time
+        """
+        now = now or timezone.now()
+        return self.filter(
+            organization_id=organization_id,
+            created_at__gt=now - datetime.timedelta(days=1),
+        ).count() < self.MAX_PER_DAY
+
+    def create_within_limit(self, offer, sender, subject, message):
+        u"""Create message unless organization exceeded its daily limit.
+
+        Organization is locked until message is created, so concurrent
+        requests can't exceed the limit together. Returns created message
+        or None.
+
+        :param offer: Offer instance
+        :param sender: User instance
+        :param subject: string Message subject
+        :param message: string Message content
+        """
+        with transaction.atomic():
+            organizations = apps.get_model('volontulo', 'Organization')
+            list(organizations.objects.select_for_update().filter(
+                id=offer.organization_id
+            ).values_list('id', flat=True))
+            if not self.can_send(offer.organization_id):
+                return None
+            return self.create(
+                offer=offer,
+                organization_id=offer.organization_id,
+                sender=sender,
+                subject=subject,
+                message=message,
+            )
+
+
+class BulkMessage(models.Model):
+    u"""Message to all volunteers of offer, queued by send_bulk_messages
+    command."""
+
+    STATUSES = (
+        ('queued', u'Queued'),
+        ('sent', u'Sent'),
+    )
+
+    offer = models.ForeignKey(
+        'volontulo.Offer',
+        related_name='bulk_messages',
+    )
+    organization = models.ForeignKey(
+        'volontulo.Organization',
+        related_name='bulk_messages',
+    )
+    sender = models.ForeignKey(User, related_name='+')
+    subject = models.CharField(max_length=255)
+    message = models.TextField()
+    status = models.CharField(
+        max_length=16,
+        choices=STATUSES,
+        default='queued',
+    )
+    # id of last volunteer whose email was queued, so sending is resumed:
+    last_user_id = models.IntegerField(default=0)
+    emails_count = models.PositiveIntegerField(default=0)
+    # time when the last queued emails are released by throttling:
+    scheduled_until = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    objects = BulkMessageManager()
+
+    class Meta:
+        index_together = [
+            # daily limit and throttling of organization messages:
+            ['organization', 'created_at'],
+        ]
+
+    def __str__(self):
+        u"""Bulk message model string reprezentation."""
+        return self.subject
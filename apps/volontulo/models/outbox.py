@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: outbox
+"""
+
+import datetime
+import uuid
+
+from django.db import connection
+from django.db import models
+from django.db.models import Count
+from django.utils import timezone
+
+
+class OutboxManager(models.Manager):
+    u"""Base manager of messages claimed in batches by workers and retried
+    with exponential backoff.
+
+    Model has to extend OutboxMessage and have status field.
+    """
+
+    # number of messages claimed by worker at once:
+    BATCH_SIZE = 50
+    # claims older than that are left by crashed workers:
+    CLAIM_TIMEOUT = datetime.timedelta(minutes=15)
+    # delay of first retry, doubled by each failed attempt up to maximum:
+    RETRY_DELAY = datetime.timedelta(minutes=1)
+    MAX_RETRY_DELAY = datetime.timedelta(hours=6)
+    MAX_ATTEMPTS = 10
+
+    def get_due(self, now):
+        u"""Return queued messages ready to be sent and not claimed."""
+        return self.filter(
+            models.Q(claimed_at__isnull=True) |
+            models.Q(claimed_at__lte=now - self.CLAIM_TIMEOUT),
+            status='queued',
+            next_attempt_at__lte=now,
+        )
+
+    def claim(self, batch_size=None, now=None):
+        u"""Reserve batch of due messages for current worker and return them.
+
+        On PostgreSQL rows locked by other workers are skipped, so workers
+        never wait for each other. Other databases mark rows with claim token
+        by UPDATE repeating conditions of selecting them, so each message is
+        claimed by one worker.
+
+        :param batch_size: int Maximal number of claimed messages
+        :param now: datetime Current time
+        """
+        now = now or timezone.now()
+        batch_size = batch_size or self.BATCH_SIZE
+        token = uuid.uuid4().hex
+        if connection.vendor == 'postgresql':
+            table = self.model._meta.db_table
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'UPDATE {table} SET claimed_by = %s, claimed_at = %s '
+                    'WHERE id IN ('
+                    'SELECT id FROM {table} '
+                    'WHERE status = %s AND next_attempt_at <= %s '
+                    'AND (claimed_at IS NULL OR claimed_at <= %s) '
+                    'ORDER BY id LIMIT %s '
+                    'FOR UPDATE SKIP LOCKED)'.format(table=table),
+                    [token, now, 'queued', now, now - self.CLAIM_TIMEOUT,
+                     batch_size],
+                )
+        else:
+            ids = list(self.get_due(now).order_by('id').values_list(
+                'id', flat=True
+            )[:batch_size])
+            self.get_due(now).filter(id__in=ids).update(
+                claimed_by=token,
+                claimed_at=now,
+            )
+        return list(self.filter(claimed_by=token).order_by('id'))
+
+    def get_retry_delay(self, attempts):
+        u"""Return delay of next attempt after given number of attempts.
+
+        :param attempts: int Number of failed attempts
+        """
+        return min(
+            self.RETRY_DELAY * 2 ** (attempts - 1),
+            self.MAX_RETRY_DELAY,
+        )
+
+
+class QueuedEmailManager(OutboxManager):
+    u"""Outbox of emails sent by send_queued_mail command."""
+
+    # number of emails sent through single SMTP connection:
+    BATCH_SIZE = 50
+
+    def enqueue(self, recipients, bcc=(), **fields):
+        u"""Add email to outbox.
+
+        :param recipients: list Recipients addresses
+        :param bcc: list Hidden recipients addresses
+        :param fields: Content of email - subject, body, html_body and
+            from_email
+        """
+        return self.create(
+            recipients=u','.join(recipients),
+            bcc=u','.join(bcc),
+            **fields
+        )
+
+    def mark_sent(self, ids, now=None):
+        u"""Mark claimed emails as sent.
+
+        :param ids: list Emails ids
+        :param now: datetime Time of sending
+        """
+        return self.filter(id__in=ids).update(
+            status='sent',
+            sent_at=now or timezone.now(),
+            attempts=models.F('attempts') + 1,
+            claimed_by=None,
+            claimed_at=None,
+        )
+
+    def mark_failed(self, email, error, now=None):
+        u"""Release claimed email for retry with exponential backoff.
+
+        Email is given up after MAX_ATTEMPTS attempts.
+
+        :param email: QueuedEmail instance
+        :param error: Exception raised by sending
+        :param now: datetime Time of failed attempt
+        """
+        now = now or timezone.now()
+        attempts = email.attempts + 1
+        return self.filter(id=email.id).update(
+            status='queued' if attempts < self.MAX_ATTEMPTS else 'failed',
+            attempts=attempts,
+            next_attempt_at=now + self.get_retry_delay(attempts),
+            last_error=u'{}: {}'.format(type(error).__name__, error),
+            claimed_by=None,
+            claimed_at=None,
+        )
+
+    def get_depth(self, now=None):
+        u"""Return numbers of emails keyed by status and age of oldest
+        queued email in seconds (None if queue is empty).
+
+        :param now: datetime Current time
+        """
+        now = now or timezone.now()
+        depth = dict.fromkeys(
+            (status for status, _ in QueuedEmail.STATUSES), 0
+        )
+        depth.update(
+            (row['status'], row['count'])
+            for row in self.values('status').annotate(
+                count=Count('id')
+            ).order_by()
+        )
+        oldest = self.filter(status='queued').order_by('id').values_list(
+            'created_at', flat=True
+        ).first()
+        depth['oldest'] = (
+            (now - oldest).total_seconds() if oldest is not None else None
+        )
+        return depth
+
+
+class OutboxMessage(models.Model):
+    u"""Fields of retried messages used by OutboxManager, which are
+    common to all outboxes."""
+
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_by = models.CharField(
+        max_length=32,
+        blank=True,
+        null=True,
+        db_index=True,
+    )
+    claimed_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True, default='')
+
+    class Meta:
+        abstract = True
+
+
+class QueuedEmail(OutboxMessage):
+    u"""Email waiting in outbox."""
+
+    STATUSES = (
+        ('queued', u'Queued'),
+        ('sent', u'Sent'),
+        ('failed', u'Failed'),
+    )
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True, default='')
+    from_email = models.CharField(max_length=254)
+    recipients = models.TextField()
+    bcc = models.TextField(blank=True, default='')
+    status = models.CharField(
+        max_length=16,
+        choices=STATUSES,
+        default='queued',
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    objects = QueuedEmailManager()
+
+    class Meta:
+        index_together = [
+            # due emails looked up by QueuedEmailManager.claim():
+            ['status', 'next_attempt_at'],
+        ]
+
+    def __str__(self):
+        u"""Queued email model string reprezentation."""
+        return self.subject
+
+
+class AdminNotification(models.Model):
+    u"""Copy of email for administrators waiting for digest."""
+
+    templates_name = models.CharField(max_length=64)
+    subject = models.CharField(max_length=255)
+    recipients = models.TextField()
+    body = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    digest_sent_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        db_index=True,
+    )
+
+    def __str__(self):
+        u"""Admin notification model string reprezentation."""
+        return self.subject
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: reminders
+"""
+
+import datetime
+
+from django.db import models
+from django.db import transaction
+from django.utils import timezone
+
+
+class OfferReminderManager(models.Manager):
+    u"""Manager of reminders schedule.
+
+    Reminders are indexed by buckets of their time, so scheduler tick reads
+    only due buckets instead of scanning offers.
+    """
+
+    BUCKET_SIZE = datetime.timedelta(minutes=15)
+    EPOCH = datetime.datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+    def get_bucket(self, moment):
+        u"""Return number of bucket of given time.
+
+        :param moment: datetime Time
+        """
+        return int(
+            (moment - self.EPOCH).total_seconds() //
+            self.BUCKET_SIZE.total_seconds()
+        )
+
+    def schedule(self, offer, send_at, now=None):
+        u"""Set time of offer reminder or cancel it.
+
+        Reminder which was already sent is sent again only if its time has
+        changed, e.g. action was postponed. Unchanged reminder is only read.
+
+        :param offer: Offer model instance
+        :param send_at: datetime Time of reminder, None cancels reminder
+        :param now: datetime Current time
+        """
+        now = now or timezone.now()
+        if send_at is None or offer.get_start() <= now:
+            self.filter(offer_id=offer.id, sent_at__isnull=True).delete()
+            return
+        reminder = self.filter(offer_id=offer.id).first()
+        if reminder is not None and reminder.send_at == send_at:
+            return
+        with transaction.atomic():
+            reminder = self.select_for_update().filter(
+                offer_id=offer.id,
+            ).first()
+            if reminder is None:
+                self.create(
+                    offer_id=offer.id,
+                    send_at=send_at,
+                    bucket=self.get_bucket(send_at),
+                )
+            elif reminder.send_at != send_at:
+                self.filter(id=reminder.id).update(
+                    send_at=send_at,
+                    bucket=self.get_bucket(send_at),
+                    sent_at=None,
+                )
+
+    def get_due(self, now, batch_size):
+        u"""Return locked reminders of due buckets.
+
+        Reminders are sent up to one bucket before their time. Has to be
+        called in transaction.
+
+        :param now: datetime Current time
+        :param batch_size: int Maximal number of reminders
+        """
+        return list(self.select_for_update().filter(
+            sent_at__isnull=True,
+            bucket__lte=self.get_bucket(now),
+        ).order_by('bucket', 'id')[:batch_size])
+
+
+class OfferReminder(models.Model):
+    u"""Scheduled reminder of volunteers about start of offer action."""
+
+    offer = models.OneToOneField('volontulo.Offer', related_name='reminder')
+    send_at = models.DateTimeField()
+    bucket = models.IntegerField()
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    objects = OfferReminderManager()
+
+    class Meta:
+        index_together = [
+            # reminders not sent yet of due buckets:
+            ['sent_at', 'bucket'],
+        ]
+
+    def __str__(self):
+        u"""Offer reminder model string reprezentation."""
+        return u'{}: {}'.format(self.offer_id, self.send_at)
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: saved_searches
+"""
+
+from collections import Counter
+from functools import reduce
+from itertools import groupby
+from operator import itemgetter
+from operator import or_
+
+from django.contrib.auth.models import User
+from django.db import models
+from django.db import transaction
+from django.db.models import Q
+
+from apps.volontulo.lib.search_index import offer_terms
+from apps.volontulo.lib.search_index import tokenize
+
+
+class SavedSearchManager(models.Manager):
+    u"""Manager of saved searches matched against published offers."""
+
+    # number of terms looked up in inverted index by single query:
+    TERMS_CHUNK_SIZE = 500
+
+    def create_search(self, user, query):
+        u"""Save search phrase of user with its terms.
+
+        Last word is matched as a prefix, as in offers search, unless it is
+        one of other words of phrase.
+
+        :param user: User model instance
+        :param query: string Search phrase
+        :raises ValueError: when phrase has no words
+        """
+        words = tokenize(query)
+        if not words:
+            raise ValueError(u"Search phrase has no words.")
+        terms = sorted(set(words))
+        prefixes = {words[-1]} - set(words[:-1])
+        with transaction.atomic():
+            search = self.create(
+                user=user,
+                query=query,
+                terms_count=len(terms),
+            )
+            SavedSearchTerm.objects.bulk_create(
+                SavedSearchTerm(
+                    term=term, prefix=term in prefixes, saved_search=search
+                ) for term in terms
+            )
+        return search
+
+    @staticmethod
+    def _prefixes(terms):
+        u"""Return all prefixes of terms.
+
+        :param terms: iterable of terms
+        """
+        return {
+            term[:length] for term in terms
+            for length in range(1, len(term) + 1)
+        }
+
+    def match(self, terms):
+        u"""Return (user id, saved search id) of searches having all their
+        terms among given terms, prefix terms matching beginnings of them.
+
+        Only index entries of given terms and their prefixes are read, so
+        cost depends on number of terms and their matches, not on number of
+        saved searches.
+
+        :param terms: iterable of terms, e.g. of published offer
+        """
+        terms = set(terms)
+        lookups = [(term, False) for term in sorted(terms)] + [
+            (prefix, True) for prefix in sorted(self._prefixes(terms))
+        ]
+        matched = Counter()
+        searches = {}
+        for start in range(0, len(lookups), self.TERMS_CHUNK_SIZE):
+            chunk = lookups[start:start + self.TERMS_CHUNK_SIZE]
+            postings = SavedSearchTerm.objects.filter(reduce(or_, [
+                Q(term__in=[term for term, _ in group], prefix=prefix)
+                for prefix, group in groupby(chunk, itemgetter(1))
+            ])).values_list(
+                'saved_search_id',
+                'saved_search__user_id',
+                'saved_search__terms_count',
+            )
+            for search_id, user_id, terms_count in postings:
+                matched[search_id] += 1
+                searches[search_id] = (user_id, terms_count)
+        return [
+            (user_id, search_id)
+            for search_id, (user_id, terms_count) in sorted(searches.items())
+            if matched[search_id] == terms_count
+        ]
+
+
+class SavedSearch(models.Model):
+    u"""Search phrase of user, who is alerted about matching new offers."""
+
+    user = models.ForeignKey(User, related_name='saved_searches')
+    query = models.CharField(max_length=150)
+    terms_count = models.PositiveSmallIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = SavedSearchManager()
+
+    def __str__(self):
+        u"""Saved search model string reprezentation."""
+        return self.query
+
+
+class SavedSearchTerm(models.Model):
+    u"""Entry of inverted index of saved searches: term of saved search."""
+
+    term = models.CharField(max_length=150)
+    # last word of search matches offer terms starting with it:
+    prefix = models.BooleanField(default=False)
+    saved_search = models.ForeignKey(SavedSearch, related_name='terms')
+
+    class Meta:
+        # index starting with term serves lookups of offer terms:
+        unique_together = ('term', 'saved_search')
+
+    def __str__(self):
+        u"""Saved search term model string reprezentation."""
+        return self.term
+
+
+# pylint: disable=too-few-public-methods
+class OfferAlertManager(models.Manager):
+    u"""Manager of alerts about offers matching saved searches."""
+
+    def create_for_offer(self, offer):
+        u"""Record alerts for users whose saved searches match offer.
+
+        Each user gets one alert per offer, even if several of their searches
+        match it. Returns number of created alerts.
+
+        :param offer: Offer model instance
+        """
+        users = {}
+        for user_id, search_id in SavedSearch.objects.match(
+                offer_terms(offer)):
+            users.setdefault(user_id, search_id)
+        if not users:
+            return 0
+        # offer published again does not alert users twice:
+        for user_id in self.filter(offer=offer).values_list(
+                'user_id', flat=True):
+            users.pop(user_id, None)
+        self.bulk_create(
+            OfferAlert(user_id=user_id, offer=offer, saved_search_id=search_id)
+            for user_id, search_id in users.items()
+        )
+        return len(users)
+
+
+class OfferAlert(models.Model):
+    u"""New offer matching saved search, waiting for email to user."""
+
+    user = models.ForeignKey(User, related_name='+')
+    offer = models.ForeignKey('volontulo.Offer', related_name='+')
+    saved_search = models.ForeignKey(SavedSearch, related_name='alerts')
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True, db_index=True)
+
+    objects = OfferAlertManager()
+
+    class Meta:
+        unique_together = ('user', 'offer')
+
+    def __str__(self):
+        u"""Offer alert model string reprezentation."""
+        return u'{}: {}'.format(self.user, self.offer)
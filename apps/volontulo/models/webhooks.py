@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: webhooks
+"""
+
+import datetime
+import json
+import uuid
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.db import transaction
+from django.utils import timezone
+
+from apps.volontulo.models.outbox import OutboxManager
+from apps.volontulo.models.outbox import OutboxMessage
+
+
+def generate_webhook_secret():
+    u"""Return random key of webhook signatures."""
+    return uuid.uuid4().hex + uuid.uuid4().hex
+
+
+class Webhook(models.Model):
+    u"""Endpoint of organization receiving events as signed JSON."""
+
+    EVENTS = (
+        ('application.created', u'Volunteer joined offer'),
+    )
+
+    organization = models.ForeignKey(
+        'volontulo.Organization',
+        related_name='webhooks',
+    )
+    url = models.URLField()
+    secret = models.CharField(max_length=64, default=generate_webhook_secret)
+    # number of events sent to endpoint at once:
+    max_concurrency = models.PositiveSmallIntegerField(default=2)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        u"""Webhook model string reprezentation."""
+        return self.url
+
+
+class WebhookDeliveryManager(OutboxManager):
+    u"""Outbox of events delivered by deliver_webhooks command.
+
+    Events which were not accepted by endpoint after MAX_ATTEMPTS attempts
+    are moved to dead letters.
+    """
+
+    BATCH_SIZE = 100
+    RETRY_DELAY = datetime.timedelta(seconds=30)
+    MAX_RETRY_DELAY = datetime.timedelta(hours=12)
+    MAX_ATTEMPTS = 12
+
+    def enqueue(self, organization_id, event, data, now=None):
+        u"""Add event for each active endpoint of organization.
+
+        :param organization_id: int Organization id
+        :param event: string Event name, one of Webhook.EVENTS
+        :param data: dict JSON serializable data of event
+        :param now: datetime Time of event
+        """
+        webhooks_ids = list(Webhook.objects.filter(
+            organization_id=organization_id,
+            is_active=True,
+        ).values_list('id', flat=True))
+        if not webhooks_ids:
+            return []
+        payload = json.dumps({
+            'event': event,
+            'created_at': now or timezone.now(),
+            'data': data,
+        }, cls=DjangoJSONEncoder, sort_keys=True)
+        return self.bulk_create(
+            WebhookDelivery(webhook_id=webhook_id, event=event,
+                            payload=payload)
+            for webhook_id in webhooks_ids
+        )
+
+    def mark_delivered(self, ids, now=None):
+        u"""Mark claimed events as delivered.
+
+        :param ids: list Deliveries ids
+        :param now: datetime Time of delivery
+        """
+        return self.filter(id__in=ids).update(
+            status='delivered',
+            delivered_at=now or timezone.now(),
+            attempts=models.F('attempts') + 1,
+            claimed_by=None,
+            claimed_at=None,
+        )
+
+    def mark_failed(self, delivery, error, now=None):
+        u"""Release claimed event for retry with exponential backoff or move
+        it to dead letters after last attempt.
+
+        :param delivery: WebhookDelivery instance
+        :param error: Exception raised by delivery
+        :param now: datetime Time of failed attempt
+        """
+        now = now or timezone.now()
+        attempts = delivery.attempts + 1
+        last_error = u'{}: {}'.format(type(error).__name__, error)
+        if attempts < self.MAX_ATTEMPTS:
+            return self.filter(id=delivery.id).update(
+                attempts=attempts,
+                next_attempt_at=now + self.get_retry_delay(attempts),
+                last_error=last_error,
+                claimed_by=None,
+                claimed_at=None,
+            )
+        with transaction.atomic():
+            WebhookDeadLetter.objects.create(
+                webhook_id=delivery.webhook_id,
+                event=delivery.event,
+                payload=delivery.payload,
+                attempts=attempts,
+                last_error=last_error,
+                created_at=delivery.created_at,
+            )
+            return self.filter(id=delivery.id).delete()
+
+
+class WebhookDelivery(OutboxMessage):
+    u"""Event waiting for delivery to webhook endpoint."""
+
+    STATUSES = (
+        ('queued', u'Queued'),
+        ('delivered', u'Delivered'),
+    )
+
+    webhook = models.ForeignKey(Webhook, related_name='deliveries')
+    event = models.CharField(max_length=64)
+    payload = models.TextField()
+    status = models.CharField(
+        max_length=16,
+        choices=STATUSES,
+        default='queued',
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+    delivered_at = models.DateTimeField(blank=True, null=True)
+
+    objects = WebhookDeliveryManager()
+
+    class Meta:
+        index_together = [
+            # due events looked up by WebhookDeliveryManager.claim():
+            ['status', 'next_attempt_at'],
+        ]
+
+    def __str__(self):
+        u"""Webhook delivery model string reprezentation."""
+        return self.event
+
+
+# pylint: disable=too-few-public-methods
+class WebhookDeadLetterManager(models.Manager):
+    u"""Manager of events given up by webhooks worker."""
+
+    def requeue(self, ids=None):
+        u"""Move dead letters back to deliveries, e.g. after endpoint was
+        fixed. Returns number of requeued events.
+
+        :param ids: list Dead letters ids, all of them by default
+        """
+        with transaction.atomic():
+            dead_letters = self.select_for_update()
+            if ids is not None:
+                dead_letters = dead_letters.filter(id__in=ids)
+            dead_letters = list(dead_letters)
+            WebhookDelivery.objects.bulk_create(
+                WebhookDelivery(
+                    webhook_id=dead_letter.webhook_id,
+                    event=dead_letter.event,
+                    payload=dead_letter.payload,
+                    created_at=dead_letter.created_at,
+                ) for dead_letter in dead_letters
+            )
+            self.filter(
+                id__in=[dead_letter.id for dead_letter in dead_letters]
+            ).delete()
+        return len(dead_letters)
+
+
+class WebhookDeadLetter(models.Model):
+    u"""Event which endpoint did not accept after all attempts."""
+
+    webhook = models.ForeignKey(Webhook, related_name='dead_letters')
+    event = models.CharField(max_length=64)
+    payload = models.TextField()
+    attempts = models.PositiveIntegerField()
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField()
+    failed_at = models.DateTimeField(auto_now_add=True)
+
+    objects = WebhookDeadLetterManager()
+
+    def __str__(self):
+        u"""Webhook dead letter model string reprezentation."""
+        return self.event
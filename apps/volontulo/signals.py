@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: signals
+"""
+
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+
+from apps.volontulo.lib import search_index
+from apps.volontulo.lib.geo import geocode
+from apps.volontulo.lib.cache import bump_offers_generation
+from apps.volontulo.lib.thumbnails import create_thumbnails
+from apps.volontulo.lib.thumbnails import delete_thumbnails
+from apps.volontulo.models import Offer
+from apps.volontulo.models import OfferImage
+from apps.volontulo.models import Organization
+from apps.volontulo.models import OrganizationGallery
+from apps.volontulo.models import UserGallery
+from apps.volontulo.models import UserProfile
+from apps.volontulo.utils import invalidate_administrators_emails
+
+
+@receiver(pre_save, sender=Offer)
+def offer_geocode(sender, instance, update_fields=None, **kwargs):
+    u"""Set coordinates of offer location, unless it's not saved.
+
+    Saves limited to location have to list coordinates in update_fields too.
+    """
+    # pylint: disable=unused-argument
+    if update_fields is not None and 'location' not in update_fields:
+        return
+    instance.latitude, instance.longitude = (
+        geocode(instance.location) or (None, None)
+    )
+
+
+@receiver(post_save, sender=Offer)
+def offer_saved(sender, instance, created, update_fields=None, **kwargs):
+    u"""Update offer in search index and reminders schedule and invalidate
+    cached offers data."""
+    # pylint: disable=unused-argument
+    search_index.update_offer(instance)
+    # e.g. weight updates don't change reminder time:
+    if update_fields is None or any(
+            field in update_fields for field in Offer.REMINDER_FIELDS
+    ):
+        instance.update_reminder(created)
+    search_index.offers_changed(bump_offers_generation())
+
+
+@receiver(post_delete, sender=Offer)
+def offer_deleted(sender, instance, **kwargs):
+    u"""Remove offer from search index and invalidate cached offers data."""
+    # pylint: disable=unused-argument
+    search_index.remove_offer(instance)
+    search_index.offers_changed(bump_offers_generation())
+
+
+@receiver(post_save, sender=Organization)
+def organization_saved(sender, instance, created, **kwargs):
+    u"""Reindex offers of renamed organization and invalidate cached data."""
+    # pylint: disable=unused-argument
+    if not created:
+        search_index.update_organization(instance)
+    search_index.offers_changed(bump_offers_generation())
+
+
+@receiver(post_delete, sender=Organization)
+def organization_deleted(sender, instance, **kwargs):
+    u"""Invalidate cached offers and organizations data."""
+    # pylint: disable=unused-argument
+    search_index.offers_changed(bump_offers_generation())
+
+
+def _image_name(sender, instance):
+    u"""Return storage name of image of gallery model instance."""
+    return str(instance.image if sender is UserGallery else instance.path)
+
+
+@receiver(post_save, sender=OfferImage)
+@receiver(post_save, sender=OrganizationGallery)
+@receiver(post_save, sender=UserGallery)
+def image_saved(sender, instance, created, **kwargs):
+    u"""Generate thumbnails of uploaded image, so pages showing it don't."""
+    # pylint: disable=unused-argument
+    # images are uploaded with new rows, other saves (e.g. of main image
+    # flags) don't change them:
+    if not created:
+        return
+    name = _image_name(sender, instance)
+    if name and default_storage.exists(name):
+        create_thumbnails(name)
+
+
+@receiver(post_delete, sender=OfferImage)
+@receiver(post_delete, sender=OrganizationGallery)
+@receiver(post_delete, sender=UserGallery)
+def image_deleted(sender, instance, **kwargs):
+    u"""Delete thumbnails of deleted image."""
+    # pylint: disable=unused-argument
+    name = _image_name(sender, instance)
+    if name:
+        delete_thumbnails(name)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=UserProfile)
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    u"""Invalidate cached administrators emails."""
+    # pylint: disable=unused-argument
+    # logging in only updates last_login:
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    invalidate_administrators_emails()
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=UserProfile)
+def user_deleted(sender, instance, **kwargs):
+    u"""Invalidate cached administrators emails."""
+    # pylint: disable=unused-argument
+    invalidate_administrators_emails()
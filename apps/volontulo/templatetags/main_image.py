@@ -11,16 +11,14 @@ register = template.Library()  # pylint: disable=invalid-name
 
 
 @register.filter(name='main_image')
-def main_image(images):
-    u"""Get main or first image from all offer images.
+def main_image(obj):
+    u"""Get path of main image of an offer or an organization.
 
-    :param images: list Offer images
-    """
-    main_img = [str(i) for i in images if i.is_main]
-    if main_img:
-        return str(main_img[0])
-
-    if not main_img and images:
-        return images[0]
+    Main image is kept as a foreign key on the object, so it should be fetched
+    with select_related('main_image') to avoid additional queries.
 
-    return ''
+    :param obj: Offer or Organization model instance
+    """
+    if obj is None or obj.main_image is None:
+        return ''
+    return str(obj.main_image)
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: thumbnails
+"""
+
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html
+
+from apps.volontulo.lib.thumbnails import get_thumbnails
+
+
+register = template.Library()  # pylint: disable=invalid-name
+
+
+def _srcset(thumbnails, webp=False):
+    u"""Join thumbnails URLs with their widths.
+
+    :param thumbnails: list Thumbnails returned by get_thumbnails
+    :param webp: Boolean flag selecting WebP variants
+    """
+    return u', '.join(
+        u'{} {}w'.format(webp_url if webp else url, width)
+        for width, url, webp_url in thumbnails
+    )
+
+
+@register.filter(name='thumbnail')
+def thumbnail(image, width):
+    u"""Get URL of the smallest thumbnail of image at least that wide.
+
+    Original image is used when there is no such thumbnail.
+
+    :param image: string or ImageFieldFile Image path in media storage
+    :param width: int Width of image displayed in page
+    """
+    name = str(image or '')
+    for thumbnail_width, url, _ in get_thumbnails(name) if name else []:
+        if thumbnail_width >= int(width):
+            return url
+    return default_storage.url(name)
+
+
+@register.simple_tag
+def srcset(image, webp=False):
+    u"""Get srcset attribute value listing thumbnails of image.
+
+    :param image: string or ImageFieldFile Image path in media storage
+    :param webp: Boolean flag selecting WebP variants
+    """
+    name = str(image or '')
+    if not name:
+        return ''
+    thumbnails = get_thumbnails(name)
+    if webp and not all(webp_url for _, _, webp_url in thumbnails):
+        return ''
+    return _srcset(thumbnails, webp)
+
+
+@register.simple_tag
+def responsive_image(image, width, sizes='100vw', alt='', css_class=''):
+    u"""Render picture element choosing thumbnail by browser's viewport.
+
+    WebP thumbnails are offered to browsers supporting them.
+
+    :param image: string or ImageFieldFile Image path in media storage
+    :param width: int Width of fallback thumbnail
+    :param sizes: string Sizes attribute of picture sources
+    :param alt: string Alternative text
+    :param css_class: string Class of img element
+    """
+    name = str(image or '')
+    thumbnails = get_thumbnails(name) if name else []
+    if not thumbnails:
+        return format_html(
+            u'<img src="{}" alt="{}" class="{}" />',
+            default_storage.url(name), alt, css_class,
+        )
+    webp = u''
+    if all(webp_url for _, _, webp_url in thumbnails):
+        webp = format_html(
+            u'<source type="image/webp" srcset="{}" sizes="{}" />',
+            _srcset(thumbnails, webp=True), sizes,
+        )
+    return format_html(
+        u'<picture>{}<img src="{}" srcset="{}" sizes="{}" alt="{}" '
+        u'class="{}" /></picture>',
+        webp, thumbnail(name, width), _srcset(thumbnails), sizes, alt,
+        css_class,
+    )
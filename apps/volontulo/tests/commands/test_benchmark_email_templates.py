@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: test_benchmark_email_templates
+"""
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.volontulo.lib.email import SUBJECTS
+
+
+class TestBenchmarkEmailTemplates(TestCase):
+    u"""Tests for benchmark_email_templates command."""
+
+    def test__benchmark_email_templates(self):
+        u"""Times of both ways of rendering are printed for every email."""
+        for name in SUBJECTS:
+            out = StringIO()
+            call_command(
+                'benchmark_email_templates',
+                messages=2,
+                template=name,
+                stdout=out,
+            )
+
+            output = out.getvalue()
+            self.assertIn(u'per message: ', output)
+            self.assertIn(u'compiled: ', output)
+            self.assertIn(u'speedup: ', output)
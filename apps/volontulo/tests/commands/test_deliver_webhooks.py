@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: test_deliver_webhooks
+"""
+import json
+import socketserver
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler
+from http.server import HTTPServer
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.volontulo.lib.webhooks import deliver_batch
+from apps.volontulo.lib.webhooks import sign
+from apps.volontulo.models import Organization
+from apps.volontulo.models import Webhook
+from apps.volontulo.models import WebhookDeadLetter
+from apps.volontulo.models import WebhookDelivery
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    u"""Endpoint recording posted events."""
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        u"""Record event and answer with status configured for path."""
+        server = self.server
+        with server.lock:
+            server.in_flight[self.path] += 1
+            server.max_in_flight[self.path] = max(
+                server.max_in_flight[self.path], server.in_flight[self.path]
+            )
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        time.sleep(server.delay)
+        with server.lock:
+            server.in_flight[self.path] -= 1
+            server.events.append((self.path, dict(self.headers), body))
+        self.send_response(server.statuses.get(self.path, 200))
+        self.end_headers()
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        u"""Do not print requests."""
+
+
+class WebhookServer(socketserver.ThreadingMixIn, HTTPServer):
+    u"""Local HTTP server standing in for organizations endpoints."""
+    daemon_threads = True
+
+    def __init__(self):
+        u"""Listen on free local port."""
+        HTTPServer.__init__(self, ('127.0.0.1', 0), WebhookHandler)
+        self.lock = threading.Lock()
+        self.events = []
+        self.statuses = {}
+        self.delay = 0
+        self.in_flight = Counter()
+        self.max_in_flight = Counter()
+
+    def url(self, path):
+        u"""Return URL of endpoint."""
+        return 'http://127.0.0.1:{}{}'.format(self.server_address[1], path)
+
+
+class TestDeliverWebhooks(TestCase):
+    u"""Tests for delivery of events to organizations webhooks."""
+
+    @classmethod
+    def setUpTestData(cls):
+        u"""Set up organization."""
+        cls.organization = Organization.objects.create(name=u'Schronisko')
+
+    def setUp(self):
+        u"""Start local endpoints."""
+        self.server = WebhookServer()
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    def tearDown(self):
+        u"""Stop local endpoints."""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _webhook(self, path, **kwargs):
+        u"""Create webhook of organization posting to local endpoint."""
+        return Webhook.objects.create(
+            organization=self.organization,
+            url=self.server.url(path),
+            **kwargs
+        )
+
+    def _enqueue(self, count=1):
+        u"""Add events for organization endpoints."""
+        for i in range(count):
+            WebhookDelivery.objects.enqueue(
+                self.organization.id,
+                'application.created',
+                {'volunteer': {'email': u'volunteer{}@example.com'.format(i)}},
+            )
+
+    def test__deliver(self):
+        u"""Events are posted with signature and marked as delivered."""
+        webhook = self._webhook('/crm')
+        self._webhook('/disabled', is_active=False)
+        self._enqueue()
+
+        stdout = StringIO()
+        call_command('deliver_webhooks', stdout=stdout)
+
+        self.assertIn(u'delivered: 1', stdout.getvalue())
+        (path, headers, body), = self.server.events
+        self.assertEqual(path, '/crm')
+        self.assertEqual(headers['X-Volontulo-Event'], 'application.created')
+        self.assertEqual(
+            headers['X-Volontulo-Signature'],
+            'sha256=' + sign(webhook.secret, body),
+        )
+        payload = json.loads(body.decode('utf-8'))
+        self.assertEqual(payload['event'], 'application.created')
+        self.assertEqual(
+            payload['data']['volunteer']['email'], u'volunteer0@example.com'
+        )
+        delivery = WebhookDelivery.objects.get()
+        self.assertEqual(headers['X-Volontulo-Delivery'], str(delivery.id))
+        self.assertEqual(delivery.status, 'delivered')
+        self.assertEqual(deliver_batch(), (0, 0))
+
+    def test__retry_and_dead_letter(self):
+        u"""Rejected events are retried with backoff and then given up."""
+        self._webhook('/broken')
+        self.server.statuses['/broken'] = 500
+        self._enqueue()
+
+        self.assertEqual(deliver_batch(), (0, 1))
+        delivery = WebhookDelivery.objects.get()
+        self.assertEqual(delivery.attempts, 1)
+        self.assertIn(u'status 500', delivery.last_error)
+        self.assertGreater(delivery.next_attempt_at, timezone.now())
+        # retry is not due yet:
+        self.assertEqual(deliver_batch(), (0, 0))
+
+        WebhookDelivery.objects.update(
+            attempts=WebhookDelivery.objects.MAX_ATTEMPTS - 1,
+            next_attempt_at=timezone.now(),
+        )
+        self.assertEqual(deliver_batch(), (0, 1))
+        self.assertFalse(WebhookDelivery.objects.exists())
+        dead_letter = WebhookDeadLetter.objects.get()
+        self.assertEqual(
+            dead_letter.attempts, WebhookDelivery.objects.MAX_ATTEMPTS
+        )
+
+        self.server.statuses['/broken'] = 204
+        stdout = StringIO()
+        call_command('deliver_webhooks', '--requeue-dead-letters',
+                     stdout=stdout)
+        self.assertIn(u'requeued: 1', stdout.getvalue())
+        self.assertIn(u'delivered: 1', stdout.getvalue())
+        self.assertFalse(WebhookDeadLetter.objects.exists())
+
+    def test__concurrency_limits(self):
+        u"""Endpoints never get more events at once than their limits."""
+        self._webhook('/slow', max_concurrency=1)
+        self._webhook('/fast', max_concurrency=3)
+        self.server.delay = 0.05
+        self._enqueue(6)
+
+        self.assertEqual(deliver_batch(threads=8), (12, 0))
+
+        self.assertEqual(self.server.max_in_flight['/slow'], 1)
+        self.assertLessEqual(self.server.max_in_flight['/fast'], 3)
+        self.assertGreater(self.server.max_in_flight['/fast'], 1)
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: test_explain_offers_queries
+"""
+import importlib
+import unittest
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from apps.volontulo.models import Offer
+
+INDEXES = importlib.import_module(
+    'apps.volontulo.migrations.0009_offer_status_indexes'
+).INDEXES
+
+
+class TestExplainOffersQueries(TestCase):
+    u"""Tests for explain_offers_queries command."""
+
+    def test__explain_offers_queries(self):
+        u"""Query plans are printed and generated offers are rolled back."""
+        out = StringIO()
+        call_command('explain_offers_queries', offers=50, stdout=out)
+
+        output = out.getvalue()
+        for name in ('get_active', 'get_weightened', 'get_for_administrator',
+                     'get_archived', 'all'):
+            self.assertIn(u'== {}\n'.format(name), output)
+        self.assertEqual(Offer.objects.count(), 0)
+
+    @unittest.skipUnless(
+        connection.vendor == 'postgresql',
+        u"Query plans are checked only on PostgreSQL.",
+    )
+    def test__partial_indexes_are_used(self):
+        u"""Offers queries are planned with indexes matching their filters."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT indexname FROM pg_indexes "
+                "WHERE tablename = 'volontulo_offer'"
+            )
+            indexes = {row[0] for row in cursor.fetchall()}
+        self.assertLessEqual({name for name, _ in INDEXES}, indexes)
+
+        out = StringIO()
+        call_command('explain_offers_queries', offers=20000, stdout=out)
+
+        plans = dict(
+            section.split(u'\n', 1)
+            for section in out.getvalue().split(u'== ')[1:]
+        )
+        for query, indexes in (
+                # planner may also take published offers in weight order and
+                # filter them until page is full:
+                ('get_active', ('volontulo_offer_active',
+                                'volontulo_offer_published_weight')),
+                ('get_weightened', ('volontulo_offer_published_weight',)),
+                ('get_for_administrator', ('volontulo_offer_unpublished',)),
+                ('get_archived', ('volontulo_offer_archived',)),
+                ('all', ('volontulo_offer_weight_id',)),
+        ):
+            self.assertNotIn(u'Seq Scan', plans[query])
+            self.assertTrue(
+                any(index in plans[query] for index in indexes),
+                plans[query],
+            )
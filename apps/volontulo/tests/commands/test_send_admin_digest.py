@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: test_send_admin_digest
+"""
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import RequestFactory
+from django.test import TestCase
+
+from apps.volontulo.lib import email
+from apps.volontulo.models import AdminNotification
+from apps.volontulo.models import QueuedEmail
+from apps.volontulo.tests import common
+from apps.volontulo.utils import invalidate_administrators_emails
+
+
+class TestSendAdminDigest(TestCase):
+    u"""Tests for digests of administrators notifications."""
+
+    @classmethod
+    def setUpTestData(cls):
+        u"""Set up administrators."""
+        common.initialize_administrator(
+            username=u'admin1@example.com',
+            email=u'admin1@example.com',
+        )
+        common.initialize_administrator(
+            username=u'admin2@example.com',
+            email=u'admin2@example.com',
+        )
+
+    def setUp(self):
+        u"""Set up each test."""
+        invalidate_administrators_emails()
+        self.request = RequestFactory().get('/')
+
+    def _call(self):
+        u"""Run command and return its output."""
+        stdout = StringIO()
+        call_command('send_admin_digest', stdout=stdout)
+        return stdout.getvalue()
+
+    def test__digest(self):
+        u"""Notifications are sent in one digest to each administrator."""
+        for i in range(3):
+            email.send_mail(
+                self.request,
+                'registration',
+                [u'volunteer{}@example.com'.format(i)],
+                {'uuid': u'uuid{}'.format(i)},
+            )
+        self.assertFalse(QueuedEmail.objects.exclude(bcc=u'').exists())
+        self.assertEqual(AdminNotification.objects.count(), 3)
+
+        self.assertIn(u'notifications: 3', self._call())
+
+        digests = QueuedEmail.objects.filter(
+            subject=email.SUBJECTS['admin_digest']
+        ).order_by('recipients')
+        self.assertEqual(
+            [digest.recipients for digest in digests],
+            [u'admin1@example.com', u'admin2@example.com'],
+        )
+        body = digests[0].body
+        self.assertIn(u'== Rejestracja na Volontulo (3)', body)
+        self.assertIn(u'do: volunteer2@example.com', body)
+        self.assertIn(u'http://testserver/activate/uuid2', body)
+        # layout of notified emails is not repeated:
+        self.assertEqual(body.count(u'Z pozdrowieniami'), 1)
+
+        self.assertIn(u'notifications: 0', self._call())
+        self.assertEqual(digests.count(), 2)
+
+    def test__bcc(self):
+        u"""Emails configured so still have administrators in BCC."""
+        email.send_mail(
+            self.request,
+            'offer_creation',
+            [u'organization@example.com'],
+            {'offer': {'id': 1, 'title': u'Oferta'}},
+        )
+
+        queued = QueuedEmail.objects.get()
+        self.assertEqual(queued.bcc, u'admin1@example.com,admin2@example.com')
+        self.assertFalse(AdminNotification.objects.exists())
+
+    def test__limit(self):
+        u"""Only limited number of notifications is listed in digest."""
+        AdminNotification.objects.bulk_create(
+            AdminNotification(
+                templates_name='registration',
+                subject=u'Rejestracja na Volontulo',
+                recipients=u'volunteer@example.com',
+                body=u'Dziękujemy za rejestrację.',
+            ) for _ in range(email.DIGEST_MAX_NOTIFICATIONS + 5)
+        )
+
+        email.send_admin_digest('https', 'volontuloapp.org')
+
+        body = QueuedEmail.objects.first().body
+        self.assertEqual(
+            body.count(u'Dziękujemy za rejestrację.'),
+            email.DIGEST_MAX_NOTIFICATIONS,
+        )
+        self.assertIn(u'... i 5 więcej', body)
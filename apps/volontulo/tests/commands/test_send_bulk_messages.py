@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: test_send_bulk_messages
+"""
+import datetime
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.volontulo.lib.bulk_messages import ORGANIZATION_RATE
+from apps.volontulo.lib.bulk_messages import fan_out
+from apps.volontulo.models import BulkMessage
+from apps.volontulo.models import Offer
+from apps.volontulo.models import Organization
+from apps.volontulo.models import QueuedEmail
+
+BASE_CONTEXT = {'protocol': 'https', 'domain': 'volontuloapp.org'}
+
+
+class TestSendBulkMessages(TestCase):
+    u"""Tests for messages from organizations to volunteers."""
+
+    @classmethod
+    def setUpTestData(cls):
+        u"""Set up offer with volunteers."""
+        cls.organization = Organization.objects.create(name=u'Schronisko')
+        cls.sender = User.objects.create_user(
+            u'organization@example.com',
+            u'organization@example.com',
+            u'organization',
+        )
+        cls.offer = Offer.objects.create(
+            title=u'Spacery z psami',
+            description=u'',
+            requirements=u'',
+            time_commitment=u'',
+            benefits=u'',
+            location=u'Kraków',
+            time_period=u'',
+            organization=cls.organization,
+        )
+        for i in range(6):
+            cls.offer.volunteers.add(User.objects.create_user(
+                u'volunteer{}@example.com'.format(i),
+                u'volunteer{}@example.com'.format(i),
+                u'volunteer',
+            ))
+        User.objects.filter(username=u'volunteer5@example.com').update(
+            is_active=False
+        )
+
+    def _message(self, subject=u'Zbiórka'):
+        u"""Create bulk message to volunteers of offer."""
+        return BulkMessage.objects.create(
+            offer=self.offer,
+            organization=self.organization,
+            sender=self.sender,
+            subject=subject,
+            message=u'Spotykamy się w sobotę o 9:00.',
+        )
+
+    def test__send(self):
+        u"""Active volunteers get message, released chunk by chunk."""
+        message = self._message()
+
+        stdout = StringIO()
+        call_command('send_bulk_messages', '--chunk-size', '2',
+                     stdout=stdout)
+
+        self.assertIn(u'message {}: 5 emails'.format(message.id),
+                      stdout.getvalue())
+        emails = list(QueuedEmail.objects.order_by('id'))
+        self.assertEqual(
+            [email.recipients for email in emails],
+            [u'volunteer{}@example.com'.format(i) for i in range(5)],
+        )
+        self.assertEqual(emails[0].subject, u'Zbiórka')
+        self.assertIn(u'Spotykamy się w sobotę o 9:00.', emails[0].body)
+        self.assertIn(u'organization@example.com', emails[0].body)
+        interval = datetime.timedelta(minutes=2 / ORGANIZATION_RATE)
+        self.assertEqual(emails[1].next_attempt_at, emails[0].next_attempt_at)
+        self.assertEqual(
+            emails[2].next_attempt_at - emails[0].next_attempt_at, interval
+        )
+        self.assertEqual(
+            emails[4].next_attempt_at - emails[0].next_attempt_at,
+            2 * interval,
+        )
+        message = BulkMessage.objects.get(id=message.id)
+        self.assertEqual(message.status, 'sent')
+        self.assertEqual(message.emails_count, 5)
+        # message is sent once:
+        stdout = StringIO()
+        call_command('send_bulk_messages', stdout=stdout)
+        self.assertEqual(stdout.getvalue(), u'')
+
+    def test__throttling(self):
+        u"""Emails of next message of organization are released after
+        emails of previous one."""
+        now = timezone.now()
+        first = self._message()
+        second = self._message()
+
+        self.assertEqual(fan_out(first.id, BASE_CONTEXT, now, 5), 5)
+        self.assertEqual(fan_out(second.id, BASE_CONTEXT, now, 5), 5)
+
+        first = BulkMessage.objects.get(id=first.id)
+        self.assertEqual(
+            QueuedEmail.objects.order_by('-id')[0].next_attempt_at,
+            first.scheduled_until,
+        )
+
+    def test__resume(self):
+        u"""Sending is resumed after last queued volunteer."""
+        message = self._message()
+        BulkMessage.objects.filter(id=message.id).update(
+            last_user_id=self.offer.volunteers.order_by('id')[2].id,
+            emails_count=3,
+        )
+
+        self.assertEqual(fan_out(message.id, BASE_CONTEXT), 2)
+        self.assertEqual(
+            BulkMessage.objects.get(id=message.id).emails_count, 5
+        )
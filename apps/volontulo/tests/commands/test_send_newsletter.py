@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: test_send_newsletter
+"""
+import datetime
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.volontulo.lib.email import SUBJECTS
+from apps.volontulo.lib.newsletter import send_newsletter
+from apps.volontulo.models import Offer
+from apps.volontulo.models import Organization
+from apps.volontulo.models import QueuedEmail
+from apps.volontulo.models import UserProfile
+
+
+class TestSendNewsletter(TestCase):
+    u"""Tests for newsletter with new offers."""
+
+    @classmethod
+    def setUpTestData(cls):
+        u"""Set up subscribers and offers."""
+        cls.organization = Organization.objects.create(name=u'Schronisko')
+        for i in range(5):
+            user = User.objects.create_user(
+                u'subscriber{}@example.com'.format(i),
+                u'subscriber{}@example.com'.format(i),
+                u'subscriber',
+            )
+            UserProfile.objects.create(user=user, newsletter=True)
+        user = User.objects.create_user(
+            u'volunteer@example.com', u'volunteer@example.com', u'volunteer'
+        )
+        UserProfile.objects.create(user=user)
+
+    def _create_offer(self, title, published_at):
+        u"""Create active offer published at given time."""
+        return Offer.objects.create(
+            title=title,
+            description=u'',
+            requirements=u'',
+            time_commitment=u'',
+            benefits=u'',
+            location=u'Kraków',
+            time_period=u'',
+            organization=self.organization,
+            offer_status='published',
+            recruitment_status='open',
+            action_status='ongoing',
+            published_at=published_at,
+        )
+
+    def _call(self, *args):
+        u"""Run command and return its output."""
+        stdout = StringIO()
+        call_command('send_newsletter', *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def _newsletters(self):
+        u"""Return queued newsletters ordered by recipient."""
+        return QueuedEmail.objects.filter(
+            subject=SUBJECTS['newsletter']
+        ).order_by('recipients')
+
+    def test__send(self):
+        u"""Subscribers get offers published since previous newsletter."""
+        now = timezone.now()
+        self._create_offer(u'Nowa oferta', now - datetime.timedelta(days=1))
+        self._create_offer(u'Stara oferta', now - datetime.timedelta(days=30))
+        UserProfile.objects.filter(
+            user__username=u'subscriber4@example.com'
+        ).update(newsletter_sent_at=now - datetime.timedelta(hours=1))
+
+        output = self._call('--chunk-size', '2')
+
+        self.assertIn(u'total subscribers: 4, newsletters: 4', output)
+        newsletters = self._newsletters()
+        self.assertEqual(
+            [newsletter.recipients for newsletter in newsletters],
+            [u'subscriber{}@example.com'.format(i) for i in range(4)],
+        )
+        profile = UserProfile.objects.get(
+            user__username=u'subscriber0@example.com'
+        )
+        body = newsletters[0].body
+        self.assertIn(u'Nowa oferta (Schronisko, Kraków)', body)
+        self.assertNotIn(u'Stara oferta', body)
+        self.assertIn(
+            u'https://volontuloapp.org/newsletter/unsubscribe/{}'.format(
+                profile.uuid
+            ),
+            body,
+        )
+        self.assertIsNotNone(profile.newsletter_sent_at)
+
+    def test__resume(self):
+        u"""Subscribers who got newsletter are skipped by next sending."""
+        self._create_offer(
+            u'Nowa oferta', timezone.now() - datetime.timedelta(days=1)
+        )
+        self.assertIn(u'total subscribers: 5, newsletters: 5', self._call())
+
+        self.assertIn(u'total subscribers: 0, newsletters: 0', self._call())
+        self.assertEqual(self._newsletters().count(), 5)
+
+    def test__no_offers(self):
+        u"""Subscribers without new offers are only marked."""
+        output = self._call()
+
+        self.assertIn(u'total subscribers: 5, newsletters: 0', output)
+        self.assertFalse(UserProfile.objects.filter(
+            newsletter=True, newsletter_sent_at__isnull=True
+        ).exists())
+
+    def test__processes(self):
+        u"""Newsletters are rendered by pool of processes in chunks."""
+        self._create_offer(
+            u'Nowa oferta', timezone.now() - datetime.timedelta(days=1)
+        )
+
+        chunks = list(send_newsletter(
+            {'protocol': 'https', 'domain': 'volontuloapp.org'},
+            chunk_size=2,
+            processes=2,
+        ))
+
+        self.assertEqual(chunks, [(2, 2), (2, 2), (1, 1)])
+        self.assertEqual(
+            sum(u'Nowa oferta' in newsletter.body
+                for newsletter in self._newsletters()),
+            5,
+        )
+
+    def test__publish(self):
+        u"""Publishing offer records time of publication."""
+        offer = self._create_offer(u'Oferta', None)
+        offer.offer_status = 'unpublished'
+        offer.save()
+
+        offer.publish()
+
+        self.assertIsNotNone(Offer.objects.get(id=offer.id).published_at)
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: test_send_offer_alerts
+"""
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.volontulo.lib.email import SUBJECTS
+from apps.volontulo.models import Offer
+from apps.volontulo.models import OfferAlert
+from apps.volontulo.models import Organization
+from apps.volontulo.models import QueuedEmail
+from apps.volontulo.models import SavedSearch
+
+
+class TestSendOfferAlerts(TestCase):
+    u"""Tests for alerts about offers matching saved searches."""
+
+    @classmethod
+    def setUpTestData(cls):
+        u"""Set up users with saved searches."""
+        cls.organization = Organization.objects.create(
+            name=u'Schronisko Azyl'
+        )
+        cls.users = [
+            User.objects.create_user(
+                u'volunteer{}@example.com'.format(i),
+                u'volunteer{}@example.com'.format(i),
+                u'volunteer',
+            ) for i in range(3)
+        ]
+        SavedSearch.objects.create_search(cls.users[0], u'Warszawa psy')
+        SavedSearch.objects.create_search(cls.users[0], u'Schronisko')
+        SavedSearch.objects.create_search(cls.users[1], u'WARSZAWA')
+        SavedSearch.objects.create_search(cls.users[2], u'Kraków psy')
+
+    def _create_offer(self, title, location, offer_status='unpublished'):
+        u"""Create offer."""
+        return Offer.objects.create(
+            title=title,
+            description=u'',
+            requirements=u'',
+            time_commitment=u'',
+            benefits=u'',
+            location=location,
+            time_period=u'',
+            organization=self.organization,
+            offer_status=offer_status,
+            recruitment_status='open',
+            action_status='ongoing',
+        )
+
+    def _call(self, *args):
+        u"""Run command and return its output."""
+        stdout = StringIO()
+        call_command('send_offer_alerts', *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test__create_search(self):
+        u"""Terms of saved search are folded and deduplicated."""
+        search = SavedSearch.objects.create_search(
+            self.users[1], u'Łódź, łódź zwierzęta'
+        )
+
+        self.assertEqual(search.terms_count, 2)
+        self.assertEqual(
+            sorted(search.terms.values_list('term', 'prefix')),
+            [(u'lodz', False), (u'zwierzeta', True)],
+        )
+        # last word repeated earlier has to match exactly:
+        search = SavedSearch.objects.create_search(self.users[1], u'psy, psy')
+        self.assertEqual(
+            list(search.terms.values_list('term', 'prefix')),
+            [(u'psy', False)],
+        )
+        with self.assertRaises(ValueError):
+            SavedSearch.objects.create_search(self.users[1], u' ,! ')
+
+    def test__match(self):
+        u"""Searches match only when all their terms are given."""
+        matches = SavedSearch.objects.match([u'warszawa', u'psy', u'kot'])
+
+        self.assertEqual(
+            sorted(user_id for user_id, _ in matches),
+            [self.users[0].id, self.users[1].id],
+        )
+        with self.assertNumQueries(1):
+            SavedSearch.objects.match([u'psy'])
+
+    def test__match_prefix(self):
+        u"""Last word of search matches beginnings of terms, as in offers
+        search."""
+        search = SavedSearch.objects.create_search(self.users[2], u'prog')
+        SavedSearch.objects.create_search(self.users[2], u'prog java')
+
+        self.assertEqual(
+            SavedSearch.objects.match([u'programowanie', u'java']),
+            [(self.users[2].id, search.id)],
+        )
+        self.assertEqual(
+            SavedSearch.objects.match([u'prog']),
+            [(self.users[2].id, search.id)],
+        )
+        self.assertEqual(SavedSearch.objects.match([u'pro']), [])
+
+    def test__publish(self):
+        u"""Publishing offer records one alert for each matching user."""
+        offer = self._create_offer(u'Spacery z psami, psy', u'Warszawa')
+
+        offer.publish()
+
+        self.assertEqual(
+            sorted(OfferAlert.objects.filter(
+                offer=offer
+            ).values_list('user_id', flat=True)),
+            [self.users[0].id, self.users[1].id],
+        )
+        # offer published again does not create alerts:
+        offer.unpublish()
+        offer.change_status('published')
+        self.assertEqual(OfferAlert.objects.filter(offer=offer).count(), 2)
+
+    def test__send(self):
+        u"""Users get one email with all offers matched since previous one."""
+        self._create_offer(u'Spacery z psami, psy', u'Warszawa').publish()
+        self._create_offer(u'Sprzątanie', u'Gdańsk').publish()
+        inactive = self._create_offer(u'Karmienie psów, psy', u'Kraków')
+        inactive.publish()
+        inactive.close_offer()
+
+        output = self._call('--batch-size', '1')
+
+        self.assertIn(u'alerts: 5, emails: 2', output)
+        emails = QueuedEmail.objects.filter(
+            subject=SUBJECTS['offer_alert']
+        ).order_by('recipients')
+        self.assertEqual(
+            [email.recipients for email in emails],
+            [u'volunteer0@example.com', u'volunteer1@example.com'],
+        )
+        body = emails[0].body
+        self.assertIn(
+            u'Spacery z psami, psy (Schronisko Azyl, Warszawa)', body
+        )
+        self.assertIn(u'Sprzątanie (Schronisko Azyl, Gdańsk)', body)
+        self.assertIn(u'pasuje do: Schronisko', body)
+        self.assertIn(u'https://volontuloapp.org/offers/saved-searches', body)
+        self.assertNotIn(u'Sprzątanie', emails[1].body)
+        self.assertFalse(
+            OfferAlert.objects.filter(sent_at__isnull=True).exists()
+        )
+        self.assertIn(u'alerts: 0, emails: 0', self._call())
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: test_send_offer_reminders
+"""
+import datetime
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.volontulo.lib.email import SUBJECTS
+from apps.volontulo.lib.reminders import send_offer_reminders
+from apps.volontulo.models import Offer
+from apps.volontulo.models import OfferReminder
+from apps.volontulo.models import Organization
+from apps.volontulo.models import QueuedEmail
+
+BASE_CONTEXT = {'protocol': 'https', 'domain': 'volontuloapp.org'}
+
+
+class TestSendOfferReminders(TestCase):
+    u"""Tests for reminders of volunteers before action starts."""
+
+    @classmethod
+    def setUpTestData(cls):
+        u"""Set up organization and volunteers."""
+        cls.organization = Organization.objects.create(name=u'Schronisko')
+        cls.volunteers = [
+            User.objects.create_user(
+                u'volunteer{}@example.com'.format(i),
+                u'volunteer{}@example.com'.format(i),
+                u'volunteer',
+            ) for i in range(3)
+        ]
+        cls.volunteers[2].is_active = False
+        cls.volunteers[2].save()
+
+    def _create_offer(self, title, start, offer_status='published'):
+        u"""Create offer starting at given time joined by volunteers."""
+        offer = Offer.objects.create(
+            title=title,
+            description=u'',
+            requirements=u'',
+            time_commitment=u'',
+            benefits=u'',
+            location=u'Kraków',
+            time_period=u'',
+            organization=self.organization,
+            offer_status=offer_status,
+            recruitment_status='open',
+            action_status='future',
+            action_start_date=start,
+        )
+        offer.volunteers.add(*self.volunteers)
+        return offer
+
+    def _reminders(self):
+        u"""Return queued reminders ordered by recipient."""
+        return QueuedEmail.objects.filter(
+            subject=SUBJECTS['offer_reminder']
+        ).order_by('recipients')
+
+    def test__schedule(self):
+        u"""Reminder is scheduled day before start of published offer."""
+        start = timezone.now() + datetime.timedelta(days=3)
+        offer = self._create_offer(u'Spacery z psami', start)
+
+        reminder = OfferReminder.objects.get(offer=offer)
+        self.assertEqual(reminder.send_at, start - datetime.timedelta(days=1))
+        self.assertEqual(
+            reminder.bucket,
+            OfferReminder.objects.get_bucket(reminder.send_at),
+        )
+
+        offer = Offer.objects.get(id=offer.id)
+        offer.action_start_date = start + datetime.timedelta(days=2)
+        offer.save()
+        self.assertEqual(
+            OfferReminder.objects.get(offer=offer).send_at,
+            start + datetime.timedelta(days=1),
+        )
+
+        offer.unpublish()
+        self.assertFalse(OfferReminder.objects.exists())
+
+    def test__save_without_changes(self):
+        u"""Saving offer without changing its start only reads schedule."""
+        self._create_offer(
+            u'Spacery z psami', timezone.now() + datetime.timedelta(days=3)
+        )
+        offer = Offer.objects.get(title=u'Spacery z psami')
+        offer.title = u'Spacery z psami po parku'
+
+        with self.assertNumQueries(2):
+            offer.save()
+        # other fields than start and status don't affect schedule:
+        offer.weight = 10
+        with self.assertNumQueries(1):
+            offer.save(update_fields=['weight'])
+
+    def test__create_without_reminder(self):
+        u"""Creating offer which has no reminder does not touch schedule."""
+        # offer and its volunteers are inserted only:
+        with self.assertNumQueries(3):
+            self._create_offer(
+                u'Spacery z psami',
+                timezone.now() + datetime.timedelta(days=3),
+                offer_status='unpublished',
+            )
+
+    def test__send(self):
+        u"""Active volunteers of offers from due buckets are reminded."""
+        now = timezone.now()
+        self._create_offer(u'Spacery z psami', now + datetime.timedelta(
+            hours=20
+        ))
+        self._create_offer(u'Sprzątanie lasu', now + datetime.timedelta(
+            days=3
+        ))
+        self._create_offer(
+            u'Pomoc w bibliotece',
+            now + datetime.timedelta(hours=10),
+            offer_status='unpublished',
+        )
+
+        stdout = StringIO()
+        call_command('send_offer_reminders', stdout=stdout)
+
+        self.assertIn(u'reminders: 1, emails: 2', stdout.getvalue())
+        reminders = self._reminders()
+        self.assertEqual(
+            [reminder.recipients for reminder in reminders],
+            [u'volunteer0@example.com', u'volunteer1@example.com'],
+        )
+        self.assertIn(
+            u'Spacery z psami (Schronisko, Kraków)', reminders[0].body
+        )
+        # reminder is sent once:
+        self.assertEqual(
+            list(send_offer_reminders(BASE_CONTEXT, now=now)), []
+        )
+        # next offer is due two days later:
+        self.assertEqual(
+            list(send_offer_reminders(
+                BASE_CONTEXT, now=now + datetime.timedelta(days=2)
+            )),
+            [(1, 2)],
+        )
+
+    def test__batches(self):
+        u"""Due reminders are sent in batches."""
+        now = timezone.now()
+        for i in range(3):
+            self._create_offer(
+                u'Oferta {}'.format(i), now + datetime.timedelta(hours=2)
+            )
+
+        self.assertEqual(
+            list(send_offer_reminders(BASE_CONTEXT, batch_size=2)),
+            [(2, 4), (1, 2)],
+        )
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: test_send_queued_mail
+"""
+import datetime
+import smtplib
+from io import StringIO
+
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import RequestFactory
+from django.test import TestCase
+from django.test import override_settings
+from django.utils import timezone
+
+from apps.volontulo.lib import email
+from apps.volontulo.models import QueuedEmail
+
+BACKENDS_MODULE = 'apps.volontulo.tests.commands.test_send_queued_mail'
+
+
+class CountingBackend(EmailBackend):
+    u"""Email backend counting opened connections."""
+    opened = 0
+
+    def open(self):
+        u"""Count opened connection."""
+        CountingBackend.opened += 1
+
+
+class FailingBackend(BaseEmailBackend):
+    u"""Email backend unable to send any email."""
+
+    def send_messages(self, email_messages):
+        u"""Raise SMTP error."""
+        raise smtplib.SMTPServerDisconnected(u'Connection unexpectedly closed')
+
+
+class RefusingBackend(EmailBackend):
+    u"""Email backend refusing emails to "refused@example.com"."""
+
+    def send_messages(self, messages):
+        u"""Refuse emails to unknown recipient."""
+        for message in messages:
+            if u'refused@example.com' in message.to:
+                raise smtplib.SMTPRecipientsRefused({
+                    u'refused@example.com': (550, b'No such user'),
+                })
+        return super(RefusingBackend, self).send_messages(messages)
+
+
+class BrokenBackend(EmailBackend):
+    u"""Email backend crashing on emails to "broken@example.com"."""
+
+    def send_messages(self, messages):
+        u"""Raise unexpected error for broken recipient."""
+        for message in messages:
+            if u'broken@example.com' in message.to:
+                raise RuntimeError(u'Unexpected error')
+        return super(BrokenBackend, self).send_messages(messages)
+
+
+class TestSendQueuedMail(TestCase):
+    u"""Tests for send_queued_mail command."""
+
+    def _enqueue(self, count=1):
+        u"""Add emails to outbox."""
+        return [QueuedEmail.objects.enqueue(
+            [u'volunteer@example.com'],
+            [u'admin1@example.com', u'admin2@example.com'],
+            subject=u'Subject {}'.format(i),
+            body=u'Body',
+            html_body=u'<p>Body</p>',
+            from_email=u'support@volontuloapp.org',
+        ) for i in range(count)]
+
+    def _call(self, *args):
+        u"""Run command and return its output."""
+        stdout = StringIO()
+        call_command('send_queued_mail', *args, stdout=stdout)
+        return stdout.getvalue()
+
+    @override_settings(EMAIL_BACKEND=BACKENDS_MODULE + '.CountingBackend')
+    def test__send(self):
+        u"""Emails are sent in batches through pooled connection."""
+        CountingBackend.opened = 0
+        self._enqueue(5)
+
+        output = self._call('--batch-size', '2')
+
+        self.assertIn(u'delivered: 5', output)
+        self.assertIn(u'queued: 0', output)
+        # connection is reused by all batches:
+        self.assertEqual(CountingBackend.opened, 1)
+        self.assertEqual(len(mail.outbox), 5)
+        message = mail.outbox[0]
+        self.assertEqual(message.subject, u'Subject 0')
+        self.assertEqual(message.to, [u'volunteer@example.com'])
+        self.assertEqual(
+            message.bcc,
+            [u'admin1@example.com', u'admin2@example.com'],
+        )
+        self.assertEqual(message.alternatives, [(u'<p>Body</p>', 'text/html')])
+        self.assertEqual(
+            QueuedEmail.objects.filter(status='sent', attempts=1).count(),
+            5,
+        )
+
+    @override_settings(OUTBOX_SEND_IMMEDIATELY=True)
+    def test__send_immediately(self):
+        u"""Emails are sent by request queuing them when configured so."""
+        email.send_mail(
+            RequestFactory().get('/'),
+            'registration',
+            [u'volunteer@example.com'],
+            {'uuid': u'uuid'},
+        )
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, [u'volunteer@example.com'])
+        self.assertEqual(QueuedEmail.objects.get().status, 'sent')
+
+    @override_settings(EMAIL_BACKEND=BACKENDS_MODULE + '.FailingBackend')
+    def test__retry(self):
+        u"""Failed emails are retried with growing delays."""
+        email, = self._enqueue()
+
+        output = self._call()
+
+        self.assertIn(u'errors: 1', output)
+        email = QueuedEmail.objects.get(id=email.id)
+        self.assertEqual(email.status, 'queued')
+        self.assertEqual(email.attempts, 1)
+        self.assertIsNone(email.claimed_by)
+        self.assertIn(u'SMTPServerDisconnected', email.last_error)
+        first_delay = email.next_attempt_at - timezone.now()
+        # retry is not due yet:
+        self.assertIn(u'errors: 0', self._call())
+
+        QueuedEmail.objects.filter(id=email.id).update(
+            next_attempt_at=timezone.now()
+        )
+        self._call()
+        email = QueuedEmail.objects.get(id=email.id)
+        self.assertEqual(email.attempts, 2)
+        self.assertGreater(email.next_attempt_at - timezone.now(), first_delay)
+
+    @override_settings(EMAIL_BACKEND=BACKENDS_MODULE + '.RefusingBackend')
+    def test__refused(self):
+        u"""Refused email does not stop sending the rest of batch."""
+        refused, = self._enqueue()
+        QueuedEmail.objects.filter(id=refused.id).update(
+            recipients=u'refused@example.com'
+        )
+        self._enqueue(2)
+
+        output = self._call()
+
+        self.assertIn(u'delivered: 2', output)
+        self.assertIn(u'errors: 1', output)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertIn(
+            u'SMTPRecipientsRefused',
+            QueuedEmail.objects.get(id=refused.id).last_error,
+        )
+
+    @override_settings(EMAIL_BACKEND=BACKENDS_MODULE + '.BrokenBackend')
+    def test__unexpected_error(self):
+        u"""Unexpected error of single email is recorded and batch goes on."""
+        broken, = self._enqueue()
+        QueuedEmail.objects.filter(id=broken.id).update(
+            recipients=u'broken@example.com'
+        )
+        self._enqueue(2)
+
+        with self.assertLogs('volontulo.email', 'ERROR') as logs:
+            output = self._call()
+
+        self.assertIn(u'delivered: 2', output)
+        self.assertIn(u'errors: 1', output)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertIn(u'RuntimeError', logs.output[0])
+        broken = QueuedEmail.objects.get(id=broken.id)
+        self.assertEqual(broken.status, 'queued')
+        self.assertIsNone(broken.claimed_by)
+        self.assertEqual(broken.last_error, u'RuntimeError: Unexpected error')
+
+    @override_settings(EMAIL_BACKEND=BACKENDS_MODULE + '.FailingBackend')
+    def test__give_up(self):
+        u"""Email is marked as failed after last attempt."""
+        email, = self._enqueue()
+        QueuedEmail.objects.filter(id=email.id).update(
+            attempts=QueuedEmail.objects.MAX_ATTEMPTS - 1
+        )
+
+        output = self._call()
+
+        self.assertIn(u'failed: 1', output)
+        self.assertEqual(QueuedEmail.objects.get(id=email.id).status, 'failed')
+
+    def test__claim(self):
+        u"""Claimed emails are not claimed again until claim expires."""
+        emails = self._enqueue(3)
+
+        claimed = QueuedEmail.objects.claim(batch_size=2)
+        self.assertEqual([email.id for email in claimed],
+                         [email.id for email in emails[:2]])
+        claimed = QueuedEmail.objects.claim(batch_size=2)
+        self.assertEqual([email.id for email in claimed], [emails[2].id])
+        self.assertEqual(QueuedEmail.objects.claim(batch_size=2), [])
+
+        later = (
+            timezone.now() + QueuedEmail.objects.CLAIM_TIMEOUT +
+            datetime.timedelta(seconds=1)
+        )
+        self.assertEqual(
+            len(QueuedEmail.objects.claim(batch_size=5, now=later)),
+            3,
+        )
+
+    def test__depth(self):
+        u"""Numbers of emails in outbox are shown without sending them."""
+        self._enqueue(2)
+
+        output = self._call('--depth')
+
+        self.assertIn(u'queued: 2', output)
+        self.assertIn(u'oldest queued:', output)
+        self.assertNotIn(u'delivered:', output)
+        self.assertEqual(len(mail.outbox), 0)
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: test_update_offer_statuses
+"""
+import datetime
+from io import StringIO
+
+from django.contrib.admin.models import LogEntry
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.volontulo.models import Offer
+from apps.volontulo.models import Organization
+
+
+class TestUpdateOfferStatuses(TestCase):
+    u"""Tests for update_offer_statuses command."""
+
+    @classmethod
+    def setUpTestData(cls):
+        u"""Set up data for all tests."""
+        User.objects.create_superuser('admin', 'admin@example.com', '123')
+        organization = Organization.objects.create(name=u'Organization')
+        now = timezone.now()
+        day = datetime.timedelta(days=1)
+        common_offer_data = {
+            'organization': organization,
+            'description': u'',
+            'time_commitment': u'',
+            'benefits': u'',
+            'location': u'',
+            'offer_status': 'published',
+            'recruitment_status': 'open',
+            'action_status': 'ongoing',
+            'reserve_recruitment': False,
+        }
+        for title, data in (
+                (u'finished', {'finished_at': now - day}),
+                (u'finished too', {'finished_at': now - day,
+                                   'action_status': 'future'}),
+                (u'started', {'started_at': now - day,
+                              'action_status': 'future'}),
+                (u'future', {'started_at': now + day,
+                             'action_status': 'future'}),
+                (u'supplemental', {'recruitment_end_date': now - day,
+                                   'reserve_recruitment': True,
+                                   'reserve_recruitment_end_date': now + day}),
+                (u'closed', {'recruitment_end_date': now - day}),
+                (u'closed too', {'recruitment_end_date': now - 2 * day,
+                                 'recruitment_status': 'supplemental',
+                                 'reserve_recruitment': True,
+                                 'reserve_recruitment_end_date': now - day}),
+                (u'ongoing', {'finished_at': now + day,
+                              'recruitment_end_date': now + day}),
+        ):
+            Offer.objects.create(
+                title=title,
+                **dict(common_offer_data, **data)
+            )
+
+    def _statuses(self):
+        u"""Return action and recruitment statuses keyed by offer title."""
+        return {
+            title: (action, recruitment)
+            for title, action, recruitment in Offer.objects.values_list(
+                'title', 'action_status', 'recruitment_status'
+            )
+        }
+
+    def test__update_offer_statuses(self):
+        u"""Expired offers are moved to their next statuses."""
+        out = StringIO()
+        call_command('update_offer_statuses', batch_size=1, stdout=out)
+        self.assertEqual(
+            out.getvalue(),
+            u"finished: 2\nstarted: 1\nsupplemental: 1\nclosed: 2\n",
+        )
+        self.assertEqual(self._statuses(), {
+            u'finished': ('finished', 'closed'),
+            u'finished too': ('finished', 'closed'),
+            u'started': ('ongoing', 'open'),
+            u'future': ('future', 'open'),
+            u'supplemental': ('ongoing', 'supplemental'),
+            u'closed': ('ongoing', 'closed'),
+            u'closed too': ('ongoing', 'closed'),
+            u'ongoing': ('ongoing', 'open'),
+        })
+        self.assertEqual(
+            sorted(LogEntry.objects.values_list('object_repr', flat=True)),
+            [u'closed', u'closed too', u'finished', u'finished too',
+             u'started', u'supplemental'],
+        )
+
+    def test__update_offer_statuses_idempotent(self):
+        u"""Running command again does not change anything."""
+        call_command('update_offer_statuses', stdout=StringIO())
+        statuses = self._statuses()
+        out = StringIO()
+        call_command('update_offer_statuses', stdout=out)
+        self.assertEqual(
+            out.getvalue(),
+            u"finished: 0\nstarted: 0\nsupplemental: 0\nclosed: 0\n",
+        )
+        self.assertEqual(self._statuses(), statuses)
+        self.assertEqual(LogEntry.objects.count(), 6)
+
+    def test__update_offer_statuses_set_based(self):
+        u"""Offers are updated without loading them one by one."""
+        # savepoint, select, update and release for each of transitions:
+        with self.assertNumQueries(4 * 4):
+            for _ in Offer.objects.update_statuses(batch_size=100):
+                pass
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: test_email_templates
+"""
+
+from django.test import TestCase
+
+from apps.volontulo.lib.email_templates import EmailTemplates
+from apps.volontulo.lib.email_templates import inline_css
+from apps.volontulo.lib.email_templates import parse_css
+
+
+class TestCssInlining(TestCase):
+    u"""Tests for inlining CSS of layout."""
+
+    def test__parse_css(self):
+        u"""Only rules of plain tag selectors are returned."""
+        self.assertEqual(parse_css(u"""
+            <p>text</p>
+            <style type="text/css">
+                a, a:hover, .link { color: #000; text-decoration: none; }
+                td { padding: 0 }
+                a { font-weight: bold; }
+            </style>
+        """), {
+            u'a': u'color: #000; text-decoration: none; font-weight: bold',
+            u'td': u'padding: 0',
+        })
+
+    def test__inline_css(self):
+        u"""Existing inline declarations are placed after inlined ones."""
+        self.assertEqual(
+            inline_css(
+                u'<a href="/">x</a><abbr>y</abbr>'
+                u'<a style="color: red" href="{% url "home" %}">z</a>',
+                {u'a': u'color: #000'},
+            ),
+            u'<a style="color: #000" href="/">x</a><abbr>y</abbr>'
+            u'<a style="color: #000; color: red" href="{% url "home" %}">'
+            u'z</a>',
+        )
+
+
+class TestEmailTemplates(TestCase):
+    u"""Tests for compiled email templates."""
+
+    def test__render_batch(self):
+        u"""Emails are rendered with layout CSS inlined."""
+        templates = EmailTemplates(['registration'])
+
+        emails = list(templates.render_batch(
+            'registration',
+            [{'uuid': u'first'}, {'uuid': u'second'}],
+            {'protocol': 'https', 'domain': 'volontuloapp.org'},
+        ))
+
+        self.assertEqual(len(emails), 2)
+        for (text, html), uuid in zip(emails, (u'first', u'second')):
+            url = u'https://volontuloapp.org/activate/{}'.format(uuid)
+            self.assertIn(url, text)
+            self.assertIn(
+                u'<a style="color: #000000; text-decoration: underline" '
+                u'href="{}">'.format(url),
+                html,
+            )
+
+    def test__render_batch_isolated(self):
+        u"""Variables of one email are not visible in the following ones."""
+        templates = EmailTemplates(['offer_alert'])
+
+        (first, _), (second, second_html) = templates.render_batch(
+            'offer_alert',
+            [{'offers': [], 'more': 3}, {'offers': []}],
+            {'protocol': 'https', 'domain': 'volontuloapp.org'},
+        )
+
+        self.assertIn(u'i 3 więcej', first)
+        self.assertNotIn(u'więcej', second)
+        self.assertNotIn(u'więcej', second_html)
+
+    def test__reset(self):
+        u"""Parsed layout CSS is dropped along with compiled templates."""
+        # pylint: disable=protected-access
+        templates = EmailTemplates(['registration'])
+        loader = templates.get('registration')[1].engine.template_loaders[0]
+        self.assertTrue(any(
+            css_loader._rules for css_loader in loader.loaders
+        ))
+
+        loader.reset()
+
+        self.assertEqual(loader.template_cache, {})
+        for css_loader in loader.loaders:
+            self.assertIsNone(css_loader._rules)
+
+    def test__compiled_once(self):
+        u"""Templates with their layouts are compiled on first use only."""
+        templates = EmailTemplates(['registration', 'offer_creation'])
+        text_template, html_template = templates.get('registration')
+        loader = html_template.engine.template_loaders[0]
+        self.assertIn('emails/offer_creation.html', loader.template_cache)
+        cached = dict(loader.template_cache)
+
+        templates.render('registration', {'uuid': u'uuid'})
+
+        self.assertIn('emails/base.html', loader.template_cache)
+        self.assertIs(templates.get('registration')[0], text_template)
+        for name, template in cached.items():
+            self.assertIs(loader.template_cache[name], template)
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: test_export
+"""
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from apps.volontulo.lib import export
+from apps.volontulo.models import Offer
+from apps.volontulo.models import Organization
+from apps.volontulo.models import UserProfile
+
+
+class TestVolunteersRows(TestCase):
+    u"""Tests for reading volunteers rows in chunks."""
+
+    @classmethod
+    def setUpTestData(cls):
+        u"""Set up offers joined by volunteers."""
+        cls.organization = Organization.objects.create(name=u'Organization')
+        other = Organization.objects.create(name=u'Other')
+        cls.offer = Offer.objects.create(
+            organization=cls.organization,
+            title=u'Zbiórka',
+            started_at='2105-10-24 09:10:11',
+            finished_at='2105-11-28 12:13:14',
+        )
+        cls.other_offer = Offer.objects.create(
+            organization=other,
+            title=u'Other offer',
+            started_at='2105-10-24 09:10:11',
+            finished_at='2105-11-28 12:13:14',
+        )
+        cls.users = []
+        for i in range(5):
+            user = User.objects.create_user(
+                u'volunteer{}@example.com'.format(i),
+                u'volunteer{}@example.com'.format(i),
+                u'volunteer',
+                first_name=u'Łucja{}'.format(i),
+                last_name=u'Nowak',
+            )
+            UserProfile.objects.create(
+                user=user,
+                phone_no=u'60000000{}'.format(i),
+            )
+            cls.offer.volunteers.add(user)
+            cls.users.append(user)
+        cls.other_offer.volunteers.add(cls.users[0])
+
+    def test__rows(self):
+        u"""Rows contain user data, phone number and offer title."""
+        rows = list(export.volunteers_rows(
+            export.offer_applications(self.offer.id)
+        ))
+        self.assertEqual(rows, [(
+            user.id, user.first_name, u'Nowak', user.email,
+            u'60000000{}'.format(i), u'Zbiórka',
+        ) for i, user in enumerate(self.users)])
+
+    def test__organization_rows(self):
+        u"""Only volunteers of organization offers are exported."""
+        rows = list(export.volunteers_rows(
+            export.organization_applications(self.other_offer.organization_id)
+        ))
+        self.assertEqual(
+            [(row[0], row[-1]) for row in rows],
+            [(self.users[0].id, u'Other offer')],
+        )
+
+    def test__chunks(self):
+        u"""Each chunk is read by single query regardless of its size."""
+        rows = export.volunteers_rows(
+            export.offer_applications(self.offer.id),
+            chunk_size=2,
+        )
+        # 5 rows in chunks of 2, 2 and 1:
+        with self.assertNumQueries(3):
+            self.assertEqual(len(list(rows)), 5)
+
+    def test__stream_csv(self):
+        u"""CSV starts with byte order mark and empty values are blank."""
+        lines = list(export.stream_csv(
+            (u'ID', u'Imię'),
+            [(1, u'Łucja'), (2, None)],
+        ))
+        self.assertEqual(lines, [
+            u'﻿ID,Imię\r\n',
+            u'1,Łucja\r\n',
+            u'2,\r\n',
+        ])
+
+    def test__stream_csv_formulas(self):
+        u"""Values looking like formulas are not evaluated by spreadsheets."""
+        user = self.users[0]
+        user.first_name = u'=HYPERLINK("http://x.pl")'
+        user.save()
+        lines = list(export.stream_csv(
+            export.VOLUNTEERS_HEADER,
+            export.volunteers_rows(export.offer_applications(self.offer.id)),
+        ))
+        self.assertEqual(
+            lines[1],
+            u'{},"\'=HYPERLINK(""http://x.pl"")",Nowak,'
+            u'volunteer0@example.com,600000000,Zbiórka\r\n'.format(user.id),
+        )
+        self.assertEqual(
+            list(export.stream_csv((u'ID',), [
+                (u'+1+cmd|A0',), (u'-A1',), (u'@SUM(A1)',), (-1,),
+            ])),
+            [u'\ufeffID\r\n', u"'+1+cmd|A0\r\n", u"'-A1\r\n",
+             u"'@SUM(A1)\r\n", u'-1\r\n'],
+        )
+
+    def test__stream_csv_phones(self):
+        u"""Phone numbers starting with plus are not escaped."""
+        UserProfile.objects.filter(user=self.users[0]).update(
+            phone_no=u'+48 600-000-000'
+        )
+        lines = list(export.stream_csv(
+            export.VOLUNTEERS_HEADER,
+            export.volunteers_rows(export.offer_applications(self.offer.id)),
+        ))
+        self.assertEqual(
+            lines[1],
+            u'{},Łucja0,Nowak,volunteer0@example.com,+48 600-000-000,'
+            u'Zbiórka\r\n'.format(self.users[0].id),
+        )
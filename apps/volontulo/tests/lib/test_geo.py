@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: test_geo
+"""
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.volontulo.lib import geo
+from apps.volontulo.models import Offer
+from apps.volontulo.models import Organization
+
+
+class TestGeocode(TestCase):
+    u"""Tests for geocoding and distances."""
+
+    def test__geocode(self):
+        u"""Localities are found in free text locations."""
+        krakow = (50.0647, 19.9450)
+        self.assertEqual(geo.geocode(u'Kraków'), krakow)
+        self.assertEqual(geo.geocode(u'KRAKOW, Nowa Huta'), krakow)
+        self.assertEqual(geo.geocode(u'ul. Długa 5, Kraków'), krakow)
+        self.assertEqual(
+            geo.geocode(u'Zielona Góra'),
+            geo.geocode(u'zielona gora'),
+        )
+        self.assertEqual(
+            geo.geocode(u'Bielsko-Biała'),
+            (49.8224, 19.0584),
+        )
+        self.assertIsNone(geo.geocode(u'Atlantyda'))
+        self.assertIsNone(geo.geocode(u''))
+
+    def test__gazetteer_filled_at_once(self):
+        u"""Gazetteer is never seen partially loaded."""
+        localities = dict(geo.gazetteer())
+        seen_sizes = set()
+        key = geo._key  # pylint: disable=protected-access
+
+        def recording_key(text):
+            u"""Record size of gazetteer while it's loaded."""
+            gazetteer = geo._GAZETTEER  # pylint: disable=protected-access
+            seen_sizes.add(len(gazetteer))
+            return key(text)
+
+        geo._GAZETTEER.clear()  # pylint: disable=protected-access
+        geo._key = recording_key  # pylint: disable=protected-access
+        try:
+            self.assertEqual(geo.gazetteer(), localities)
+        finally:
+            geo._key = key  # pylint: disable=protected-access
+        self.assertEqual(seen_sizes, {0})
+
+    def test__haversine(self):
+        u"""Distance between Kraków and Warszawa is about 252 km."""
+        distance = geo.haversine(50.0647, 19.9450, 52.2297, 21.0122)
+        self.assertAlmostEqual(distance, 252, delta=2)
+
+    def test__bounding_box(self):
+        u"""Bounding box contains points within radius."""
+        min_lat, max_lat, min_lon, max_lon = geo.bounding_box(
+            50.0647, 19.9450, 100
+        )
+        self.assertAlmostEqual(
+            geo.haversine(50.0647, 19.9450, max_lat, 19.9450), 100, places=3
+        )
+        self.assertAlmostEqual(
+            geo.haversine(50.0647, 19.9450, min_lat, 19.9450), 100, places=3
+        )
+        self.assertGreater(
+            geo.haversine(50.0647, 19.9450, 50.0647, max_lon), 99
+        )
+        self.assertGreater(
+            geo.haversine(50.0647, 19.9450, 50.0647, min_lon), 99
+        )
+
+
+class TestOffersNear(TestCase):
+    u"""Tests for looking up offers near given point."""
+
+    @classmethod
+    def setUpTestData(cls):
+        u"""Set up data for all tests."""
+        organization = Organization.objects.create(name=u'Organization')
+        for location in (u'Kraków', u'Wieliczka', u'Katowice', u'Gdańsk',
+                         u'Nieznane'):
+            Offer.objects.create(
+                organization=organization,
+                title=location,
+                description=u'',
+                time_commitment=u'',
+                benefits=u'',
+                location=location,
+            )
+
+    def test__coordinates_set_on_save(self):
+        u"""Offers coordinates are set from their locations."""
+        offer = Offer.objects.get(title=u'Wieliczka')
+        self.assertEqual(
+            (offer.latitude, offer.longitude),
+            (49.9870, 20.0647),
+        )
+        offer.location = u'Nieznane'
+        offer.save()
+        offer = Offer.objects.get(id=offer.id)
+        self.assertIsNone(offer.latitude)
+        self.assertIsNone(offer.longitude)
+
+    def test__coordinates_kept_on_partial_save(self):
+        u"""Saves of other fields than location don't geocode offer."""
+        offer = Offer.objects.get(title=u'Wieliczka')
+        offer.location = u'Gdańsk'
+        offer.weight = 5
+        offer.save(update_fields=['weight'])
+        self.assertEqual(
+            (offer.latitude, offer.longitude),
+            (49.9870, 20.0647),
+        )
+
+    def test__offers_near_radius(self):
+        u"""Only offers within radius are found, nearest first."""
+        offers = geo.offers_near(Offer.objects.all(), 50.0647, 19.9450, 100)
+        self.assertEqual(
+            [o.title for o in offers],
+            [u'Kraków', u'Wieliczka', u'Katowice'],
+        )
+        self.assertAlmostEqual(offers[0].distance, 0)
+        self.assertAlmostEqual(offers[2].distance, 68, delta=2)
+
+    def test__offers_near_nearest(self):
+        u"""Area is enlarged until requested number of offers is found."""
+        offers = geo.offers_near(
+            Offer.objects.all(), 54.3520, 18.6466, limit=2
+        )
+        self.assertEqual([o.title for o in offers], [u'Gdańsk', u'Katowice'])
+        offers = geo.offers_near(
+            Offer.objects.all(), 54.3520, 18.6466, limit=10
+        )
+        self.assertEqual(len(offers), 4)
+
+    def test__geocode_offers(self):
+        u"""Command sets coordinates of offers updated in bulk."""
+        Offer.objects.update(latitude=None, longitude=None)
+        out = StringIO()
+        call_command('geocode_offers', stdout=out)
+        self.assertEqual(
+            out.getvalue(), u"Updated coordinates of 5 offers.\n"
+        )
+        self.assertEqual(
+            Offer.objects.filter(latitude__isnull=False).count(), 4
+        )
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: test_search_index
+"""
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.volontulo.lib import search_index
+from apps.volontulo.lib.cache import bump_offers_generation
+from apps.volontulo.lib.cache import offers_generation
+from apps.volontulo.lib.search_index import OffersIndex
+from apps.volontulo.models import Offer
+from apps.volontulo.models import Organization
+
+
+class TestFolding(TestCase):
+    u"""Tests for text normalization."""
+
+    def test__fold(self):
+        u"""Polish diacritics are removed and text is lowercased."""
+        self.assertEqual(
+            search_index.fold(u'Zażółć gęślą jaźń ŁÓDŹ'),
+            u'zazolc gesla jazn lodz',
+        )
+
+    def test__tokenize(self):
+        u"""Text is split into folded words."""
+        self.assertEqual(
+            search_index.tokenize(u'Pomoc_w-Łodzi, 2 dni!'),
+            [u'pomoc', u'w', u'lodzi', u'2', u'dni'],
+        )
+
+
+class TestOffersIndex(TestCase):
+    u"""Tests for OffersIndex class."""
+
+    def setUp(self):
+        u"""Set up each test."""
+        self.index = OffersIndex()
+        self.index.add(1, {u'spacery': 3, u'psami': 3, u'krakow': 2})
+        self.index.add(2, {u'pomoc': 3, u'bibliotece': 3, u'krakow': 2,
+                           u'wolontariat': 1})
+        self.index.add(3, {u'sprzatanie': 3, u'lasu': 3, u'krakow': 1,
+                           u'poznan': 2, u'spacery': 1})
+
+    def test__search(self):
+        u"""Offers matching all words are found, best matches first."""
+        self.assertEqual(self.index.search(u'Kraków'), [1, 2, 3])
+        self.assertEqual(self.index.search(u'spacery'), [1, 3])
+        self.assertEqual(self.index.search(u'krakow wolontariat'), [2])
+        self.assertEqual(self.index.search(u'lasu wolontariat'), [])
+        self.assertEqual(self.index.search(u'...'), [])
+
+    def test__search_prefix(self):
+        u"""Only last word of phrase is matched as prefix."""
+        self.assertEqual(self.index.search(u'krak bibl'), [])
+        self.assertEqual(self.index.search(u'krakow bibl'), [2])
+        self.assertEqual(self.index.search(u'spa'), [1, 3])
+        self.assertEqual(sorted(self.index.search(u'sp')), [1, 3])
+
+    def test__remove(self):
+        u"""Removed offers are not found anymore."""
+        self.index.remove(1)
+        self.index.remove(1)
+        self.assertEqual(self.index.search(u'spacery'), [3])
+        self.assertEqual(self.index.search(u'psa'), [])
+        self.assertEqual(len(self.index), 2)
+
+    def test__dump_and_load(self):
+        u"""Index saved to file is loaded with the same contents."""
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            self.index.dump(path)
+            index = OffersIndex.load(path)
+        finally:
+            os.remove(path)
+        self.assertEqual(len(index), 3)
+        self.assertEqual(index.search(u'krakow spa'), [1, 3])
+
+
+class TestProcessIndex(TestCase):
+    u"""Tests for search index of current process."""
+
+    @classmethod
+    def setUpTestData(cls):
+        u"""Set up data for all tests."""
+        Offer.objects.create(
+            organization=Organization.objects.create(name=u'Schronisko'),
+            title=u'Spacery z psami',
+            description=u'',
+            time_commitment=u'',
+            benefits=u'',
+            location=u'Łódź',
+            offer_status='published',
+            recruitment_status='open',
+            action_status='ongoing',
+        )
+
+    def setUp(self):
+        u"""Set up each test."""
+        self.offer = Offer.objects.select_related('organization').get()
+        self.organization = self.offer.organization
+        search_index.reset_index()
+
+    def tearDown(self):
+        u"""Drop index built from test data."""
+        search_index.reset_index()
+
+    def test__offer_changes(self):
+        u"""Index is updated when offers are saved and deleted."""
+        index = search_index.get_index()
+        self.assertEqual(index.search(u'lodz'), [self.offer.id])
+
+        self.offer.title = u'Wyprowadzanie kotów'
+        self.offer.save()
+        self.assertEqual(index.search(u'spacery'), [])
+        self.assertEqual(index.search(u'koty'), [])
+        self.assertEqual(index.search(u'kot'), [self.offer.id])
+
+        self.offer.close_offer()
+        self.assertEqual(index.search(u'lodz'), [])
+
+        self.offer.publish()
+        self.offer.action_status = 'ongoing'
+        self.offer.recruitment_status = 'open'
+        self.offer.save()
+        self.assertEqual(index.search(u'lodz'), [self.offer.id])
+
+        self.offer.delete()
+        self.assertEqual(index.search(u'lodz'), [])
+        # changes made by this process don't make index stale:
+        self.assertIs(search_index.get_index(), index)
+
+    def test__changes_of_other_process(self):
+        u"""Index is built again when offers are changed by other process."""
+        index = search_index.get_index()
+        Offer.objects.filter(id=self.offer.id).update(title=u'Karmienie kotów')
+        self.assertEqual(search_index.get_index().search(u'kot'), [])
+
+        bump_offers_generation()
+        self.assertEqual(
+            search_index.get_index().search(u'kot'), [self.offer.id]
+        )
+        self.assertIsNot(search_index.get_index(), index)
+
+    def test__organization_rename(self):
+        u"""Offers are reindexed when their organization is renamed."""
+        index = search_index.get_index()
+        self.organization.name = u'Azyl'
+        self.organization.save()
+        self.assertEqual(index.search(u'azyl'), [self.offer.id])
+        self.assertEqual(index.search(u'schronisko'), [])
+
+    def test__build_search_index(self):
+        u"""Index file built by command is loaded by workers."""
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            out = StringIO()
+            call_command('build_search_index', path=path, stdout=out)
+            self.assertEqual(
+                out.getvalue(), u"Indexed 1 offers in {}.\n".format(path)
+            )
+            with self.settings(OFFERS_SEARCH_INDEX_PATH=path):
+                search_index.load_index()
+                index = search_index.get_index()
+        finally:
+            os.remove(path)
+        self.assertEqual(index.search(u'psami'), [self.offer.id])
+        self.assertEqual(index.generation, offers_generation())
+
+    def test__stale_file(self):
+        u"""Index file built before offers changed is not used."""
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            OffersIndex.build([], offers_generation()).dump(path)
+            bump_offers_generation()
+            with self.settings(OFFERS_SEARCH_INDEX_PATH=path):
+                search_index.load_index()
+                index = search_index.get_index()
+        finally:
+            os.remove(path)
+        self.assertEqual(index.search(u'psami'), [self.offer.id])
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: test_smtp_pool
+"""
+import smtplib
+import socket
+import socketserver
+import threading
+
+from django.core.mail import EmailMessage
+from django.core.mail.backends.smtp import EmailBackend
+from django.test import SimpleTestCase
+
+from apps.volontulo.lib.smtp_pool import DEFAULT_TIMEOUTS
+from apps.volontulo.lib.smtp_pool import POOL_SIZE
+from apps.volontulo.lib.smtp_pool import PoolExhausted
+from apps.volontulo.lib.smtp_pool import SMTPConnectionPool
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    u"""Minimal SMTP session accepting every message."""
+
+    def handle(self):
+        u"""Answer SMTP commands until client quits."""
+        self.server.opened(self.connection)
+        self._reply(u'220 localhost ESMTP')
+        data = None
+        for line in self.rfile:
+            if data is not None:
+                if line == b'.\r\n':
+                    self.server.messages.append(b''.join(data))
+                    data = None
+                    self._reply(u'250 OK')
+                else:
+                    data.append(line)
+                continue
+            command = line.split()[0].upper() if line.strip() else b''
+            if command in (b'EHLO', b'HELO'):
+                self._reply(u'250 localhost')
+            elif command == b'DATA':
+                data = []
+                self._reply(u'354 End data with <CR><LF>.<CR><LF>')
+            elif command == b'QUIT':
+                self._reply(u'221 Bye')
+                break
+            elif command in (b'MAIL', b'RCPT', b'RSET', b'NOOP'):
+                self._reply(u'250 OK')
+            else:
+                self._reply(u'500 Unknown command')
+        self.server.closed(self.connection)
+
+    def _reply(self, line):
+        u"""Send reply line."""
+        self.wfile.write(line.encode('ascii') + b'\r\n')
+
+
+class SMTPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    u"""Local SMTP server counting connections and messages."""
+    daemon_threads = True
+
+    def __init__(self):
+        u"""Listen on free local port."""
+        socketserver.TCPServer.__init__(self, ('127.0.0.1', 0), SMTPHandler)
+        self.lock = threading.Lock()
+        self.messages = []
+        self.connections = 0
+        self.sockets = set()
+        self.max_open = 0
+
+    def opened(self, sock):
+        u"""Count opened connection."""
+        with self.lock:
+            self.connections += 1
+            self.sockets.add(sock)
+            self.max_open = max(self.max_open, len(self.sockets))
+
+    def closed(self, sock):
+        u"""Forget closed connection."""
+        with self.lock:
+            self.sockets.discard(sock)
+
+    def drop_all(self):
+        u"""Close all connections without notifying clients."""
+        with self.lock:
+            for sock in self.sockets:
+                sock.shutdown(socket.SHUT_RDWR)
+
+
+class TestSMTPConnectionPool(SimpleTestCase):
+    u"""Tests for pool of SMTP connections."""
+
+    def setUp(self):
+        u"""Start local SMTP server."""
+        self.server = SMTPServer()
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    def tearDown(self):
+        u"""Stop local SMTP server."""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _pool(self, timeouts=DEFAULT_TIMEOUTS, size=POOL_SIZE):
+        u"""Return pool of connections to local server."""
+        host, port = self.server.server_address
+        return SMTPConnectionPool(
+            size=size,
+            timeouts=timeouts,
+            connect=lambda: EmailBackend(host=host, port=port, timeout=5),
+        )
+
+    @staticmethod
+    def _send(connection):
+        u"""Send test email through connection."""
+        EmailMessage(
+            u'Subject',
+            u'Body',
+            u'support@volontuloapp.org',
+            [u'volunteer@example.com'],
+            connection=connection,
+        ).send()
+
+    def test__reuse(self):
+        u"""Connection is reused by subsequent emails."""
+        pool = self._pool()
+        for _ in range(3):
+            with pool.connection() as connection:
+                self._send(connection)
+
+        self.assertEqual(len(self.server.messages), 3)
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(len(pool), 1)
+        pool.close_all()
+        self.assertEqual(len(pool), 0)
+
+    def test__health_check(self):
+        u"""Connection dropped by server is replaced."""
+        pool = self._pool(DEFAULT_TIMEOUTS._replace(check_after=0))
+        with pool.connection() as connection:
+            self._send(connection)
+        self.server.drop_all()
+
+        with pool.connection() as connection:
+            self._send(connection)
+
+        self.assertEqual(len(self.server.messages), 2)
+        self.assertEqual(self.server.connections, 2)
+
+    def test__idle_timeout(self):
+        u"""Idle connections are closed after timeout."""
+        pool = self._pool(DEFAULT_TIMEOUTS._replace(idle=-1))
+        with pool.connection() as first:
+            self._send(first)
+        with pool.connection() as second:
+            self._send(second)
+
+        self.assertIsNot(first, second)
+        self.assertIsNone(first.connection)
+        self.assertEqual(self.server.connections, 2)
+
+    def test__broken_connection(self):
+        u"""Connection which raised SMTP error is not reused."""
+        pool = self._pool()
+        with self.assertRaises(smtplib.SMTPServerDisconnected):
+            with pool.connection() as connection:
+                raise smtplib.SMTPServerDisconnected()
+
+        self.assertIsNone(connection.connection)
+        self.assertEqual(len(pool), 0)
+
+    def test__exhausted(self):
+        u"""Waiting for free connection is limited."""
+        pool = self._pool(DEFAULT_TIMEOUTS._replace(acquire=0.01), size=1)
+        with pool.connection():
+            with self.assertRaises(PoolExhausted):
+                with pool.connection():
+                    pass
+
+    def test__threads(self):
+        u"""Threads share bounded number of connections."""
+        pool = self._pool(size=2)
+        errors = []
+
+        def send_emails():
+            u"""Send few emails, each through borrowed connection."""
+            try:
+                for _ in range(5):
+                    with pool.connection() as connection:
+                        self._send(connection)
+            except Exception as ex:  # pylint: disable=broad-except
+                errors.append(ex)
+
+        threads = [threading.Thread(target=send_emails) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(self.server.messages), 40)
+        self.assertLessEqual(self.server.max_open, 2)
+        pool.close_all()
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: test_thumbnails
+"""
+
+import io
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.template import Context
+from django.template import Template
+from django.test import TestCase
+from django.test import override_settings
+from PIL import Image
+
+from apps.volontulo.lib.thumbnails import WEBP_SUPPORTED
+from apps.volontulo.lib.thumbnails import create_thumbnails
+from apps.volontulo.lib.thumbnails import delete_thumbnails
+from apps.volontulo.lib.thumbnails import get_thumbnails
+from apps.volontulo.models import Offer
+from apps.volontulo.models import OfferImage
+from apps.volontulo.models import Organization
+from apps.volontulo.models import OrganizationGallery
+from apps.volontulo.models import UserProfile
+
+
+class TestThumbnails(TestCase):
+    u"""Tests for generating thumbnails of uploaded images."""
+
+    def setUp(self):
+        u"""Use temporary media directory."""
+        self.media_root = tempfile.mkdtemp()
+        settings = override_settings(MEDIA_ROOT=self.media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.addCleanup(shutil.rmtree, self.media_root)
+        cache.clear()
+
+    @staticmethod
+    def _upload(name, size, mode='RGB', format_='JPEG'):
+        u"""Save generated image in media storage."""
+        buffer = io.BytesIO()
+        Image.new(mode, size, 'red').save(buffer, format_)
+        return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+    def test__generate(self):
+        u"""Thumbnails narrower than original are stored next to it."""
+        name = self._upload('offers/photo.jpg', (2000, 1000))
+
+        thumbnails = create_thumbnails(name)
+
+        self.assertEqual(
+            [width for width, _, _ in thumbnails],
+            [64, 128, 256, 512, 1024, 1600],
+        )
+        _, url, webp_url = thumbnails[3]
+        self.assertEqual(url, '/media/offers/thumbnails/photo-512w.jpg')
+        with default_storage.open('offers/thumbnails/photo-512w.jpg') as fd:
+            image = Image.open(fd)
+            self.assertEqual(image.format, 'JPEG')
+            self.assertEqual(image.size, (512, 256))
+        if WEBP_SUPPORTED:
+            self.assertEqual(
+                webp_url, '/media/offers/thumbnails/photo-512w.webp'
+            )
+        else:
+            self.assertIsNone(webp_url)
+
+    def test__cache(self):
+        u"""Thumbnails are looked up in storage only once and never
+        generated when they are shown."""
+        name = self._upload('offers/photo.jpg', (300, 200))
+        self.assertEqual(get_thumbnails(name), [])
+        self.assertFalse(default_storage.exists('offers/thumbnails'))
+
+        self.assertEqual(len(create_thumbnails(name)), 3)
+        os.remove(os.path.join(
+            self.media_root, 'offers', 'thumbnails', 'photo-256w.jpg'
+        ))
+        self.assertEqual(len(get_thumbnails(name)), 3)
+
+        cache.clear()
+        self.assertEqual(
+            [width for width, _, _ in get_thumbnails(name)], [64, 128]
+        )
+        self.assertFalse(
+            default_storage.exists('offers/thumbnails/photo-256w.jpg')
+        )
+        # missing thumbnail is generated again:
+        self.assertEqual(len(create_thumbnails(name)), 3)
+        self.assertEqual(len(get_thumbnails(name)), 3)
+
+    def test__transparent(self):
+        u"""Transparent images get PNG thumbnails."""
+        name = self._upload('gallery/logo.png', (200, 200), 'RGBA', 'PNG')
+        create_thumbnails(name)
+        cache.clear()
+
+        thumbnails = get_thumbnails(name)
+
+        self.assertEqual(
+            thumbnails[-1][1], '/media/gallery/thumbnails/logo-128w.png'
+        )
+        with default_storage.open('gallery/thumbnails/logo-128w.png') as fd:
+            self.assertEqual(Image.open(fd).mode, 'RGBA')
+
+    def test__broken(self):
+        u"""Broken and missing images have no thumbnails."""
+        name = default_storage.save(
+            'offers/broken.jpg', ContentFile(b'not an image')
+        )
+
+        with self.assertLogs('volontulo.thumbnails', 'WARNING'):
+            self.assertEqual(create_thumbnails(name), [])
+            self.assertEqual(create_thumbnails('offers/missing.jpg'), [])
+        self.assertEqual(get_thumbnails(name), [])
+
+    def test__delete(self):
+        u"""Thumbnails are deleted together with cached list."""
+        name = self._upload('profile/avatar.jpg', (300, 300))
+        create_thumbnails(name)
+
+        delete_thumbnails(name)
+
+        self.assertEqual(
+            os.listdir(os.path.join(self.media_root, 'profile', 'thumbnails')),
+            [],
+        )
+        self.assertEqual(get_thumbnails(name), [])
+
+    def test__template_tags(self):
+        u"""Templates use thumbnails matching displayed size."""
+        name = self._upload('offers/photo.jpg', (600, 400))
+        create_thumbnails(name)
+        template = Template(
+            u'{% load thumbnails %}'
+            u'{{ image|thumbnail:100 }}|{{ image|thumbnail:1000 }}|'
+            u'{{ empty|thumbnail:100 }}|{% srcset image %}|'
+            u'{% responsive_image image 512 sizes="50vw" alt="Zdjęcie" %}'
+        )
+
+        small, large, empty, srcset, picture = template.render(Context({
+            'image': name,
+            'empty': '',
+        })).split(u'|')
+
+        self.assertEqual(small, '/media/offers/thumbnails/photo-128w.jpg')
+        self.assertEqual(large, '/media/offers/photo.jpg')
+        self.assertEqual(empty, '/media/')
+        self.assertEqual(srcset, u', '.join(
+            u'/media/offers/thumbnails/photo-{0}w.jpg {0}w'.format(width)
+            for width in (64, 128, 256, 512)
+        ))
+        self.assertTrue(picture.startswith(u'<picture>'))
+        self.assertIn(
+            u'<img src="/media/offers/thumbnails/photo-512w.jpg" '
+            u'srcset="{}" sizes="50vw" alt="Zdjęcie"'.format(srcset),
+            picture,
+        )
+        self.assertEqual(
+            u'type="image/webp"' in picture, WEBP_SUPPORTED
+        )
+
+    def test__template_tags_fallback(self):
+        u"""Original image is shown until thumbnails are generated."""
+        name = self._upload('offers/photo.jpg', (600, 400))
+        template = Template(
+            u'{% load thumbnails %}'
+            u'{{ image|thumbnail:100 }}|{% srcset image %}|'
+            u'{% responsive_image image 512 alt="Zdjęcie" %}'
+        )
+
+        self.assertEqual(
+            template.render(Context({'image': name})),
+            u'/media/offers/photo.jpg||'
+            u'<img src="/media/offers/photo.jpg" alt="Zdjęcie" class="" />',
+        )
+        self.assertFalse(default_storage.exists('offers/thumbnails'))
+
+    def test__generated_on_save(self):
+        u"""Thumbnails of uploaded images are generated when they are saved
+        and by command for images saved before."""
+        user = User.objects.create_user(u'organization@example.com')
+        offer = Offer.objects.create(
+            organization=Organization.objects.create(name=u'Organization'),
+            title=u'Offer',
+        )
+        image = OfferImage.objects.create(
+            userprofile=UserProfile.objects.create(user=user),
+            offer=offer,
+            path=self._upload('offers/photo.jpg', (300, 200)),
+        )
+        self.assertEqual(len(get_thumbnails(str(image.path))), 3)
+
+        delete_thumbnails(str(image.path))
+        out = io.StringIO()
+        call_command('generate_thumbnails', stdout=out)
+
+        self.assertEqual(out.getvalue(), u"Thumbnails of 1 images.\n")
+        self.assertEqual(len(get_thumbnails(str(image.path))), 3)
+
+        # saving existing row does not generate them:
+        delete_thumbnails(str(image.path))
+        image.is_main = True
+        image.save()
+        self.assertEqual(get_thumbnails(str(image.path)), [])
+
+    def test__deleted_with_image(self):
+        u"""Thumbnails are deleted along with gallery image."""
+        user = User.objects.create_user(u'organization@example.com')
+        organization = Organization.objects.create(name=u'Organization')
+        image = OrganizationGallery.objects.create(
+            organization=organization,
+            published_by=UserProfile.objects.create(user=user),
+            path=self._upload('gallery/photo.jpg', (300, 200)),
+        )
+        self.assertTrue(default_storage.exists('gallery/thumbnails'))
+
+        image.delete()
+
+        self.assertEqual(default_storage.listdir('gallery/thumbnails'),
+                         ([], []))
+        self.assertEqual(get_thumbnails(str(image.path)), [])
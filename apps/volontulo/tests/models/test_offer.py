@@ -3,11 +3,20 @@
 u"""
 .. module:: test_offer
 """
+import threading
+import unittest
+
 from django.contrib.auth.models import User
+from django.db import connection
+from django.db import transaction
 from django.test import TestCase
+from django.test import TransactionTestCase
 
 from apps.volontulo.models import Offer
+from apps.volontulo.models import OfferImage
 from apps.volontulo.models import Organization
+from apps.volontulo.models import UserProfile
+from apps.volontulo.templatetags.main_image import main_image
 
 
 class TestOfferModel(TestCase):
@@ -157,3 +166,331 @@ class OfferTestCase(TestCase):
             self.offer.status_old,
             'ACTIVE'
         )
+
+
+class OfferMainImageTestCase(TestCase):
+    u"""Tests for Offer main image pointer."""
+
+    def setUp(self):
+        self.offer = Offer.objects.create(
+            organization=Organization.objects.create(name=u"Organization"),
+            description=u"",
+            time_commitment=u"",
+            benefits=u"",
+            location=u"",
+            title=u"Offer",
+        )
+        self.userprofile = UserProfile.objects.create(
+            user=User.objects.create_user(
+                'user@example.com',
+                'user@example.com',
+                'user',
+            )
+        )
+
+    def _save_image(self, path, is_main=False):
+        u"""Upload image to tested offer."""
+        image = OfferImage(path=path)
+        self.offer.save_offer_image(image, self.userprofile, is_main)
+        return image
+
+    def test__first_image_becomes_main_image(self):
+        u"""First uploaded image is used as main image."""
+        first = self._save_image('offers/1.jpg')
+        self._save_image('offers/2.jpg')
+
+        offer = Offer.objects.get(id=self.offer.id)
+        self.assertEqual(offer.main_image, first)
+        self.assertEqual(
+            list(OfferImage.objects.filter(
+                offer=offer, is_main=True,
+            ).values_list('id', flat=True)),
+            [first.id],
+        )
+
+    def test__main_image_is_replaced(self):
+        u"""Image marked as main replaces previous main image."""
+        first = self._save_image('offers/1.jpg', is_main=True)
+        second = self._save_image('offers/2.jpg', is_main=True)
+
+        offer = Offer.objects.get(id=self.offer.id)
+        self.assertEqual(offer.main_image, second)
+        self.assertFalse(OfferImage.objects.get(id=first.id).is_main)
+        self.assertTrue(OfferImage.objects.get(id=second.id).is_main)
+
+    def test__main_image_without_queries(self):
+        u"""Main image of fetched offer is resolved without queries."""
+        self._save_image('offers/1.jpg', is_main=True)
+        offer = Offer.objects.select_related('main_image').get(
+            id=self.offer.id
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(main_image(offer), 'offers/1.jpg')
+
+
+class OfferWeightTestCase(TestCase):
+    u"""Tests for ordering offers by weight."""
+
+    def setUp(self):
+        organization = Organization.objects.create(name=u"Organization")
+        for i in range(3):
+            Offer.objects.create(
+                organization=organization,
+                description=u"",
+                time_commitment=u"",
+                benefits=u"",
+                location=u"",
+                title=u"Offer {}".format(i),
+                weight=i,
+            )
+
+    def _weights(self):
+        u"""Return offers weights by title."""
+        return dict(Offer.objects.values_list('title', 'weight'))
+
+    def test__publish_touches_only_published_offer(self):
+        u"""Published offer is put on top without changing other offers."""
+        offer = Offer.objects.select_related('organization').get(
+            title=u"Offer 2"
+        )
+        # savepoint, top weight, lock of top offer, top weight again, update
+        # of offer, cancelling reminder of offer without start, release
+        # savepoint and saved searches matching it:
+        with self.assertNumQueries(8):
+            offer.publish()
+
+        self.assertEqual(self._weights(), {
+            u"Offer 0": 0,
+            u"Offer 1": 1,
+            u"Offer 2": -Offer.WEIGHT_STEP,
+        })
+        self.assertEqual(offer.offer_status, 'published')
+
+    def test__publish_rebalances_exhausted_weights(self):
+        u"""Weights are rebalanced when there is no room for new offer."""
+        Offer.objects.filter(title=u"Offer 0").update(
+            weight=Offer.MIN_WEIGHT
+        )
+        Offer.objects.get(title=u"Offer 1").publish()
+
+        self.assertEqual(self._weights(), {
+            u"Offer 0": 0,
+            u"Offer 1": -Offer.WEIGHT_STEP,
+            u"Offer 2": 2 * Offer.WEIGHT_STEP,
+        })
+
+    def test__rebalance_weights(self):
+        u"""Weights are spread evenly keeping order of offers."""
+        Offer.objects.rebalance_weights()
+
+        self.assertEqual(self._weights(), {
+            u"Offer 0": 0,
+            u"Offer 1": Offer.WEIGHT_STEP,
+            u"Offer 2": 2 * Offer.WEIGHT_STEP,
+        })
+
+    def test__reorder_single_statement(self):
+        u"""Changed weights are saved by single UPDATE statement."""
+        ids = dict(Offer.objects.values_list('title', 'id'))
+        # savepoint, select for update, update, release savepoint:
+        with self.assertNumQueries(4):
+            updated = Offer.objects.reorder({
+                ids[u"Offer 0"]: 5,
+                ids[u"Offer 1"]: 1,
+                ids[u"Offer 2"]: 3,
+            })
+
+        self.assertEqual(updated, 2)
+        self.assertEqual(self._weights(), {
+            u"Offer 0": 5,
+            u"Offer 1": 1,
+            u"Offer 2": 3,
+        })
+
+    def test__reorder_missing_offer(self):
+        u"""Nothing is saved when some of offers do not exist."""
+        offer = Offer.objects.get(title=u"Offer 0")
+        with self.assertRaises(Offer.DoesNotExist):
+            Offer.objects.reorder({offer.id: 5, offer.id + 100: 1})
+        self.assertEqual(Offer.objects.get(id=offer.id).weight, 0)
+
+    def test__arrange(self):
+        u"""Offers are put in given order reusing their weights."""
+        ids = dict(Offer.objects.values_list('title', 'id'))
+        Offer.objects.arrange([ids[u"Offer 2"], ids[u"Offer 0"]])
+
+        self.assertEqual(self._weights(), {
+            u"Offer 0": 2,
+            u"Offer 1": 1,
+            u"Offer 2": 0,
+        })
+
+    def test__arrange_shared_weights(self):
+        u"""Offers sharing weight do not pass offers not being arranged."""
+        ids = dict(Offer.objects.values_list('title', 'id'))
+        Offer.objects.filter(title=u"Offer 0").update(weight=5)
+        Offer.objects.filter(title__in=[u"Offer 1", u"Offer 2"]).update(
+            weight=4
+        )
+
+        Offer.objects.arrange([ids[u"Offer 2"], ids[u"Offer 1"]])
+
+        self.assertEqual(
+            list(Offer.objects.order_by('weight', 'id').values_list(
+                'title', flat=True
+            )),
+            [u"Offer 2", u"Offer 1", u"Offer 0"],
+        )
+        # run of arranged offers is spread below next offer:
+        self.assertEqual(self._weights(), {
+            u"Offer 0": 5,
+            u"Offer 1": -329,
+            u"Offer 2": -663,
+        })
+
+    def test__arrange_updates_only_arranged(self):
+        u"""Offers following arranged ones keep weights without gaps."""
+        organization = Organization.objects.get()
+        Offer.objects.update(weight=100)
+        # every next offer has lower id, so shifting one shifts them all:
+        offers = [(u"Offer w{}".format(i), i) for i in range(20, 0, -1)]
+        for title, weight in offers + [(u"First", 0), (u"Second", 0)]:
+            Offer.objects.create(
+                organization=organization,
+                description=u"",
+                time_commitment=u"",
+                benefits=u"",
+                location=u"",
+                title=title,
+                weight=weight,
+            )
+        weights = self._weights()
+        ids = dict(Offer.objects.values_list('title', 'id'))
+
+        updated = Offer.objects.arrange([ids[u"Second"], ids[u"First"]])
+
+        self.assertEqual(updated, 2)
+        self.assertEqual(
+            list(Offer.objects.order_by('weight', 'id').values_list(
+                'title', flat=True
+            ))[:3],
+            [u"Second", u"First", u"Offer w1"],
+        )
+        new_weights = self._weights()
+        for title in (u"First", u"Second"):
+            del weights[title], new_weights[title]
+        self.assertEqual(new_weights, weights)
+
+    def test__arrange_rebalances_exhausted_gap(self):
+        u"""Weights are rebalanced when there is no room between offers."""
+        Offer.objects.update(weight=5)
+        ids = dict(Offer.objects.values_list('title', 'id'))
+
+        Offer.objects.arrange([ids[u"Offer 1"]])
+
+        self.assertEqual(self._weights(), {
+            u"Offer 0": 0,
+            u"Offer 1": Offer.WEIGHT_STEP,
+            u"Offer 2": 2 * Offer.WEIGHT_STEP,
+        })
+
+
+class OffersCacheTestCase(TestCase):
+    u"""Tests for cached results of offers manager."""
+
+    def setUp(self):
+        organization = Organization.objects.create(name=u"Organization")
+        for i in range(3):
+            Offer.objects.create(
+                organization=organization,
+                description=u"",
+                time_commitment=u"",
+                benefits=u"",
+                location=u"",
+                title=u"Offer {}".format(i),
+                offer_status='published',
+                weight=i,
+            )
+
+    def _titles(self):
+        u"""Return titles of cached offers ordered by weight."""
+        return [o.title for o in Offer.objects.cached('get_weightened')]
+
+    def test__cached(self):
+        u"""Offers are taken from cache with their organizations."""
+        self.assertEqual(
+            self._titles(),
+            [u"Offer 0", u"Offer 1", u"Offer 2"],
+        )
+        with self.assertNumQueries(0):
+            offers = Offer.objects.cached('get_weightened')
+            self.assertEqual(offers[0].organization.name, u"Organization")
+            self.assertIsNone(offers[0].main_image)
+
+    def test__cached_invalidated_by_changes(self):
+        u"""Cached offers are refreshed when any offer changes."""
+        self._titles()
+        offer = Offer.objects.get(title=u"Offer 2")
+        offer.publish()
+        self.assertEqual(
+            self._titles(),
+            [u"Offer 2", u"Offer 0", u"Offer 1"],
+        )
+
+        Offer.objects.arrange([
+            Offer.objects.get(title=u"Offer 1").id,
+            offer.id,
+        ])
+        self.assertEqual(
+            self._titles(),
+            [u"Offer 1", u"Offer 0", u"Offer 2"],
+        )
+
+        offer.unpublish()
+        self.assertEqual(self._titles(), [u"Offer 1", u"Offer 0"])
+
+
+@unittest.skipUnless(
+    connection.vendor == 'postgresql',
+    u"Row locks are checked only on PostgreSQL.",
+)
+class TestOfferConcurrentPublish(TransactionTestCase):
+    u"""Tests for offers published at the same time."""
+
+    def setUp(self):
+        u"""Set up offers to be published."""
+        organization = Organization.objects.create(name=u'Organization')
+        for title, weight in ((u"Offer 0", 0), (u"Offer 1", 1),
+                              (u"Offer 2", 2)):
+            Offer.objects.create(
+                organization=organization,
+                title=title,
+                weight=weight,
+                started_at='2015-10-12 10:11:12',
+                finished_at='2015-12-12 11:12:13',
+            )
+
+    def test__publish_waits_for_top_offer(self):
+        u"""Offer is published after concurrent publication is committed."""
+
+        def publish():
+            u"""Publish offer using other database connection."""
+            try:
+                Offer.objects.get(title=u"Offer 2").publish()
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=publish)
+        with transaction.atomic():
+            Offer.objects.get(title=u"Offer 1").publish()
+            thread.start()
+            thread.join(1)
+            self.assertTrue(thread.is_alive())
+        thread.join(10)
+
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(dict(Offer.objects.values_list('title', 'weight')), {
+            u"Offer 0": 0,
+            u"Offer 1": -Offer.WEIGHT_STEP,
+            u"Offer 2": -2 * Offer.WEIGHT_STEP,
+        })
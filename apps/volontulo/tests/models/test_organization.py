@@ -4,9 +4,12 @@ u"""
 .. module:: test_organization
 """
 from __future__ import unicode_literals
+from django.contrib.auth.models import User
 from django.test import TestCase
 
 from apps.volontulo.models import Organization
+from apps.volontulo.models import OrganizationGallery
+from apps.volontulo.models import UserProfile
 
 
 class TestOrganization(TestCase):
@@ -26,3 +29,29 @@ class TestOrganization(TestCase):
             str(self.organization),
             "Sample organization"
         )
+
+    def test__set_as_main(self):
+        """Set organization main image."""
+        userprofile = UserProfile.objects.create(
+            user=User.objects.create_user(
+                'user@example.com',
+                'user@example.com',
+                'user',
+            )
+        )
+        first = OrganizationGallery(
+            organization=self.organization,
+            published_by=userprofile,
+            path='gallery/1.jpg',
+        )
+        first.set_as_main(self.organization)
+        second = OrganizationGallery(
+            organization=self.organization,
+            published_by=userprofile,
+            path='gallery/2.jpg',
+        )
+        second.set_as_main(self.organization)
+
+        organization = Organization.objects.get(id=self.organization.id)
+        self.assertEqual(organization.main_image, second)
+        self.assertFalse(OrganizationGallery.objects.get(id=first.id).is_main)
@@ -8,6 +8,7 @@ from django.test import TestCase
 
 from apps.volontulo.models import Organization
 from apps.volontulo.models import User
+from apps.volontulo.models import UserGallery
 from apps.volontulo.models import UserProfile
 
 
@@ -71,3 +72,17 @@ class TestUserProfile(TestCase):
         self.assertTrue(self.administrator_user.is_administrator)
         self.assertFalse(self.volunteer_user.is_administrator)
         self.assertFalse(self.organization_user.is_administrator)
+
+    def test__set_avatar(self):
+        """Uploaded avatar replaces previous one."""
+        self.assertIsNone(self.volunteer_user.get_avatar())
+        self.volunteer_user.set_avatar(UserGallery(image='profile/1.jpg'))
+        avatar = UserGallery(image='profile/2.jpg')
+        self.volunteer_user.set_avatar(avatar)
+
+        userprofile = UserProfile.objects.get(id=self.volunteer_user.id)
+        self.assertEqual(userprofile.get_avatar(), avatar)
+        self.assertEqual(
+            list(UserGallery.objects.filter(userprofile=userprofile)),
+            [avatar],
+        )
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: test_startup
+"""
+import importlib
+import sys
+
+from django.conf import settings
+from django.test import TestCase
+
+from apps.volontulo.tests import common
+
+
+class TestStartup(TestCase):
+    u"""Tests for importing application modules."""
+
+    @classmethod
+    def setUpTestData(cls):
+        u"""Set up administrator, whose email was read by forms import."""
+        common.initialize_administrator()
+
+    def test__urls_import(self):
+        u"""Importing URLconf with views and forms does not query database."""
+        names = [
+            name for name in sys.modules
+            if name == settings.ROOT_URLCONF or
+            name == 'apps.volontulo.urls' or
+            name == 'apps.volontulo.forms' or
+            name.startswith('apps.volontulo.views')
+        ]
+        modules = {name: sys.modules.pop(name) for name in names}
+        try:
+            with self.assertNumQueries(0):
+                importlib.import_module(settings.ROOT_URLCONF)
+        finally:
+            sys.modules.update(modules)
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: test_utils
+"""
+
+from django.contrib.auth.models import User
+from django.test import Client
+from django.test import TestCase
+
+from apps.volontulo.models import UserProfile
+from apps.volontulo.utils import get_administrators_emails
+from apps.volontulo.utils import invalidate_administrators_emails
+
+
+class TestAdministratorsEmails(TestCase):
+    u"""Tests for cached administrators emails."""
+
+    @classmethod
+    def setUpTestData(cls):
+        u"""Set up administrators."""
+        cls.superuser = User.objects.create_superuser(
+            u'root', u'root@example.com', u'root'
+        )
+        cls.admins = []
+        for i in range(3):
+            user = User.objects.create_user(
+                u'admin{}@example.com'.format(i),
+                u'admin{}@example.com'.format(i),
+                u'admin',
+            )
+            UserProfile.objects.create(user=user, is_administrator=True)
+            cls.admins.append(user)
+
+    def setUp(self):
+        u"""Set up each test."""
+        invalidate_administrators_emails()
+
+    def test__single_query(self):
+        u"""Emails are read by one query and cached afterwards."""
+        with self.assertNumQueries(1):
+            emails = get_administrators_emails()
+        self.assertEqual(emails, {
+            str(user.id): user.email for user in self.admins
+        })
+        with self.assertNumQueries(0):
+            self.assertEqual(get_administrators_emails(), emails)
+
+    def test__invalidation(self):
+        u"""Changes of administrators are visible immediately."""
+        get_administrators_emails()
+        profile = UserProfile.objects.get(user=self.admins[0])
+        profile.is_administrator = False
+        profile.save()
+        self.assertNotIn(str(self.admins[0].id), get_administrators_emails())
+
+        user = User.objects.get(id=self.admins[1].id)
+        user.email = u'changed@example.com'
+        user.save()
+        self.assertEqual(
+            get_administrators_emails()[str(user.id)],
+            u'changed@example.com',
+        )
+
+        User.objects.get(id=self.admins[2].id).delete()
+        self.assertNotIn(str(self.admins[2].id), get_administrators_emails())
+
+    def test__login(self):
+        u"""Logging in does not invalidate cached emails."""
+        get_administrators_emails()
+        client = Client()
+        self.assertTrue(client.login(
+            username=u'admin0@example.com',
+            password=u'admin',
+        ))
+        with self.assertNumQueries(0):
+            get_administrators_emails()
+
+    def test__superusers(self):
+        u"""Superusers are used when there are no administrators."""
+        UserProfile.objects.filter(is_administrator=True).update(
+            is_administrator=False
+        )
+        invalidate_administrators_emails()
+        self.assertEqual(get_administrators_emails(), {
+            str(self.superuser.id): u'root@example.com',
+        })
@@ -11,6 +11,8 @@ from django.test import TestCase
 from apps.volontulo.models import Offer
 from apps.volontulo.models import Organization
 from apps.volontulo.models import UserProfile
+from apps.volontulo.models import Webhook
+from apps.volontulo.models import WebhookDelivery
 
 
 class TestOffersJoin(TestCase):
@@ -25,6 +27,7 @@ class TestOffersJoin(TestCase):
             description='',
         )
         organization.save()
+        cls.organization = organization
 
         cls.offer = Offer.objects.create(
             organization=organization,
@@ -211,3 +214,34 @@ class TestOffersJoin(TestCase):
             response,
             'Zaloguj się, aby zapisać się do oferty.',
         )
+
+    def test_offers_join_queues_webhook_event(self):
+        """Test that joining offer queues event for organization webhook."""
+        Webhook.objects.create(
+            organization=self.organization,
+            url='http://crm.example.com/volontulo',
+        )
+        self.client.post('/login', {
+            'email': 'volunteer@example.com',
+            'password': 'vol123',
+        })
+
+        self.client.post('/offers/volontulo-offer/{}/join'.format(
+            self.offer.id
+        ), {
+            'email': 'volunteer@example.com',
+            'phone_no': '+42 42 42 42',
+            'fullname': 'Mister Volunteer',
+            'comments': 'Some important staff.',
+        })
+
+        delivery = WebhookDelivery.objects.get()
+        self.assertEqual(delivery.event, 'application.created')
+        self.assertEqual(delivery.status, 'queued')
+        self.assertIn('"fullname": "Mister Volunteer"', delivery.payload)
+        self.assertIn(
+            'http://testserver/offers/volontulo-offer/{}'.format(
+                self.offer.id
+            ),
+            delivery.payload,
+        )
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: test_offer_message
+"""
+
+import threading
+import unittest
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db import transaction
+from django.test import TestCase
+from django.test import TransactionTestCase
+
+from apps.volontulo.models import BulkMessage
+from apps.volontulo.models import Offer
+from apps.volontulo.models import Organization
+from apps.volontulo.models import QueuedEmail
+from apps.volontulo.models import UserProfile
+
+
+class TestOffersMessage(TestCase):
+    u"""Class responsible for testing messages to volunteers of offer."""
+
+    @classmethod
+    def setUpTestData(cls):
+        u"""Set up data for all tests."""
+        organization = Organization.objects.create(name=u'Schronisko')
+        cls.offer = Offer.objects.create(
+            title=u'Spacery z psami',
+            description=u'',
+            requirements=u'',
+            time_commitment=u'',
+            benefits=u'',
+            location=u'Kraków',
+            time_period=u'',
+            organization=organization,
+        )
+        user = User.objects.create_user(
+            u'organization@example.com',
+            u'organization@example.com',
+            u'organization',
+        )
+        UserProfile.objects.create(user=user).organizations.add(organization)
+        volunteer = User.objects.create_user(
+            u'volunteer@example.com', u'volunteer@example.com', u'volunteer'
+        )
+        UserProfile.objects.create(user=volunteer)
+        cls.offer.volunteers.add(volunteer)
+        cls.url = '/offers/spacery-z-psami/{}/message'.format(cls.offer.id)
+
+    def test__forbidden(self):
+        u"""Only members of organization send messages."""
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.client.login(
+            username=u'volunteer@example.com', password=u'volunteer'
+        )
+        self.assertEqual(self.client.post(self.url, {
+            'subject': u'Zbiórka',
+            'message': u'Spotykamy się w sobotę.',
+        }).status_code, 403)
+        self.assertFalse(BulkMessage.objects.exists())
+
+    def test__send(self):
+        u"""Message is queued without sending emails in request."""
+        self.client.login(
+            username=u'organization@example.com', password=u'organization'
+        )
+        response = self.client.get(self.url)
+        self.assertTemplateUsed(response, 'offers/message.html')
+        self.assertContains(response, u'Wiadomość otrzyma 1 wolontariuszy')
+
+        response = self.client.post(self.url, {
+            'subject': u'Zbiórka',
+            'message': u'Spotykamy się w sobotę.',
+        }, follow=True)
+
+        self.assertContains(
+            response, u'Wiadomość zostanie wysłana do wolontariuszy oferty.'
+        )
+        message = BulkMessage.objects.get()
+        self.assertEqual(message.subject, u'Zbiórka')
+        self.assertEqual(message.status, 'queued')
+        self.assertFalse(QueuedEmail.objects.exists())
+
+    def test__daily_limit(self):
+        u"""Organization sends limited number of messages a day."""
+        self.client.login(
+            username=u'organization@example.com', password=u'organization'
+        )
+        for _ in range(BulkMessage.objects.MAX_PER_DAY + 1):
+            response = self.client.post(self.url, {
+                'subject': u'Zbiórka',
+                'message': u'Spotykamy się w sobotę.',
+            })
+
+        self.assertContains(response, u'spróbuj jutro')
+        self.assertEqual(
+            BulkMessage.objects.count(), BulkMessage.objects.MAX_PER_DAY
+        )
+
+
+@unittest.skipUnless(
+    connection.vendor == 'postgresql',
+    u"Row locks are checked only on PostgreSQL.",
+)
+class TestOffersMessageLimit(TransactionTestCase):
+    u"""Tests for daily limit of messages sent at the same time."""
+
+    def test__concurrent_messages(self):
+        u"""Message waits for concurrent one and is refused over limit."""
+        organization = Organization.objects.create(name=u'Schronisko')
+        offer = Offer.objects.create(
+            title=u'Spacery z psami',
+            organization=organization,
+        )
+        sender = User.objects.create_user(
+            u'organization@example.com',
+            u'organization@example.com',
+            u'organization',
+        )
+        for _ in range(BulkMessage.objects.MAX_PER_DAY - 1):
+            BulkMessage.objects.create_within_limit(
+                offer, sender, u'Zbiórka', u'Spotykamy się w sobotę.'
+            )
+        created = []
+
+        def send():
+            u"""Create message using other database connection."""
+            try:
+                created.append(BulkMessage.objects.create_within_limit(
+                    offer, sender, u'Zbiórka', u'Spotykamy się w niedzielę.'
+                ))
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=send)
+        with transaction.atomic():
+            self.assertIsNotNone(BulkMessage.objects.create_within_limit(
+                offer, sender, u'Zbiórka', u'Spotykamy się w sobotę.'
+            ))
+            thread.start()
+            thread.join(1)
+            self.assertTrue(thread.is_alive())
+        thread.join(10)
+
+        self.assertEqual(created, [None])
+        self.assertEqual(
+            BulkMessage.objects.count(), BulkMessage.objects.MAX_PER_DAY
+        )
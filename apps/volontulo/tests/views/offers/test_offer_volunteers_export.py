@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: test_offer_volunteers_export
+"""
+
+from django.test import Client
+from django.test import TestCase
+
+from apps.volontulo.tests.views.offers.commons import TestOffersCommons
+
+
+class TestOffersVolunteersExport(TestOffersCommons, TestCase):
+    u"""Tests for downloading CSV lists of volunteers."""
+
+    @classmethod
+    def setUpTestData(cls):
+        u"""Set up offer joined by volunteer."""
+        super(TestOffersVolunteersExport, cls).setUpTestData()
+        cls.volunteer.phone_no = u'600100200'
+        cls.volunteer.save()
+        cls.active_offer.volunteers.add(cls.volunteer.user)
+        cls.offer_url = '/offers/volontulo-offer/{}/volunteers.csv'.format(
+            cls.active_offer.id
+        )
+        cls.organization_url = (
+            '/organizations/organization-name/{}/volunteers.csv'.format(
+                cls.organization.id
+            )
+        )
+
+    def setUp(self):
+        u"""Set up each test."""
+        self.client = Client()
+
+    def _content(self, response):
+        u"""Return decoded content of streaming response."""
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test__anonymous(self):
+        u"""Anonymous users are not allowed to download lists."""
+        response = self.client.get(self.offer_url)
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get(self.organization_url)
+        self.assertEqual(response.status_code, 302)
+
+    def test__volunteer(self):
+        u"""Users not related to organization are not allowed."""
+        self.client.login(
+            username=u'volunteer@example.com',
+            password=u'123volunteer',
+        )
+        response = self.client.get(self.offer_url)
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get(self.organization_url)
+        self.assertEqual(response.status_code, 403)
+
+    def test__nonexisting_offer(self):
+        u"""Error 404 is returned for unknown offer."""
+        self.client.login(
+            username=u'admin@example.com',
+            password=u'123admin',
+        )
+        response = self.client.get('/offers/some-slug/4242/volunteers.csv')
+        self.assertEqual(response.status_code, 404)
+
+    def test__organization_member(self):
+        u"""Members of organization download CSV of offer volunteers."""
+        self.client.login(
+            username=u'cls.organization@example.com',
+            password=u'123org',
+        )
+        response = self.client.get(self.offer_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(
+            response['Content-Disposition'],
+            'attachment; filename="wolontariusze-volontulo-offer.csv"',
+        )
+        self.assertEqual(self._content(response).splitlines(), [
+            u'﻿ID,Imię,Nazwisko,Email,Telefon,Oferta',
+            u'{},,,volunteer@example.com,600100200,volontulo offer'.format(
+                self.volunteer.user.id
+            ),
+        ])
+
+    def test__organization_export(self):
+        u"""Administrators download CSV of organization volunteers."""
+        self.inactive_offer.volunteers.add(self.volunteer.user)
+        self.client.login(
+            username=u'admin@example.com',
+            password=u'123admin',
+        )
+        response = self.client.get(self.organization_url)
+        self.assertEqual(response.status_code, 200)
+        lines = self._content(response).splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(all(
+            line.startswith(str(self.volunteer.user.id)) for line in lines[1:]
+        ))
@@ -74,3 +74,14 @@ class TestOffersArchived(TestCase):
             response,
             'Brak ofert spełniających podane kryteria',
         )
+
+    def test_offers_archived_page_cached(self):
+        """Offers archive page is served from cache until offers change."""
+        self.client.get('/offers/archived')
+        with self.assertNumQueries(0):
+            response = self.client.get('/offers/archived')
+        self.assertEqual(len(response.context['offers']), 15)
+
+        Offer.objects.filter(title='Offer 1-0 title').get().reject()
+        response = self.client.get('/offers/archived')
+        self.assertEqual(len(response.context['offers']), 14)
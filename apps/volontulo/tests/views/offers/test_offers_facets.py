@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+
+"""
+.. module:: test_offers_facets
+"""
+
+import datetime
+
+from django.core.cache import cache
+from django.test import Client
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.volontulo.lib.facets import _date_ranges
+from apps.volontulo.models import Offer
+from apps.volontulo.models import Organization
+
+
+class TestOffersFacets(TestCase):
+    """Class responsible for testing offers' list facets."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Set up data for all tests."""
+        cls.azyl = Organization.objects.create(name='Azyl')
+        cls.biblioteka = Organization.objects.create(name='Biblioteka')
+        common_offer_data = {
+            'description': '',
+            'time_commitment': '',
+            'benefits': '',
+            'offer_status': 'published',
+            'recruitment_status': 'open',
+            'action_status': 'ongoing',
+        }
+        Offer.objects.create(
+            organization=cls.azyl,
+            title='Spacery z psami',
+            location='Kraków',
+            constant_coop=True,
+            **common_offer_data
+        )
+        Offer.objects.create(
+            organization=cls.azyl,
+            title='Karmienie kotów',
+            location='Poznań',
+            started_at=timezone.now() + datetime.timedelta(days=60),
+            **common_offer_data
+        )
+        Offer.objects.create(
+            organization=cls.biblioteka,
+            title='Pomoc w bibliotece',
+            location='Kraków',
+            **dict(common_offer_data, recruitment_status='supplemental')
+        )
+        Offer.objects.create(
+            organization=cls.biblioteka,
+            title='Nieaktywna oferta',
+            location='Kraków',
+            **dict(common_offer_data, offer_status='unpublished')
+        )
+
+    def setUp(self):
+        """Set up each test."""
+        self.client = Client()
+        cache.clear()
+
+    def _facets(self, **params):
+        """Return offers titles and facets counts keyed by facet name."""
+        response = self.client.get('/offers', params)
+        self.assertEqual(response.status_code, 200)
+        return (
+            sorted(o.title for o in response.context['offers']),
+            {
+                facet['name']: {
+                    value['value']: value['count']
+                    for value in facet['values']
+                } for facet in response.context['facets']
+            },
+        )
+
+    def test_facets_counts(self):
+        """Test counting active offers for each facet value."""
+        _, facets = self._facets()
+        self.assertEqual(facets['location'], {'Kraków': 2, 'Poznań': 1})
+        self.assertEqual(facets['organization'], {
+            str(self.azyl.id): 2,
+            str(self.biblioteka.id): 1,
+        })
+        self.assertEqual(facets['action_status'], {'ongoing': 3})
+        self.assertEqual(
+            facets['recruitment_status'],
+            {'open': 2, 'supplemental': 1},
+        )
+        self.assertEqual(facets['constant_coop'], {'1': 1, '0': 2})
+        self.assertEqual(facets['started'], {'none': 2, 'later': 1})
+        self.assertEqual(facets['finished'], {'none': 3})
+
+    def test_facets_filtering(self):
+        """Test filtering offers by selected facets values."""
+        titles, facets = self._facets(location='Kraków')
+        self.assertEqual(titles, ['Pomoc w bibliotece', 'Spacery z psami'])
+        # other values of selected facet are still available:
+        self.assertEqual(facets['location'], {'Kraków': 2, 'Poznań': 1})
+        self.assertEqual(facets['organization'], {
+            str(self.azyl.id): 1,
+            str(self.biblioteka.id): 1,
+        })
+
+        titles, facets = self._facets(
+            location='Kraków',
+            organization=self.azyl.id,
+        )
+        self.assertEqual(titles, ['Spacery z psami'])
+        self.assertEqual(facets['location'], {'Kraków': 1, 'Poznań': 1})
+        self.assertEqual(facets['organization'], {
+            str(self.azyl.id): 1,
+            str(self.biblioteka.id): 1,
+        })
+        self.assertEqual(facets['recruitment_status'], {'open': 1})
+
+        titles, _ = self._facets(started='later', constant_coop='0')
+        self.assertEqual(titles, ['Karmienie kotów'])
+
+    def test_facets_local_date_ranges(self):
+        """Test that date ranges start at local midnight."""
+        with self.settings(TIME_ZONE='Europe/Warsaw'):
+            today = _date_ranges('started_at')['past'].children[0][1]
+            local_today = timezone.localtime(today)
+            self.assertEqual(local_today.time(), datetime.time())
+            self.assertEqual(
+                local_today.date(),
+                timezone.localtime(timezone.now()).date(),
+            )
+
+    def test_facets_invalid_values(self):
+        """Test that invalid facets values are ignored."""
+        titles, _ = self._facets(
+            organization='foo',
+            action_status='foo',
+            started='foo',
+        )
+        self.assertEqual(len(titles), 3)
+
+    def test_facets_links(self):
+        """Test links toggling facets values."""
+        response = self.client.get('/offers', {'location': 'Poznań'})
+        self.assertEqual(
+            response.context['filters_query'],
+            'location=Pozna%C5%84',
+        )
+        location = response.context['facets'][0]
+        # selected value is unselected, the other one replaces it:
+        self.assertEqual(
+            location['values'][0]['query'], 'location=Krak%C3%B3w'
+        )
+        self.assertFalse(location['values'][0]['selected'])
+        self.assertEqual(location['values'][1]['query'], '')
+        self.assertTrue(location['values'][1]['selected'])
+        organization = response.context['facets'][1]
+        self.assertEqual(
+            organization['values'][0]['query'],
+            'location=Pozna%C5%84&organization={}'.format(self.azyl.id),
+        )
+
+    def test_facets_cache_invalidation(self):
+        """Test that counts are cached until offers change."""
+        with self.assertNumQueries(2):
+            self._facets()
+        with self.assertNumQueries(0):
+            self._facets()
+
+        offer = Offer.objects.get(title='Spacery z psami')
+        offer.close_offer()
+        _, facets = self._facets()
+        self.assertEqual(facets['location'], {'Kraków': 1, 'Poznań': 1})
@@ -4,9 +4,17 @@
 .. module:: test_offers_list
 """
 
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.db import transaction
 from django.test import Client
 from django.test import TestCase
 
+from apps.volontulo.models import Offer
+from apps.volontulo.models import OfferImage
+from apps.volontulo.models import Organization
+from apps.volontulo.models import UserProfile
 from apps.volontulo.tests.views.offers.commons import TestOffersCommons
 
 
@@ -66,3 +74,145 @@ class TestOffersList(TestOffersCommons, TestCase):
         self.assertIn('offers', response.context)
         # pylint: disable=no-member
         self.assertEqual(len(response.context['offers']), 2)
+
+
+class TestOffersListPagination(TestCase):
+    """Class responsible for testing offers' list pagination."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Set up data for all tests."""
+        organization = Organization.objects.create(name='Organization')
+        for i in range(25):
+            offer = Offer.objects.create(
+                organization=organization,
+                title='Offer {}'.format(i),
+                description='',
+                time_commitment='',
+                benefits='',
+                location='',
+                offer_status='published',
+                recruitment_status='open',
+                action_status='ongoing',
+                weight=i // 2,
+            )
+            offer.save_offer_image(
+                OfferImage(path='offers/{}.jpg'.format(i)),
+                UserProfile.objects.create(
+                    user=User.objects.create_user(
+                        'user{}@example.com'.format(i),
+                        'user{}@example.com'.format(i),
+                        '123user',
+                    )
+                ),
+            )
+
+    def setUp(self):
+        """Set up each test."""
+        self.client = Client()
+        cache.clear()
+
+    def test_offers_list_pages(self):
+        """Test walking through pages of offers' list."""
+        response = self.client.get('/offers')
+        first_page = response.context['offers']
+        self.assertEqual(len(first_page), 20)
+        self.assertEqual(
+            response.context['next_cursor'],
+            '9_{}'.format(first_page[-1].id),
+        )
+
+        response = self.client.get(
+            '/offers?after={}'.format(response.context['next_cursor'])
+        )
+        second_page = response.context['offers']
+        self.assertEqual(len(second_page), 5)
+        self.assertIsNone(response.context['next_cursor'])
+        self.assertEqual(
+            [o.title for o in first_page + second_page],
+            ['Offer {}'.format(i) for i in range(25)],
+        )
+
+    def test_offers_list_constant_number_of_queries(self):
+        """Test that number of queries does not depend on page size.
+
+        Facets are counted once and then taken from cache.
+        """
+        with self.assertNumQueries(2):
+            response = self.client.get('/offers')
+        with self.assertNumQueries(1):
+            self.client.get(
+                '/offers?after={}'.format(response.context['next_cursor'])
+            )
+
+    def test_offers_list_offer_without_weight(self):
+        """Test that offer on page boundary always has weight for cursor."""
+        boundary = Offer.objects.get(title='Offer 19')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Offer.objects.filter(id=boundary.id).update(weight=None)
+
+        response = self.client.get('/offers')
+        self.assertEqual(
+            response.context['next_cursor'], '9_{}'.format(boundary.id)
+        )
+        response = self.client.get(
+            '/offers?after={}'.format(response.context['next_cursor'])
+        )
+        self.assertEqual(len(response.context['offers']), 5)
+
+    def test_offers_list_invalid_cursor(self):
+        """Test offers' list with malformed cursor."""
+        response = self.client.get('/offers?after=foo')
+        self.assertEqual(response.status_code, 404)
+
+
+class TestOffersListNear(TestCase):
+    """Class responsible for testing offers' list near locality."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Set up data for all tests."""
+        organization = Organization.objects.create(name='Organization')
+        for location in ('Kraków', 'Wieliczka', 'Katowice', 'Gdańsk'):
+            Offer.objects.create(
+                organization=organization,
+                title=location,
+                description='',
+                time_commitment='',
+                benefits='',
+                location=location,
+                offer_status='published',
+                recruitment_status='open',
+                action_status='ongoing',
+            )
+
+    def setUp(self):
+        """Set up each test."""
+        self.client = Client()
+
+    def test_offers_list_near(self):
+        """Test listing offers nearest to locality."""
+        response = self.client.get('/offers', {'near': 'Wieliczka'})
+        self.assertEqual(
+            [o.title for o in response.context['offers']],
+            ['Wieliczka', 'Kraków', 'Katowice', 'Gdańsk'],
+        )
+        self.assertIsNone(response.context['next_cursor'])
+        self.assertContains(response, 'Kraków (12 km)')
+
+    def test_offers_list_near_radius(self):
+        """Test listing offers within radius from locality."""
+        response = self.client.get(
+            '/offers',
+            {'near': 'Kraków', 'radius': '25'},
+        )
+        self.assertEqual(
+            [o.title for o in response.context['offers']],
+            ['Kraków', 'Wieliczka'],
+        )
+
+    def test_offers_list_near_unknown(self):
+        """Test listing offers near unknown locality."""
+        response = self.client.get('/offers', {'near': 'Atlantyda'})
+        self.assertEqual(len(response.context['offers']), 0)
+        self.assertContains(response, 'Nie znaleziono miejscowości')
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+
+"""
+.. module:: test_offers_reorder
+"""
+
+import json
+
+from django.test import Client
+from django.test import TestCase
+
+from apps.volontulo.models import Offer
+from apps.volontulo.tests.views.offers.commons import TestOffersCommons
+
+
+class TestOffersReorder(TestOffersCommons, TestCase):
+    """Class responsible for testing offers' reorder."""
+
+    def setUp(self):
+        """Set up each test."""
+        self.client = Client()
+        self.client.post('/login', {
+            'email': 'admin@example.com',
+            'password': '123admin',
+        })
+        self.offers = [self.inactive_offer, self.active_offer]
+
+    def _weights(self):
+        """Return current weights of offers."""
+        return [Offer.objects.get(id=o.id).weight for o in self.offers]
+
+    def test_reorder_form(self):
+        """Test saving weights submitted by reorder form."""
+        # session, user and profile checked by permissions, then savepoint,
+        # select for update, update, release savepoint:
+        with self.assertNumQueries(7):
+            response = self.client.post('/offers/reorder/', {
+                'submit': 'reorder',
+                'weight_{}'.format(self.offers[0].id): '5',
+                'weight_{}'.format(self.offers[1].id): '3',
+            })
+        self.assertRedirects(response, '/offers', 302, 200)
+        self.assertEqual(self._weights(), [5, 3])
+
+    def test_reorder_form_invalid_weight(self):
+        """Test reorder form with weight that is not a number."""
+        response = self.client.post('/offers/reorder/', {
+            'submit': 'reorder',
+            'weight_{}'.format(self.offers[0].id): '5',
+            'weight_{}'.format(self.offers[1].id): 'top',
+        }, follow=True)
+        self.assertContains(
+            response,
+            u'Wagi ofert muszą być liczbami całkowitymi.',
+        )
+        self.assertEqual(self._weights(), [0, 0])
+
+    def test_reorder_form_missing_offer(self):
+        """Test reorder form with offer which does not exist."""
+        response = self.client.post('/offers/reorder/', {
+            'submit': 'reorder',
+            'weight_{}'.format(self.offers[0].id): '5',
+            'weight_999': '3',
+        }, follow=True)
+        self.assertContains(response, u'Część ofert nie istnieje.')
+        self.assertEqual(self._weights(), [0, 0])
+
+    def test_reorder_json_weights(self):
+        """Test saving weights sent as JSON."""
+        response = self.client.post(
+            '/offers/reorder/',
+            json.dumps({'weights': {
+                str(self.offers[0].id): 7,
+                str(self.offers[1].id): 0,
+            }}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content.decode()), {
+            'updated': 1,
+        })
+        self.assertEqual(self._weights(), [7, 0])
+
+    def test_reorder_json_order(self):
+        """Test saving order of offers sent as JSON."""
+        Offer.objects.filter(id=self.offers[0].id).update(weight=10)
+        response = self.client.post(
+            '/offers/reorder/',
+            json.dumps({'order': [self.offers[0].id, self.offers[1].id]}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._weights(), [0, 10])
+
+    def test_reorder_json_invalid(self):
+        """Test sending malformed or invalid JSON."""
+        for body in ('not json', '{}', '{"order": [1, 1]}',
+                     '{"weights": {"999": 1}}'):
+            response = self.client.post(
+                '/offers/reorder/',
+                body,
+                content_type='application/json',
+            )
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(self._weights(), [0, 0])
+
+    def test_reorder_forbidden(self):
+        """Test that only administrators reorder offers."""
+        order = json.dumps({'order': [self.offers[1].id, self.offers[0].id]})
+        for credentials in (
+                None,
+                ('volunteer@example.com', '123volunteer'),
+                ('cls.organization@example.com', '123org'),
+        ):
+            client = Client()
+            if credentials:
+                client.post('/login', {
+                    'email': credentials[0],
+                    'password': credentials[1],
+                })
+            self.assertEqual(
+                client.get('/offers/reorder/').status_code, 403
+            )
+            response = client.post(
+                '/offers/reorder/', order, content_type='application/json'
+            )
+            self.assertEqual(response.status_code, 403)
+            response = client.post('/offers/reorder/', {
+                'submit': 'reorder',
+                'weight_{}'.format(self.offers[0].id): '5',
+            })
+            self.assertEqual(response.status_code, 403)
+        self.assertEqual(self._weights(), [0, 0])
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+
+"""
+.. module:: test_offers_search
+"""
+
+from django.test import Client
+from django.test import TestCase
+from django.test import override_settings
+
+from apps.volontulo.lib import search_index
+from apps.volontulo.models import Offer
+from apps.volontulo.models import Organization
+
+
+@override_settings(OFFERS_SEARCH_BACKEND='index')
+class TestOffersSearch(TestCase):
+    """Class responsible for testing offers' search."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Set up data for all tests."""
+        cls.organization = Organization.objects.create(name='Schronisko Azyl')
+        common_offer_data = {
+            'organization': cls.organization,
+            'description': '',
+            'time_commitment': '',
+            'benefits': '',
+            'offer_status': 'published',
+            'recruitment_status': 'open',
+            'action_status': 'ongoing',
+        }
+        Offer.objects.create(
+            title='Spacery z psami',
+            location='Kraków',
+            **common_offer_data
+        )
+        Offer.objects.create(
+            title='Pomoc w bibliotece',
+            location='Kraków, Nowa Huta',
+            requirements='Wolontariat dla studentów',
+            **common_offer_data
+        )
+        Offer.objects.create(
+            title='Sprzątanie lasu',
+            location='Poznań',
+            **common_offer_data
+        )
+        common_offer_data['offer_status'] = 'unpublished'
+        Offer.objects.create(
+            title='Spacery po Krakowie',
+            location='Kraków',
+            **common_offer_data
+        )
+
+    def setUp(self):
+        """Set up each test."""
+        self.client = Client()
+        search_index.reset_index()
+
+    def tearDown(self):
+        """Drop search index built from test data."""
+        search_index.reset_index()
+
+    def _search(self, query, **params):
+        """Return titles of found offers."""
+        params['q'] = query
+        response = self.client.get('/offers/filter', params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'offers/search.html')
+        return sorted(o.title for o in response.context['offers'])
+
+    def test_search_by_location(self):
+        """Test searching only active offers by location."""
+        self.assertEqual(
+            self._search('kraków'),
+            ['Pomoc w bibliotece', 'Spacery z psami'],
+        )
+
+    def test_search_requires_all_words(self):
+        """Test that offer has to match all words of phrase."""
+        self.assertEqual(
+            self._search('Kraków wolontariat'),
+            ['Pomoc w bibliotece'],
+        )
+
+    def test_search_by_organization_name(self):
+        """Test searching offers by organization name."""
+        self.assertEqual(len(self._search('azyl')), 3)
+
+    def test_search_skips_stale_offers(self):
+        """Test that offers changed behind index are not counted."""
+        self.assertEqual(len(self._search('azyl')), 3)
+        # update without signals leaves offer in search index:
+        Offer.objects.filter(title='Sprzątanie lasu').update(
+            offer_status='unpublished'
+        )
+
+        response = self.client.get('/offers/filter', {'q': 'azyl'})
+        self.assertEqual(response.context['offers'].paginator.count, 2)
+        self.assertEqual(len(response.context['offers']), 2)
+
+    def test_search_without_phrase(self):
+        """Test search without any phrase."""
+        self.assertEqual(self._search(''), [])
+
+    def test_search_invalid_page(self):
+        """Test search with page out of range."""
+        response = self.client.get('/offers/filter', {'q': 'a', 'page': 5})
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(OFFERS_SEARCH_BACKEND='database')
+class TestOffersDatabaseSearch(TestOffersSearch):
+    """Class responsible for testing offers' search in database."""
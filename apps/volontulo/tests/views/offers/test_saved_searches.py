@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: test_saved_searches
+"""
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from apps.volontulo.models import SavedSearch
+
+
+class TestSavedSearches(TestCase):
+    u"""Class responsible for testing saved searches of user."""
+
+    @classmethod
+    def setUpTestData(cls):
+        u"""Set up data for all tests."""
+        cls.user = User.objects.create_user(
+            u'volunteer@example.com', u'volunteer@example.com', u'volunteer'
+        )
+
+    def test__anonymous(self):
+        u"""Anonymous user is redirected to login page."""
+        response = self.client.get('/offers/saved-searches')
+
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('/login', response['Location'])
+
+    def test__save_and_delete(self):
+        u"""User saves search phrase and deletes it."""
+        self.client.login(
+            username=u'volunteer@example.com', password=u'volunteer'
+        )
+
+        response = self.client.post(
+            '/offers/saved-searches', {'query': u'Warszawa zwierzęta'},
+            follow=True,
+        )
+
+        self.assertTemplateUsed(response, 'offers/saved_searches.html')
+        self.assertContains(response, u'Warszawa zwierzęta')
+        search = SavedSearch.objects.get(user=self.user)
+        self.assertEqual(search.terms_count, 2)
+
+        self.client.post('/offers/saved-searches', {'delete': search.id})
+        self.assertFalse(SavedSearch.objects.exists())
+
+    def test__delete_invalid(self):
+        u"""Invalid or other user's saved search is not found."""
+        search = SavedSearch.objects.create_search(self.user, u'Warszawa')
+        User.objects.create_user(
+            u'other@example.com', u'other@example.com', u'other'
+        )
+        self.client.login(username=u'other@example.com', password=u'other')
+
+        for value in (u'foo', search.id):
+            response = self.client.post(
+                '/offers/saved-searches', {'delete': value}
+            )
+            self.assertEqual(response.status_code, 404)
+        self.assertTrue(SavedSearch.objects.exists())
+
+    def test__empty_query(self):
+        u"""Search phrase without words is not saved."""
+        self.client.login(
+            username=u'volunteer@example.com', password=u'volunteer'
+        )
+
+        response = self.client.post(
+            '/offers/saved-searches', {'query': u'  '}, follow=True,
+        )
+
+        self.assertContains(response, u'Podaj słowa, których szukasz.')
+        self.assertFalse(SavedSearch.objects.exists())
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: test_api
+"""
+
+import json
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.test import Client
+from django.test import TestCase
+
+from apps.volontulo.models import Offer
+from apps.volontulo.models import Organization
+
+
+def _json(response):
+    u"""Return decoded content of JSON response."""
+    return json.loads(
+        response.content.decode('utf-8'),
+        object_pairs_hook=OrderedDict,
+    )
+
+
+class TestApi(TestCase):
+    u"""Tests for read-only JSON API."""
+
+    @classmethod
+    def setUpTestData(cls):
+        u"""Set up data for all tests."""
+        cls.organizations = [
+            Organization.objects.create(name=u'Organization {}'.format(i))
+            for i in range(3)
+        ]
+        for i in range(5):
+            Offer.objects.create(
+                organization=cls.organizations[i % 2],
+                title=u'Offer {}'.format(i),
+                description=u'Description {}'.format(i),
+                time_commitment=u'',
+                benefits=u'',
+                location=u'Kraków',
+                offer_status='published',
+                recruitment_status='open',
+                action_status='ongoing',
+                weight=i,
+            )
+        Offer.objects.create(
+            organization=cls.organizations[0],
+            title=u'Unpublished',
+            description=u'',
+            time_commitment=u'',
+            benefits=u'',
+            location=u'',
+            offer_status='unpublished',
+        )
+
+    def setUp(self):
+        u"""Set up each test."""
+        self.client = Client()
+        cache.clear()
+
+    def test__offers_list(self):
+        u"""Active offers are listed page by page."""
+        response = self.client.get('/api/v1/offers', {'limit': 3})
+        self.assertEqual(response.status_code, 200)
+        data = _json(response)
+        self.assertEqual(
+            [offer['title'] for offer in data['results']],
+            [u'Offer 0', u'Offer 1', u'Offer 2'],
+        )
+        offer = data['results'][0]
+        self.assertEqual(offer['organization'], {
+            'id': self.organizations[0].id,
+            'name': u'Organization 0',
+        })
+        self.assertEqual(offer['latitude'], 50.0647)
+        self.assertIsNone(offer['main_image'])
+        self.assertTrue(offer['url'].startswith('http://testserver/offers/'))
+
+        response = self.client.get(data['next'])
+        data = _json(response)
+        self.assertEqual(
+            [offer['title'] for offer in data['results']],
+            [u'Offer 3', u'Offer 4'],
+        )
+        self.assertIsNone(data['next'])
+
+    def test__offers_list_fields(self):
+        u"""Only requested fields are loaded and returned."""
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                '/api/v1/offers',
+                {'fields': 'id,title,organization', 'limit': 1},
+            )
+        self.assertEqual(
+            list(_json(response)['results'][0]),
+            ['id', 'title', 'organization'],
+        )
+
+    def test__offers_list_errors(self):
+        u"""Invalid parameters are reported."""
+        for params in ({'fields': 'id,foo'}, {'limit': 0}, {'limit': 'a'},
+                       {'after': 'foo'}):
+            response = self.client.get('/api/v1/offers', params)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('error', _json(response))
+        response = self.client.post('/api/v1/offers')
+        self.assertEqual(response.status_code, 405)
+
+    def test__offer_details(self):
+        u"""Published offers are shown."""
+        offer = Offer.objects.get(title=u'Offer 1')
+        response = self.client.get('/api/v1/offers/{}'.format(offer.id))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(_json(response)['description'], u'Description 1')
+
+        offer = Offer.objects.get(title=u'Unpublished')
+        response = self.client.get('/api/v1/offers/{}'.format(offer.id))
+        self.assertEqual(response.status_code, 404)
+
+    def test__organizations(self):
+        u"""Organizations are listed with their active offers."""
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                '/api/v1/organizations',
+                {'limit': 2, 'fields': 'name,offers'},
+            )
+        data = _json(response)
+        self.assertEqual(data['results'], [
+            {'name': u'Organization 0', 'offers': [
+                {'id': Offer.objects.get(title=u'Offer {}'.format(i)).id,
+                 'title': u'Offer {}'.format(i)} for i in (0, 2, 4)
+            ]},
+            {'name': u'Organization 1', 'offers': [
+                {'id': Offer.objects.get(title=u'Offer {}'.format(i)).id,
+                 'title': u'Offer {}'.format(i)} for i in (1, 3)
+            ]},
+        ])
+        data = _json(self.client.get(data['next']))
+        self.assertEqual(
+            [organization['name'] for organization in data['results']],
+            [u'Organization 2'],
+        )
+        self.assertIsNone(data['next'])
+
+        organization = self.organizations[2]
+        response = self.client.get(
+            '/api/v1/organizations/{}'.format(organization.id)
+        )
+        self.assertEqual(_json(response)['offers'], [])
+        response = self.client.get('/api/v1/organizations/0')
+        self.assertEqual(response.status_code, 404)
+
+    def test__conditional_get(self):
+        u"""Unchanged resources are not sent again nor queried."""
+        offer = Offer.objects.get(title=u'Offer 0')
+        offer.save()
+        response = self.client.get('/api/v1/offers')
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                '/api/v1/offers',
+                HTTP_IF_NONE_MATCH=etag,
+            )
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(
+            '/api/v1/offers',
+            {'limit': 1},
+            HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertEqual(response.status_code, 200)
+
+        offer.close_offer()
+        response = self.client.get('/api/v1/offers', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
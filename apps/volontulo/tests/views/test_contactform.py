@@ -3,7 +3,10 @@
 u"""
 .. module:: test_contactform
 """
+from io import StringIO
+
 from django.core import mail
+from django.core.management import call_command
 from django.test import Client
 from django.test import TestCase
 
@@ -66,6 +69,23 @@ class TestPages(TestCase):
         self.assertContains(response, u'Formularz kontaktowy')
         # pylint: disable=no-member
         self.assertIn('contact_form', response.context)
+        self.assertContains(response, self.test_admin_email)
+
+    def test__new_administrator_listed(self):
+        u"""Administrators added after startup are listed in form."""
+        self.client.post('/login', {
+            'email': u'volunteer1@example.com',
+            'password': 'volunteer1',
+        })
+        self.client.get('/contact')
+        common.initialize_administrator(
+            username=u'new_admin@example.com',
+            email=u'new_admin@example.com',
+        )
+
+        response = self.client.get('/contact')
+
+        self.assertContains(response, u'new_admin@example.com')
 
     # pylint: disable=invalid-name
     def test__get_contact_with_administrator_form_by_organization(self):
@@ -158,6 +178,8 @@ class TestPages(TestCase):
         self.assertContains(response, u'Formularz kontaktowy')
         # pylint: disable=no-member
         self.assertIn('contact_form', response.context)
+        self.assertEqual(len(mail.outbox), 0)
+        call_command('send_queued_mail', stdout=StringIO())
         self.assertEqual(len(mail.outbox), 1)
         self.assertEqual(mail.outbox[0].subject, u'Kontakt z administratorem')
         self.assertContains(response, u'Email został wysłany.')
@@ -228,6 +250,8 @@ class TestPages(TestCase):
         self.assertContains(response, u'Formularz kontaktowy')
         # pylint: disable=no-member
         self.assertIn('contact_form', response.context)
+        self.assertEqual(len(mail.outbox), 0)
+        call_command('send_queued_mail', stdout=StringIO())
         self.assertEqual(len(mail.outbox), 1)
         self.assertEqual(mail.outbox[0].subject, u'Kontakt z administratorem')
         self.assertContains(response, u'Email został wysłany.')
@@ -3,8 +3,11 @@
 u"""
 .. module:: test_newsletter
 """
+from django.contrib.auth.models import User
 from django.test import TestCase
 
+from apps.volontulo.models import UserProfile
+
 
 class TestNews(TestCase):
     u"""Class responsible for testing newsletter specific views."""
@@ -16,3 +19,41 @@ class TestNews(TestCase):
 
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'newsletter_signup.html')
+
+    def test__subscribe(self):
+        u"""Logged in user subscribes and unsubscribes newsletter."""
+        user = User.objects.create_user(
+            u'volunteer@example.com', u'volunteer@example.com', u'volunteer'
+        )
+        UserProfile.objects.create(user=user)
+        self.client.login(
+            username=u'volunteer@example.com', password=u'volunteer'
+        )
+
+        response = self.client.post(
+            '/newsletter', {'newsletter': 'subscribe'}, follow=True
+        )
+
+        self.assertContains(response, u'Zapisałeś się do newslettera.')
+        self.assertTrue(UserProfile.objects.get(user=user).newsletter)
+        self.client.post('/newsletter', {'newsletter': 'unsubscribe'})
+        self.assertFalse(UserProfile.objects.get(user=user).newsletter)
+
+    def test__unsubscribe_link(self):
+        u"""Newsletter is unsubscribed by link from email without login."""
+        user = User.objects.create_user(
+            u'volunteer@example.com', u'volunteer@example.com', u'volunteer'
+        )
+        profile = UserProfile.objects.create(user=user, newsletter=True)
+        url = '/newsletter/unsubscribe/{}'.format(profile.uuid)
+
+        response = self.client.get(url)
+        self.assertTemplateUsed(response, 'newsletter_unsubscribe.html')
+        self.assertTrue(UserProfile.objects.get(user=user).newsletter)
+
+        self.client.post(url)
+        self.assertFalse(UserProfile.objects.get(user=user).newsletter)
+        self.assertEqual(
+            self.client.get('/newsletter/unsubscribe/unknown').status_code,
+            404,
+        )
@@ -3,7 +3,10 @@
 u"""
 .. module:: test_view_organization
 """
+from io import StringIO
+
 from django.core import mail
+from django.core.management import call_command
 
 from apps.volontulo.tests.views.test_organizations import TestOrganizations
 
@@ -210,6 +213,8 @@ class TestCreateOrganization(TestOrganizations):
             '/organizations/organization-2/{}'.format(self.organization2.id),
             form_params
         )
+        self.assertEqual(len(mail.outbox), 0)
+        call_command('send_queued_mail', stdout=StringIO())
         self.assertEqual(len(mail.outbox), 1)
         self.assertEqual(mail.outbox[0].subject, u'Kontakt od wolontariusza')
         self.assertContains(
@@ -238,6 +243,8 @@ class TestCreateOrganization(TestOrganizations):
         )
 
         self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+        call_command('send_queued_mail', stdout=StringIO())
         self.assertEqual(len(mail.outbox), 1)
         self.assertEqual(mail.outbox[0].subject, u'Kontakt od wolontariusza')
         self.assertContains(
@@ -7,6 +7,7 @@ u"""
 from django.conf.urls import url
 
 from apps.volontulo import views
+from apps.volontulo.views import api as api_views
 from apps.volontulo.views import auth as auth_views
 from apps.volontulo.views import admin_panel as admin_views
 from apps.volontulo.views import offers as offers_views
@@ -63,6 +64,11 @@ urlpatterns = [  # pylint: disable=invalid-name
         offers_views.OffersReorder.as_view(),
         name='offers_reorder'
     ),
+    url(
+        r'^offers/saved-searches$',
+        offers_views.SavedSearches.as_view(),
+        name='offers_saved_searches'
+    ),
     url(
         r'^offers/archived$',
         offers_views.OffersArchived.as_view(),
@@ -83,7 +89,21 @@ urlpatterns = [  # pylint: disable=invalid-name
         offers_views.OffersJoin.as_view(),
         name='offers_join'
     ),
-    # offers/filter
+    url(
+        r'^offers/(?P<slug>[\w-]+)/(?P<id_>[0-9]+)/message$',
+        offers_views.OffersMessage.as_view(),
+        name='offers_message'
+    ),
+    url(
+        r'^offers/(?P<slug>[\w-]+)/(?P<id_>[0-9]+)/volunteers\.csv$',
+        offers_views.OffersVolunteersExport.as_view(),
+        name='offers_volunteers_export'
+    ),
+    url(
+        r'^offers/filter$',
+        offers_views.OffersSearch.as_view(),
+        name='offers_filter'
+    ),
 
     # users' namesapce:
     # users
@@ -112,10 +132,33 @@ urlpatterns = [  # pylint: disable=invalid-name
         orgs_views.organization_form,
         name='organization_form'
     ),
+    url(
+        r'^organizations/(?P<slug>[\w-]+)/(?P<id_>[0-9]+)/volunteers\.csv$',
+        orgs_views.organization_volunteers_export,
+        name='organization_volunteers_export'
+    ),
     # organizations/filter
     # organizations/<slug>/<id>/contact
 
 
+    # read-only API:
+    url(r'^api/v1/offers$', api_views.offers_list, name='api_offers_list'),
+    url(
+        r'^api/v1/offers/(?P<id_>[0-9]+)$',
+        api_views.offer_details,
+        name='api_offer_details'
+    ),
+    url(
+        r'^api/v1/organizations$',
+        api_views.organizations_list,
+        name='api_organizations_list'
+    ),
+    url(
+        r'^api/v1/organizations/(?P<id_>[0-9]+)$',
+        api_views.organization_details,
+        name='api_organization_details'
+    ),
+
     # pages:
     url(
         r'^pages$',
@@ -176,4 +219,9 @@ urlpatterns = [  # pylint: disable=invalid-name
         views.newsletter_signup,
         name='newsletter_signup'
     ),
+    url(
+        r'^newsletter/unsubscribe/(?P<uuid>[-0-9A-Za-z]+)$',
+        views.newsletter_unsubscribe,
+        name='newsletter_unsubscribe'
+    ),
 ]
@@ -3,9 +3,13 @@
 u"""
 .. module:: utils
 """
+import time
+from collections import OrderedDict
+
 from django.contrib.admin.models import LogEntry
 from django.contrib.auth.models import User
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
 from django.shortcuts import get_object_or_404
 from django.shortcuts import redirect
 from django.utils.text import slugify
@@ -23,28 +27,70 @@ OFFERS_STATUSES = {
     'CLOSED': 'Zamknięta',
 }
 
+ADMINISTRATORS_CACHE_KEY = 'volontulo:administrators:emails'
+ADMINISTRATORS_CACHE_TIMEOUT = 60 * 60
+# process-wide copy of administrators emails is checked against shared cache
+# after that many seconds, so other processes changes are seen soon:
+ADMINISTRATORS_LOCAL_TIMEOUT = 60
+# (expires, emails) tuple is replaced as a whole, so threads never see
+# emails of one load with expiration time of another or missing keys:
+_ADMINISTRATORS = {}
+
+
+def _load_administrators_emails():
+    u"""Query administrators emails or superusers emails if there are no
+    administrators."""
+    emails = OrderedDict(
+        (str(id_), email)
+        for id_, email in UserProfile.objects.filter(
+            is_administrator=True
+        ).order_by('user__id').values_list('user__id', 'user__email')
+    )
+    if not emails:
+        # pylint: disable=no-member
+        emails = OrderedDict(
+            (str(id_), email)
+            for id_, email in User.objects.filter(
+                is_superuser=True
+            ).order_by('id').values_list('id', 'email')
+        )
+    return emails
+
 
 def get_administrators_emails():
     """Get all administrators emails or superuser email
 
+    Emails are cached by process and in shared cache until administrators
+    change.
+
     Format returned:
     emails = {
         1: 'admin1@example.com',
         2: 'admin2@example.com',
     }
     """
-    administrators = UserProfile.objects.filter(is_administrator=True)
-    emails = {}
-    for admin in administrators:
-        emails[str(admin.user.id)] = admin.user.email
-
-    if not emails:
-        # pylint: disable=no-member
-        administrators = User.objects.filter(is_superuser=True)
-        for admin in administrators:
-            emails[str(admin.id)] = admin.email
-
-    return emails
+    now = time.time()
+    expires, emails = _ADMINISTRATORS.get('local', (0, None))
+    if expires <= now:
+        emails = cache.get(ADMINISTRATORS_CACHE_KEY)
+        if emails is None:
+            emails = _load_administrators_emails()
+            cache.set(
+                ADMINISTRATORS_CACHE_KEY,
+                emails,
+                ADMINISTRATORS_CACHE_TIMEOUT,
+            )
+        _ADMINISTRATORS['local'] = (
+            now + ADMINISTRATORS_LOCAL_TIMEOUT,
+            emails,
+        )
+    return OrderedDict(emails)
+
+
+def invalidate_administrators_emails():
+    u"""Drop cached administrators emails."""
+    _ADMINISTRATORS.pop('local', None)
+    cache.delete(ADMINISTRATORS_CACHE_KEY)
 
 
 def save_history(req, obj, action):
@@ -43,9 +43,9 @@ def homepage(request):  # pylint: disable=unused-argument
     :param request: WSGIRequest instance
     """
     if logged_as_admin(request):
-        offers = Offer.objects.get_for_administrator()
+        offers = Offer.objects.cached('get_for_administrator')
     else:
-        offers = Offer.objects.get_weightened()
+        offers = Offer.objects.cached('get_weightened')
 
     return render(
         request,
@@ -91,13 +91,15 @@ def logged_user_profile(request):
 
     def _populate_participated_offers(request):
         u"""Populate offers that current user participate."""
-        return Offer.objects.filter(volunteers=request.user)
+        return Offer.objects.filter(
+            volunteers=request.user
+        ).select_related('main_image')
 
     def _populate_created_offers(request):
         u"""Populate offers that current user create."""
         return Offer.objects.filter(
             organization__userprofiles__user=request.user
-        )
+        ).select_related('main_image')
 
     def _is_saving_user_avatar():
         u"""."""
@@ -144,12 +146,8 @@ def logged_user_profile(request):
         u"""Handle image upload for user profile page."""
         gallery_form = UserGalleryForm(request.POST, request.FILES)
         if gallery_form.is_valid():
-            userprofile.clean_images()
-            gallery = gallery_form.save(commit=False)
-            gallery.userprofile = userprofile
             # User can only change his avatar
-            gallery.is_avatar = True
-            gallery.save()
+            userprofile.set_avatar(gallery_form.save(commit=False))
             messages.success(request, u"Dodano grafikę")
         else:
             errors = '<br />'.join(gallery_form.errors)
@@ -186,7 +184,9 @@ def logged_user_profile(request):
             )
 
     profile_form = _init_edit_profile_form()
-    userprofile = UserProfile.objects.get(user=request.user)
+    userprofile = UserProfile.objects.select_related('avatar').get(
+        user=request.user
+    )
     galleries = OrganizationGallery.get_organizations_galleries(
         userprofile
     )
@@ -263,11 +263,50 @@ def contact_form(request):
 def newsletter_signup(request):
     u"""Newsletter signup page
 
+    Logged in users subscribe or unsubscribe newsletter by POST request.
+
     :param request: WSGIRequest instance
     """
+    profile = None
+    if request.user.is_authenticated():
+        profile = UserProfile.objects.get(user=request.user)
+        if request.method == 'POST':
+            profile.newsletter = request.POST.get('newsletter') == 'subscribe'
+            profile.save(update_fields=['newsletter'])
+            if profile.newsletter:
+                messages.success(request, u'Zapisałeś się do newslettera.')
+            else:
+                messages.success(request, u'Wypisałeś się z newslettera.')
+            return redirect('newsletter_signup')
     return render(
         request,
-        'newsletter_signup.html'
+        'newsletter_signup.html',
+        {
+            'profile': profile,
+        }
+    )
+
+
+def newsletter_unsubscribe(request, uuid):
+    u"""Unsubscribe newsletter by link from its email.
+
+    :param request: WSGIRequest instance
+    :param uuid: string UUID of user profile
+    """
+    try:
+        profile = UserProfile.objects.get(uuid=uuid)
+    except (UserProfile.DoesNotExist, ValueError):
+        raise Http404
+    if request.method == 'POST':
+        UserProfile.objects.filter(id=profile.id).update(newsletter=False)
+        messages.success(request, u'Wypisałeś się z newslettera.')
+        return redirect('homepage')
+    return render(
+        request,
+        'newsletter_unsubscribe.html',
+        {
+            'profile': profile,
+        }
     )
 
 
@@ -0,0 +1,343 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: api
+"""
+
+import hashlib
+from collections import namedtuple
+from collections import OrderedDict
+
+from django.core.urlresolvers import reverse
+from django.db.models import Prefetch
+from django.http import JsonResponse
+from django.utils.text import slugify
+from django.views.decorators.http import condition
+from django.views.decorators.http import require_GET
+
+from apps.volontulo.lib.cache import offers_generation
+from apps.volontulo.lib.cache import offers_last_modified
+from apps.volontulo.lib.pagination import paginate_offers
+from apps.volontulo.models import Offer
+from apps.volontulo.models import Organization
+
+API_DEFAULT_LIMIT = 20
+API_MAX_LIMIT = 100
+
+# Field of API resource: model columns it needs, relations to select (names
+# for select_related or Prefetch instances) and function returning its value
+# for (object, request) or None for plain model attribute.
+Field = namedtuple('Field', ('columns', 'related', 'getter'))
+
+
+def _plain(name):
+    u"""Return field of model attribute."""
+    return Field((name,), (), None)
+
+
+def _date(name):
+    u"""Return field of date attribute in ISO 8601 format."""
+    def getter(obj, request):  # pylint: disable=unused-argument
+        u"""Return formatted date."""
+        value = getattr(obj, name)
+        return value.isoformat() if value else None
+    return Field((name,), (), getter)
+
+
+def _image_url(image, request):
+    u"""Return absolute URL of image or None."""
+    if image is None:
+        return None
+    return request.build_absolute_uri(image.path.url)
+
+
+OFFER_FIELDS = OrderedDict((
+    ('id', _plain('id')),
+    ('title', _plain('title')),
+    ('description', _plain('description')),
+    ('requirements', _plain('requirements')),
+    ('benefits', _plain('benefits')),
+    ('time_commitment', _plain('time_commitment')),
+    ('location', _plain('location')),
+    ('latitude', _plain('latitude')),
+    ('longitude', _plain('longitude')),
+    ('started_at', _date('started_at')),
+    ('finished_at', _date('finished_at')),
+    ('recruitment_start_date', _date('recruitment_start_date')),
+    ('recruitment_end_date', _date('recruitment_end_date')),
+    ('action_status', _plain('action_status')),
+    ('recruitment_status', _plain('recruitment_status')),
+    ('constant_coop', _plain('constant_coop')),
+    ('volunteers_limit', _plain('volunteers_limit')),
+    ('organization', Field(
+        ('organization', 'organization__name'),
+        ('organization',),
+        lambda offer, request: {
+            'id': offer.organization.id,
+            'name': offer.organization.name,
+        },
+    )),
+    ('main_image', Field(
+        ('main_image', 'main_image__path'),
+        ('main_image',),
+        lambda offer, request: _image_url(offer.main_image, request),
+    )),
+    ('url', Field(
+        ('title',),
+        (),
+        lambda offer, request: request.build_absolute_uri(reverse(
+            'offers_view', args=[slugify(offer.title), offer.id]
+        )),
+    )),
+))
+ORGANIZATION_FIELDS = OrderedDict((
+    ('id', _plain('id')),
+    ('name', _plain('name')),
+    ('address', _plain('address')),
+    ('description', _plain('description')),
+    ('main_image', Field(
+        ('main_image', 'main_image__path'),
+        ('main_image',),
+        lambda organization, request: _image_url(
+            organization.main_image, request
+        ),
+    )),
+    ('offers', Field(
+        (),
+        (Prefetch(
+            'offer_set',
+            queryset=Offer.objects.get_active().only(
+                'id', 'title', 'organization'
+            ).order_by('weight', 'id'),
+            to_attr='active_offers',
+        ),),
+        lambda organization, request: [
+            {'id': offer.id, 'title': offer.title}
+            for offer in organization.active_offers
+        ],
+    )),
+    ('url', Field(
+        ('name',),
+        (),
+        lambda organization, request: request.build_absolute_uri(reverse(
+            'organization_view', args=[slugify(organization.name),
+                                       organization.id]
+        )),
+    )),
+))
+
+
+class ApiError(Exception):
+    u"""Invalid API request."""
+
+
+def _error(message, status=400):
+    u"""Return JSON response describing error."""
+    return JsonResponse({'error': message}, status=status)
+
+
+def _get_fields(request, specs):
+    u"""Return names of fields requested with "fields" parameter.
+
+    :param request: WSGIRequest instance
+    :param specs: OrderedDict Fields of resource
+    :raises ApiError: when some of fields are unknown
+    """
+    if not request.GET.get('fields'):
+        return list(specs)
+    fields = [name for name in request.GET['fields'].split(',') if name]
+    unknown = [name for name in fields if name not in specs]
+    if unknown:
+        raise ApiError(u"Unknown fields: {}.".format(u', '.join(unknown)))
+    return fields
+
+
+def _get_limit(request):
+    u"""Return number of objects on requested page."""
+    try:
+        limit = int(request.GET.get('limit', API_DEFAULT_LIMIT))
+    except ValueError:
+        raise ApiError(u"Invalid limit.")
+    if not 0 < limit <= API_MAX_LIMIT:
+        raise ApiError(
+            u"Limit has to be between 1 and {}.".format(API_MAX_LIMIT)
+        )
+    return limit
+
+
+def _select(queryset, fields, specs, columns=('id',)):
+    u"""Load only columns and relations needed by requested fields.
+
+    :param queryset: QuerySet instance
+    :param fields: list Names of requested fields
+    :param specs: OrderedDict Fields of resource
+    :param columns: tuple Columns loaded regardless of fields
+    """
+    columns = set(columns)
+    select_related = set()
+    prefetch_related = []
+    for name in fields:
+        columns.update(specs[name].columns)
+        for related in specs[name].related:
+            if isinstance(related, Prefetch):
+                prefetch_related.append(related)
+            else:
+                select_related.add(related)
+    return queryset.select_related(*select_related).prefetch_related(
+        *prefetch_related
+    ).only(*columns)
+
+
+def _serialize(obj, fields, specs, request):
+    u"""Return dict of requested fields of object."""
+    data = OrderedDict()
+    for name in fields:
+        getter = specs[name].getter
+        data[name] = (
+            getter(obj, request) if getter else getattr(obj, name)
+        )
+    return data
+
+
+def _next_url(request, cursor):
+    u"""Return absolute URL of next page or None."""
+    if cursor is None:
+        return None
+    params = request.GET.copy()
+    params['after'] = cursor
+    return request.build_absolute_uri(
+        u'{}?{}'.format(request.path, params.urlencode())
+    )
+
+
+def _etag(request, *args, **kwargs):  # pylint: disable=unused-argument
+    u"""Return ETag of response.
+
+    Offers generation changes whenever any offer or organization changes,
+    so conditional requests are answered without querying database.
+    """
+    return hashlib.md5(u'{}:{}'.format(
+        offers_generation(),
+        request.get_full_path(),
+    ).encode('utf-8')).hexdigest()
+
+
+def _last_modified(request, *args, **kwargs):
+    u"""Return time of last change of offers and organizations."""
+    # pylint: disable=unused-argument
+    return offers_last_modified()
+
+
+@require_GET
+@condition(etag_func=_etag, last_modified_func=_last_modified)
+def offers_list(request):
+    u"""List active offers.
+
+    :param request: WSGIRequest instance
+    """
+    try:
+        fields = _get_fields(request, OFFER_FIELDS)
+        offers, cursor = paginate_offers(
+            _select(
+                Offer.objects.get_active(),
+                fields,
+                OFFER_FIELDS,
+                ('id', 'weight'),
+            ),
+            request.GET.get('after'),
+            _get_limit(request),
+        )
+    except (ApiError, ValueError) as ex:
+        return _error(str(ex))
+    return JsonResponse({
+        'results': [
+            _serialize(offer, fields, OFFER_FIELDS, request)
+            for offer in offers
+        ],
+        'next': _next_url(request, cursor),
+    })
+
+
+@require_GET
+@condition(etag_func=_etag, last_modified_func=_last_modified)
+def offer_details(request, id_):
+    u"""Show published offer.
+
+    :param request: WSGIRequest instance
+    :param id_: string Offer id
+    """
+    try:
+        fields = _get_fields(request, OFFER_FIELDS)
+    except ApiError as ex:
+        return _error(str(ex))
+    offer = _select(
+        Offer.objects.filter(offer_status='published', id=id_),
+        fields,
+        OFFER_FIELDS,
+    ).first()
+    if offer is None:
+        return _error(u"Offer does not exist.", 404)
+    return JsonResponse(_serialize(offer, fields, OFFER_FIELDS, request))
+
+
+@require_GET
+@condition(etag_func=_etag, last_modified_func=_last_modified)
+def organizations_list(request):
+    u"""List organizations ordered by id.
+
+    :param request: WSGIRequest instance
+    """
+    try:
+        fields = _get_fields(request, ORGANIZATION_FIELDS)
+        limit = _get_limit(request)
+        organizations = _select(
+            Organization.objects.order_by('id'),
+            fields,
+            ORGANIZATION_FIELDS,
+        )
+        if request.GET.get('after'):
+            if not request.GET['after'].isdigit():
+                raise ApiError(
+                    u"Invalid cursor: {}".format(request.GET['after'])
+                )
+            organizations = organizations.filter(
+                id__gt=int(request.GET['after'])
+            )
+    except ApiError as ex:
+        return _error(str(ex))
+    organizations = list(organizations[:limit + 1])
+    cursor = None
+    if len(organizations) > limit:
+        organizations = organizations[:limit]
+        cursor = str(organizations[-1].id)
+    return JsonResponse({
+        'results': [
+            _serialize(organization, fields, ORGANIZATION_FIELDS, request)
+            for organization in organizations
+        ],
+        'next': _next_url(request, cursor),
+    })
+
+
+@require_GET
+@condition(etag_func=_etag, last_modified_func=_last_modified)
+def organization_details(request, id_):
+    u"""Show organization.
+
+    :param request: WSGIRequest instance
+    :param id_: string Organization id
+    """
+    try:
+        fields = _get_fields(request, ORGANIZATION_FIELDS)
+    except ApiError as ex:
+        return _error(str(ex))
+    organization = _select(
+        Organization.objects.filter(id=id_),
+        fields,
+        ORGANIZATION_FIELDS,
+    ).first()
+    if organization is None:
+        return _error(u"Organization does not exist.", 404)
+    return JsonResponse(
+        _serialize(organization, fields, ORGANIZATION_FIELDS, request)
+    )
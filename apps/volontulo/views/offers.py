@@ -4,24 +4,50 @@ u"""
 .. module:: offers
 """
 
+import hashlib
+import json
+
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.admin.models import ADDITION, CHANGE
+from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
+from django.core.paginator import InvalidPage, Paginator
 from django.core.urlresolvers import reverse
-from django.http import Http404, HttpResponseForbidden
+from django.http import Http404, HttpResponseForbidden, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils.decorators import method_decorator
+from django.utils.http import urlencode
 from django.utils.text import slugify
 from django.views.generic import View
 
 from apps.volontulo.forms import (
-    CreateOfferForm, OfferApplyForm, OfferImageForm
+    CreateOfferForm, OfferApplyForm, OfferImageForm, OfferMessageForm
 )
+from apps.volontulo.lib.cache import cached_offers_data
 from apps.volontulo.lib.email import send_mail
-from apps.volontulo.models import Offer, OfferImage, UserProfile
+from apps.volontulo.lib.export import VOLUNTEERS_HEADER
+from apps.volontulo.lib.export import csv_response
+from apps.volontulo.lib.export import offer_applications
+from apps.volontulo.lib.export import volunteers_rows
+from apps.volontulo.lib.facets import count_facets
+from apps.volontulo.lib.facets import filter_offers
+from apps.volontulo.lib.facets import link_facets
+from apps.volontulo.lib.geo import NEAREST_MAX_RADIUS
+from apps.volontulo.lib.geo import geocode
+from apps.volontulo.lib.geo import offers_near
+from apps.volontulo.lib.pagination import paginate_offers
+from apps.volontulo.lib.search import search_offers
+from apps.volontulo.models import (
+    BulkMessage, Offer, OfferImage, SavedSearch, UserProfile, WebhookDelivery
+)
 from apps.volontulo.utils import correct_slug, save_history
 from apps.volontulo.views import logged_as_admin
 
+OFFERS_PER_PAGE = 20
+# distances (in km) offered in offers list "near" filter:
+RADIUS_CHOICES = (10, 25, 50, 100)
+
 
 class OffersList(View):
     u"""View that handle list of offers."""
@@ -35,13 +61,86 @@ class OffersList(View):
         """
         if logged_as_admin(request):
             offers = Offer.objects.all()
+            scope = 'all'
         else:
             offers = Offer.objects.get_active()
+            scope = 'active'
+
+        filtered, selected = filter_offers(offers, request.GET)
+        # values of each facet are counted without its own selection:
+        facets = count_facets(offers, selected, scope)
+        offers = filtered
+        filters_query = link_facets(facets, request.GET)
+        near = request.GET.get('near', '').strip()
+        coordinates = geocode(near) if near else None
+        if near and coordinates is None:
+            messages.info(
+                request,
+                u"Nie znaleziono miejscowości \"{}\".".format(near)
+            )
+            offers, next_cursor = [], None
+        else:
+            offers = offers.select_related('organization', 'main_image')
+            try:
+                if scope == 'active':
+                    # the same pages are shown to all users until any offer
+                    # changes, so they are served from cache:
+                    offers, next_cursor = cached_offers_data((
+                        'list',
+                        hashlib.md5(
+                            urlencode(sorted(request.GET.items()))
+                            .encode('utf-8')
+                        ).hexdigest(),
+                    ), lambda: OffersList.get_page(
+                        offers, request.GET, coordinates
+                    ))
+                else:
+                    offers, next_cursor = OffersList.get_page(
+                        offers, request.GET, coordinates
+                    )
+            except ValueError:
+                raise Http404
 
         return render(request, "offers/offers_list.html", context={
             'offers': offers,
+            'next_cursor': next_cursor,
+            'is_first_page': not request.GET.get('after'),
+            'facets': facets,
+            'filters_query': filters_query,
+            'near': near,
+            'radius': request.GET.get('radius', ''),
+            'radius_choices': RADIUS_CHOICES,
         })
 
+    @staticmethod
+    def get_page(offers, params, coordinates=None):
+        u"""Return list of offers on requested page and cursor of next one.
+
+        Offers nearest to given coordinates are shown on single page.
+
+        :param offers: Offer QuerySet instance
+        :param params: QueryDict instance, e.g. request.GET
+        :param coordinates: tuple Latitude and longitude or None
+        :raises ValueError: when cursor of page is invalid
+        """
+        if coordinates is None:
+            return paginate_offers(
+                offers,
+                params.get('after'),
+                OFFERS_PER_PAGE,
+            )
+        try:
+            radius = min(float(params['radius']), NEAREST_MAX_RADIUS)
+        except (KeyError, ValueError):
+            radius = None
+        return offers_near(
+            offers,
+            coordinates[0],
+            coordinates[1],
+            radius if radius and radius > 0 else None,
+            OFFERS_PER_PAGE,
+        ), None
+
     @staticmethod
     def post(request):
         u"""Method responsible for rendering form for new offer.
@@ -59,6 +158,89 @@ class OffersList(View):
         return redirect('offers_list')
 
 
+class OffersSearch(View):
+    u"""View that handle searching of active offers."""
+
+    @staticmethod
+    def get(request):
+        u"""Show page of offers matching search phrase.
+
+        :param request: WSGIRequest instance
+        """
+        query = request.GET.get('q', '')
+        offers = search_offers(
+            Offer.objects.get_active().select_related(
+                'organization',
+                'main_image',
+            ),
+            query,
+        )
+        try:
+            page = Paginator(offers, OFFERS_PER_PAGE).page(
+                request.GET.get('page', 1)
+            )
+        except InvalidPage:
+            raise Http404
+
+        return render(request, 'offers/search.html', context={
+            'offers': page,
+            'query': query,
+        })
+
+
+class SavedSearches(View):
+    u"""Class view managing saved searches of user, who gets emails about
+    new offers matching them."""
+
+    @method_decorator(login_required)
+    def dispatch(self, *args, **kwargs):
+        u"""Dispatch method overriden to require logged in user."""
+        return super(SavedSearches, self).dispatch(*args, **kwargs)
+
+    @staticmethod
+    def get(request):
+        u"""Show saved searches of user.
+
+        :param request: WSGIRequest instance
+        """
+        return render(request, 'offers/saved_searches.html', context={
+            'saved_searches': SavedSearch.objects.filter(
+                user=request.user,
+            ).order_by('-created_at'),
+        })
+
+    @staticmethod
+    def post(request):
+        u"""Save search phrase or delete saved search.
+
+        :param request: WSGIRequest instance
+        """
+        if request.POST.get('delete'):
+            try:
+                search_id = int(request.POST['delete'])
+            except ValueError:
+                raise Http404
+            get_object_or_404(
+                SavedSearch, id=search_id, user=request.user
+            ).delete()
+            messages.success(request, u"Usunięto zapisane wyszukiwanie.")
+            return redirect('offers_saved_searches')
+        try:
+            SavedSearch.objects.create_search(
+                request.user,
+                request.POST.get('query', u'')[:150],
+            )
+        except ValueError:
+            messages.error(request, u"Podaj słowa, których szukasz.")
+        else:
+            messages.success(
+                request,
+                u"Powiadomimy Cię o nowych ofertach pasujących "
+                u"do wyszukiwania."
+            )
+        return redirect('offers_saved_searches')
+
+
 class OffersCreate(View):
     u"""Class view supporting creation of new offer."""
 
@@ -141,6 +323,15 @@ class OffersCreate(View):
 class OffersReorder(View):
     u"""Class view supporting change of a offer."""
 
+    def dispatch(self, request, *args, **kwargs):
+        u"""Dispatch method overriden to allow only administrators."""
+        if not (
+                request.user.is_authenticated() and
+                request.user.userprofile.is_administrator
+        ):
+            return HttpResponseForbidden()
+        return super(OffersReorder, self).dispatch(request, *args, **kwargs)
+
     @staticmethod
     def get(request, id_):
         u"""Display offer list with weights GET request.
@@ -149,27 +340,44 @@ class OffersReorder(View):
         :param id_:
         :return:
         """
-        offers = Offer.objects.get_weightened()
+        offers = Offer.objects.get_weightened().select_related(
+            'organization',
+            'main_image',
+        )
         return render(request, 'offers/reorder.html', {
             'offers': offers, 'id': id_})
 
-    @staticmethod
-    def post(request, id_):
-        u"""Display offer list with weights GET request.
+    @classmethod
+    def post(cls, request, id_):
+        u"""Save offers weights submitted by form or sent as JSON.
 
-        :param request:
+        :param request: WSGIRequest instance
         :param id_: Integer newly created offer id
-        :return:
         """
+        if request.META.get('CONTENT_TYPE', '').startswith(
+                'application/json'
+        ):
+            return cls._post_json(request)
+
         if request.POST.get('submit') == 'reorder':
-            items = [item
-                     for item
-                     in request.POST.items()
-                     if item[0].startswith('weight_')]
-            weights = {id_.split('_')[1]: weight
-                       for id_, weight in items}
-            for id_, weight in weights.items():
-                Offer.objects.filter(id=id_).update(weight=weight)
+            try:
+                Offer.objects.reorder({
+                    int(key.split('_', 1)[1]): int(weight)
+                    for key, weight in request.POST.items()
+                    if key.startswith('weight_')
+                })
+            except ValueError:
+                messages.error(
+                    request,
+                    u"Wagi ofert muszą być liczbami całkowitymi."
+                )
+                return redirect(request.path)
+            except Offer.DoesNotExist:
+                messages.error(
+                    request,
+                    u"Część ofert nie istnieje. Odśwież listę ofert."
+                )
+                return redirect(request.path)
 
             messages.success(
                 request,
@@ -177,6 +385,35 @@ class OffersReorder(View):
             )
         return redirect('offers_list')
 
+    @staticmethod
+    def _post_json(request):
+        u"""Save offers order sent by drag and drop clients.
+
+        Accepted body is either {"order": [<id>, ...]} with offers ids in
+        desired order, or {"weights": {"<id>": <weight>, ...}}.
+
+        :param request: WSGIRequest instance
+        """
+        try:
+            data = json.loads(request.body.decode('utf-8'))
+            if 'order' in data:
+                updated = Offer.objects.arrange(
+                    [int(id_) for id_ in data['order']]
+                )
+            else:
+                updated = Offer.objects.reorder({
+                    int(id_): int(weight)
+                    for id_, weight in data['weights'].items()
+                })
+        except (AttributeError, KeyError, TypeError, ValueError):
+            return JsonResponse(
+                {'error': u"Niepoprawny format danych."},
+                status=400,
+            )
+        except Offer.DoesNotExist as ex:
+            return JsonResponse({'error': str(ex)}, status=400)
+        return JsonResponse({'updated': updated})
+
 
 class OffersEdit(View):
     u"""Class view supporting change of a offer."""
@@ -326,6 +563,97 @@ class OffersDelete(View):
             return HttpResponseForbidden()
 
 
+class OffersVolunteersExport(View):
+    u"""Class view exporting volunteers who joined offer to CSV file."""
+
+    @staticmethod
+    def get(request, slug, id_):
+        u"""Stream CSV file with volunteers of offer.
+
+        :param request: WSGIRequest instance
+        :param slug: string Offer title slug
+        :param id_: int Offer id
+        """
+        offer = get_object_or_404(Offer, id=id_)
+        if (
+                request.user.is_authenticated() and
+                request.user.userprofile.can_edit_offer(offer=offer)
+        ):
+            return csv_response(
+                u'wolontariusze-{}.csv'.format(slug),
+                VOLUNTEERS_HEADER,
+                volunteers_rows(offer_applications(offer.id)),
+            )
+        else:
+            return HttpResponseForbidden()
+
+
+class OffersMessage(View):
+    u"""Class view sending message to all volunteers of offer."""
+
+    def dispatch(self, request, *args, **kwargs):
+        u"""Dispatch method overriden to check offer edit permission."""
+        if not (
+                request.user.is_authenticated() and
+                request.user.userprofile.can_edit_offer(
+                    offer=get_object_or_404(Offer, id=kwargs['id_'])
+                )
+        ):
+            return HttpResponseForbidden()
+        return super(OffersMessage, self).dispatch(request, *args, **kwargs)
+
+    @staticmethod
+    def get(request, slug, id_):  # pylint: disable=unused-argument
+        u"""Show form of message.
+
+        :param request: WSGIRequest instance
+        :param slug: string Offer title slug
+        :param id_: int Offer id
+        """
+        offer = Offer.objects.get(id=id_)
+        return render(request, 'offers/message.html', context={
+            'offer': offer,
+            'form': OfferMessageForm(),
+            'volunteers_count': offer.volunteers.count(),
+        })
+
+    @staticmethod
+    def post(request, slug, id_):  # pylint: disable=unused-argument
+        u"""Queue message, which is sent by send_bulk_messages command.
+
+        :param request: WSGIRequest instance
+        :param slug: string Offer title slug
+        :param id_: int Offer id
+        """
+        offer = Offer.objects.get(id=id_)
+        form = OfferMessageForm(request.POST)
+        if not form.is_valid():
+            messages.error(request, u'Podaj temat i treść wiadomości.')
+        elif not BulkMessage.objects.create_within_limit(
+                offer,
+                request.user,
+                form.cleaned_data['subject'],
+                form.cleaned_data['message'],
+        ):
+            messages.error(
+                request,
+                u'Organizacja wysłała dziś już {} wiadomości, spróbuj '
+                u'jutro.'.format(BulkMessage.objects.MAX_PER_DAY)
+            )
+        else:
+            messages.success(
+                request,
+                u'Wiadomość zostanie wysłana do wolontariuszy oferty.'
+            )
+            return redirect('offers_view', slug=slugify(offer.title),
+                            id_=offer.id)
+        return render(request, 'offers/message.html', context={
+            'offer': offer,
+            'form': form,
+            'volunteers_count': offer.volunteers.count(),
+        })
+
+
 class OffersAccept(View):
     """ Class view responsible for acceptance of offers """
 
@@ -355,11 +683,11 @@ class OffersView(View):
     @correct_slug(Offer, 'offers_view', 'title')
     def get(request, slug, id_):  # pylint: disable=unused-argument
         u"""View responsible for showing details of particular offer."""
-        offer = get_object_or_404(Offer, id=id_)
-        try:
-            main_image = OfferImage.objects.get(offer=offer, is_main=True)
-        except OfferImage.DoesNotExist:
-            main_image = ''
+        offer = get_object_or_404(
+            Offer.objects.select_related('main_image'),
+            id=id_,
+        )
+        main_image = offer.main_image or ''
 
         volunteers = None
         users = [u.user.id for u in offer.organization.userprofiles.all()]
@@ -417,11 +745,8 @@ class OffersJoin(View):
                 )
                 return redirect('offers_list')
 
-        offer = Offer.objects.get(id=id_)
-        try:
-            main_image = OfferImage.objects.get(offer=offer, is_main=True)
-        except OfferImage.DoesNotExist:
-            main_image = ''
+        offer = Offer.objects.select_related('main_image').get(id=id_)
+        main_image = offer.main_image or ''
 
         context = {
             'form': OfferApplyForm(),
@@ -498,6 +823,27 @@ class OffersJoin(View):
                     offer=offer,
                 )
             )
+            # delivered to organization endpoints by deliver_webhooks:
+            WebhookDelivery.objects.enqueue(
+                offer.organization_id,
+                'application.created',
+                {
+                    'offer': {
+                        'id': offer.id,
+                        'title': offer.title,
+                        'url': request.build_absolute_uri(reverse(
+                            'offers_view',
+                            args=[slugify(offer.title), offer.id],
+                        )),
+                    },
+                    'volunteer': {
+                        'email': request.POST.get('email'),
+                        'fullname': request.POST.get('fullname'),
+                        'phone_no': request.POST.get('phone_no'),
+                        'comments': request.POST.get('comments'),
+                    },
+                },
+            )
             messages.success(
                 request,
                 u'Zgłoszenie chęci uczestnictwa zostało wysłane.'
@@ -537,5 +883,5 @@ class OffersArchived(View):
         :param request: WSGIRequest instance
         """
         return render(request, 'offers/archived.html', {
-            'offers': Offer.objects.get_archived()
+            'offers': Offer.objects.cached('get_archived')
         })
@@ -7,6 +7,7 @@ u"""
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.urlresolvers import reverse
+from django.http import HttpResponseForbidden
 from django.shortcuts import get_object_or_404
 from django.shortcuts import redirect
 from django.shortcuts import render
@@ -15,6 +16,10 @@ from django.views.generic import View
 
 from apps.volontulo.forms import VolounteerToOrganizationContactForm
 from apps.volontulo.lib.email import send_mail
+from apps.volontulo.lib.export import VOLUNTEERS_HEADER
+from apps.volontulo.lib.export import csv_response
+from apps.volontulo.lib.export import organization_applications
+from apps.volontulo.lib.export import volunteers_rows
 from apps.volontulo.models import Offer
 from apps.volontulo.models import Organization
 from apps.volontulo.models import UserProfile
@@ -153,7 +158,9 @@ def organization_form(request, slug, id_):
 def organization_view(request, slug, id_):
     u"""View responsible for viewing organization."""
     org = get_object_or_404(Organization, id=id_)
-    offers = Offer.objects.filter(organization_id=id_)
+    offers = Offer.objects.filter(
+        organization_id=id_
+    ).select_related('main_image')
     allow_contact = True
     allow_edit = False
     allow_offer_create = False
@@ -209,3 +216,25 @@ def organization_view(request, slug, id_):
             'allow_offer_create': allow_offer_create,
         }
     )
+
+
+@login_required
+def organization_volunteers_export(request, slug, id_):
+    u"""Stream CSV file with volunteers of all organization offers.
+
+    :param request: WSGIRequest instance
+    :param slug: string Organization name slug
+    :param id_: int Organization id
+    """
+    org = get_object_or_404(Organization, id=id_)
+    userprofile = request.user.userprofile
+    if not (
+            userprofile.is_administrator or
+            userprofile.organizations.filter(id=org.id).exists()
+    ):
+        return HttpResponseForbidden()
+    return csv_response(
+        u'wolontariusze-{}.csv'.format(slug),
+        VOLUNTEERS_HEADER,
+        volunteers_rows(organization_applications(org.id)),
+    )
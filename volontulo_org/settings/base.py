@@ -124,6 +124,15 @@ STATIC_URL = '/static/'
 EMAIL_HOST = 'localhost'
 EMAIL_PORT = 25
 EMAIL_USE_TLS = False
+# SMTP connections are reused by workers of each process, see
+# apps.volontulo.lib.smtp_pool:
+EMAIL_POOL_SIZE = 4
+EMAIL_POOL_IDLE_TIMEOUT = 60
+EMAIL_POOL_ACQUIRE_TIMEOUT = 30
+# emails are only queued in outbox and nothing is delivered until
+# send_queued_mail command runs (from cron or as --loop worker). With this
+# setting emails queued by requests are sent right away, e.g. in development:
+OUTBOX_SEND_IMMEDIATELY = False
 
 
 # verify if it's required for registering user
@@ -134,5 +143,20 @@ AUTHENTICATION_BACKENDS = (
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = '/media/'
 
+# Offers lists are cached until any offer changes. Production has to use
+# cache shared by all processes (e.g. memcached), otherwise changes made in
+# one process do not invalidate cached lists of the others.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+# Offers search backend: "database" queries PostgreSQL full-text index (or
+# plain LIKE on other databases), "index" uses in-process index of active
+# offers, loaded on startup from file created by build_search_index command.
+OFFERS_SEARCH_BACKEND = 'database'
+OFFERS_SEARCH_INDEX_PATH = os.path.join(BASE_DIR, 'offers_search.index')
+
 # settings required if we want to use @login_required decorator
 LOGIN_URL = 'login'
@@ -30,3 +30,5 @@ DATABASES = {
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'fake_emails')
+# emails are written to EMAIL_FILE_PATH without send_queued_mail worker:
+OUTBOX_SEND_IMMEDIATELY = True
@@ -0,0 +1,12 @@
+"""
+Test Settings Module
+"""
+
+from .dev import *
+
+# tests never load search index file left by build_search_index command in
+# development environment, index is built from test database instead:
+OFFERS_SEARCH_INDEX_PATH = None
+
+# emails stay in outbox until send_queued_mail runs, as in production:
+OUTBOX_SEND_IMMEDIATELY = False